@@ -0,0 +1,280 @@
+import re
+
+###############################################################################
+#                      Streaming ANSI / VT parser
+###############################################################################
+#
+# AnsiParser.feed() takes decoded text in arbitrary chunks and returns compact
+# records:
+#
+#   (TEXT, text, style)             printable text in one style
+#   (CSI, final, params, private)   a non-SGR control sequence, e.g. cursor
+#                                   movement ('A'..'H'), erase ('J', 'K')
+#   (ESC, char)                     a two-character escape, e.g. ESC 7 / ESC 8
+#
+# SGR sequences never appear as records; they only change the current style,
+# which persists across feed() calls (and so across lines). An escape sequence
+# cut off at the end of a chunk is held back and completed by the next one.
+#
+# A style is a (fg, bg, flags) tuple. fg/bg are None (default), a palette index
+# 0-255, or TRUECOLOR | 0xRRGGBB.
+
+TEXT = 0
+CSI = 1
+ESC = 2
+
+BOLD = 1
+FAINT = 2
+ITALIC = 4
+UNDERLINE = 8
+BLINK = 16
+REVERSE = 32
+CONCEAL = 64
+STRIKE = 128
+
+TRUECOLOR = 1 << 24
+DEFAULT_STYLE = (None, None, 0)
+
+_SGR_SET = {1: BOLD, 2: FAINT, 3: ITALIC, 4: UNDERLINE, 5: BLINK, 6: BLINK, 7: REVERSE, 8: CONCEAL, 9: STRIKE}
+_SGR_CLEAR = {21: BOLD, 22: BOLD | FAINT, 23: ITALIC, 24: UNDERLINE, 25: BLINK, 27: REVERSE, 28: CONCEAL, 29: STRIKE}
+
+# One scan over the chunk finds every escape sequence:
+#   CSI (groups 1-3), OSC string, charset designation, ESC + a final char
+#   '0'..'~' other than '[' and ']' (group 4), or a lone ESC that may be the
+#   start of a sequence split across chunks. A stray ESC before anything else
+#   (a newline, say) is dropped and the character kept as text.
+_TOKEN_RE = re.compile(
+    r'\x1b\[([0-?]*)([ -/]*)([@-~])'
+    r'|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)'
+    r'|\x1b[()*+#%][ -~]'
+    r'|\x1b([0-Z\\^-~])'
+    r'|\x1b'
+)
+# An escape sequence that may still be completed by the next chunk.
+_PARTIAL_RE = re.compile(r'\x1b(?:\[[0-?]*[ -/]*|\][^\x07\x1b]*\x1b?|[()*+#%])?\Z')
+_MAX_PENDING = 512
+
+
+_KEEP = object()
+
+
+class AnsiParser:
+    def __init__(self):
+        self.style = DEFAULT_STYLE
+        self.pending = ""
+        self.sgr_cache = {}  # SGR parameter string -> compiled delta (see _compile_sgr)
+
+    def reset(self):
+        self.style = DEFAULT_STYLE
+        self.pending = ""
+
+    def feed(self, data):
+        """Parse a chunk of text and return a list of records."""
+        if self.pending:
+            data = self.pending + data
+            self.pending = ""
+        records = []
+        append = records.append
+        style = self.style
+        sgr_cache = self.sgr_cache
+        parts = []  # text pieces of the current run, all in run_style
+        run_style = style
+        pos = 0
+
+        for match in _TOKEN_RE.finditer(data):
+            start = match.start()
+            if start > pos:
+                if parts and run_style != style:
+                    append((TEXT, "".join(parts), run_style))
+                    parts = []
+                run_style = style
+                parts.append(data[pos:start])
+            pos = match.end()
+
+            params, intermediates, final, esc_char = match.groups()
+            if final == "m" and not intermediates:
+                delta = sgr_cache.get(params)
+                if delta is None:
+                    if len(sgr_cache) > 4096:
+                        sgr_cache.clear()
+                    delta = sgr_cache[params] = _compile_sgr(params)
+                reset, fg, bg, set_flags, clear_flags = delta
+                base_fg, base_bg, flags = DEFAULT_STYLE if reset else style
+                style = (
+                    base_fg if fg is _KEEP else fg,
+                    base_bg if bg is _KEEP else bg,
+                    (flags & ~clear_flags) | set_flags,
+                )
+                continue
+
+            if final or esc_char:
+                if parts:
+                    append((TEXT, "".join(parts), run_style))
+                    parts = []
+                if final:
+                    private = params[:1] if params[:1] in ("?", ">", "<", "=") else ""
+                    append((CSI, final, _parse_params(params[len(private):]), private))
+                else:
+                    append((ESC, esc_char))
+            elif match.group(0) == "\x1b":
+                # A lone ESC: either a sequence cut off by the end of the chunk, or garbage.
+                if _PARTIAL_RE.match(data, start) and len(data) - start <= _MAX_PENDING:
+                    self.pending = data[start:]
+                    pos = len(data)
+                    break
+            # OSC strings and charset designations are consumed without a record.
+
+        if pos < len(data):
+            if parts and run_style != style:
+                append((TEXT, "".join(parts), run_style))
+                parts = []
+            run_style = style
+            parts.append(data[pos:])
+        if parts:
+            append((TEXT, "".join(parts), run_style))
+        self.style = style
+        return records
+
+
+def _compile_sgr(params):
+    """Turn an SGR parameter string into a style delta.
+
+    Returns (reset, fg, bg, set_flags, clear_flags): start from the default
+    style if reset, replace fg/bg unless they are _KEEP, then clear and set
+    flags. The delta only depends on the parameters, so it is cached per
+    parameter string and applying it is a few tuple operations.
+    """
+    reset = False
+    fg = bg = _KEEP
+    set_flags = clear_flags = 0
+    codes = _parse_params(params.replace(":", ";")) or [0]
+    i = 0
+    count = len(codes)
+    while i < count:
+        code = codes[i] or 0
+        i += 1
+        if code == 0:
+            reset = True
+            fg = bg = _KEEP
+            set_flags = clear_flags = 0
+        elif 30 <= code <= 37:
+            fg = code - 30
+        elif 40 <= code <= 47:
+            bg = code - 40
+        elif 90 <= code <= 97:
+            fg = code - 90 + 8
+        elif 100 <= code <= 107:
+            bg = code - 100 + 8
+        elif code == 39:
+            fg = None
+        elif code == 49:
+            bg = None
+        elif code in (38, 48):
+            color, i = _extended_color(codes, i)
+            if color is not None:
+                if code == 38:
+                    fg = color
+                else:
+                    bg = color
+        elif code in _SGR_SET:
+            set_flags |= _SGR_SET[code]
+            clear_flags &= ~_SGR_SET[code]
+        elif code in _SGR_CLEAR:
+            clear_flags |= _SGR_CLEAR[code]
+            set_flags &= ~_SGR_CLEAR[code]
+    return (reset, fg, bg, set_flags, clear_flags)
+
+
+def _parse_params(params):
+    """'1;;5' -> [1, None, 5]. Empty parameters stay None so callers can apply defaults."""
+    if not params:
+        return []
+    return [int(p) if p.isdigit() else None for p in params.split(";")]
+
+
+def _extended_color(codes, i):
+    """Parse the tail of 38/48: '5;n' or '2;r;g;b'. Returns (color, next index)."""
+    if i >= len(codes):
+        return None, i
+    mode = codes[i]
+    if mode == 5 and i + 1 < len(codes):
+        return (codes[i + 1] or 0) & 0xFF, i + 2
+    if mode == 2 and i + 3 < len(codes):
+        # 38:2::r:g:b (ITU colon form with an empty colorspace id) has one extra field.
+        if i + 4 < len(codes) and codes[i + 1] is None:
+            i += 1
+        r, g, b = ((c or 0) & 0xFF for c in codes[i + 1:i + 4])
+        return TRUECOLOR | (r << 16) | (g << 8) | b, i + 4
+    return None, i + 1
+
+
+def plain_text(records):
+    """Join the text of a record list, i.e. the input with all escape sequences removed."""
+    return "".join(record[1] for record in records if record[0] == TEXT)
+
+
+###############################################################################
+#                         Styles -> colors / Tk tags
+###############################################################################
+
+# Normal colors keep the app's existing choices (lighter blue); bright ones
+# follow the DOS VGA palette.
+PALETTE_16 = [
+    "#000000", "#FF0000", "#00FF00", "#FFFF00", "#3399FF", "#FF00FF", "#00FFFF", "#FFFFFF",
+    "#555555", "#FF5555", "#55FF55", "#FFFF55", "#5599FF", "#FF55FF", "#55FFFF", "#FFFFFF",
+]
+DEFAULT_FG = "#FFFFFF"
+DEFAULT_BG = "#000000"
+
+
+def palette_color(index):
+    """Hex color for a 256-color palette index."""
+    if index < 16:
+        return PALETTE_16[index]
+    if index < 232:
+        index -= 16
+        levels = [0, 95, 135, 175, 215, 255]
+        r, g, b = levels[index // 36], levels[(index // 6) % 6], levels[index % 6]
+        return f"#{r:02X}{g:02X}{b:02X}"
+    level = 8 + (index - 232) * 10
+    return f"#{level:02X}{level:02X}{level:02X}"
+
+
+def color_hex(color, default):
+    if color is None:
+        return default
+    if color & TRUECOLOR:
+        return f"#{color & 0xFFFFFF:06X}"
+    return palette_color(color)
+
+
+def style_colors(style):
+    """Return (foreground, background or None, underline, overstrike) for a style."""
+    fg, bg, flags = style
+    if flags & BOLD and fg is not None and fg < 8:
+        fg += 8  # BBS convention: bold selects the bright color
+    foreground = color_hex(fg, DEFAULT_FG)
+    background = color_hex(bg, DEFAULT_BG) if bg is not None else None
+    if flags & REVERSE:
+        foreground, background = background or DEFAULT_BG, foreground
+    if flags & CONCEAL:
+        foreground = background or DEFAULT_BG
+    return foreground, background, bool(flags & UNDERLINE), bool(flags & STRIKE)
+
+
+def style_tag(style):
+    """Stable Tk tag name for a style. The default style maps to the existing "normal" tag."""
+    if style == DEFAULT_STYLE:
+        return "normal"
+    fg, bg, flags = style
+    return f"ansi_{'' if fg is None else fg}_{'' if bg is None else bg}_{flags}"
+
+
+def tag_style(tag):
+    """The style a style_tag() name stands for, or None for tags that are not style tags."""
+    if tag == "normal":
+        return DEFAULT_STYLE
+    if not tag.startswith("ansi_"):
+        return None
+    fg, bg, flags = tag[5:].split("_")
+    return (int(fg) if fg else None, int(bg) if bg else None, int(flags))
@@ -0,0 +1,153 @@
+"""ANSI parser benchmark.
+
+Compares the old per-line regex parser (the former parse_ansi_and_insert,
+minus the Tk inserts) with the streaming AnsiParser on an ANSI art capture:
+per line, and straight off 4096-character reads.
+
+    python benchmarks/bench_ansi_parser.py [--file capture.ans] [--mb 8]
+
+Without --file a synthetic capture of colored block art is generated.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ansi_parser import AnsiParser, TEXT, style_tag  # noqa: E402
+
+LEGACY_CODES = {
+    '30': 'black', '31': 'red', '32': 'green', '33': 'yellow', '34': 'blue', '35': 'magenta',
+    '36': 'cyan', '37': 'white', '90': 'bright_black', '91': 'bright_red', '92': 'bright_green',
+    '93': 'bright_yellow', '94': 'bright_blue', '95': 'bright_magenta', '96': 'bright_cyan',
+    '97': 'bright_white',
+}
+
+
+def legacy_parse(text_data):
+    """The old parse_ansi_and_insert/insert_with_hyperlinks logic, collecting runs instead of inserting."""
+    ansi_escape_regex = re.compile(r'\x1b\[(.*?)m')
+    runs = []
+    last_end = 0
+    current_tag = "normal"
+
+    def with_hyperlinks(text, tag):
+        url_regex = re.compile(r'(https?://\S+)')
+        last = 0
+        for match in url_regex.finditer(text):
+            start, end = match.span()
+            if start > last:
+                runs.append((text[last:start], tag))
+            runs.append((text[start:end], ("hyperlink", tag)))
+            last = end
+        if last < len(text):
+            runs.append((text[last:], tag))
+
+    for match in ansi_escape_regex.finditer(text_data):
+        start, end = match.span()
+        if start > last_end:
+            with_hyperlinks(text_data[last_end:start], current_tag)
+        codes = match.group(1).split(';')
+        if '0' in codes:
+            current_tag = "normal"
+            codes.remove('0')
+        for c in codes:
+            mapped = LEGACY_CODES.get(c)
+            if mapped:
+                current_tag = mapped
+        last_end = end
+    if last_end < len(text_data):
+        with_hyperlinks(text_data[last_end:], current_tag)
+    return runs
+
+
+URL_REGEX = re.compile(r'(https?://\S+)')
+
+
+def streaming_parse(parser, text_data):
+    """AnsiParser plus the same hyperlink split the app does."""
+    runs = []
+    for record in parser.feed(text_data):
+        if record[0] == TEXT:
+            tag = style_tag(record[2])
+            text = record[1]
+            if "://" in text:
+                last = 0
+                for match in URL_REGEX.finditer(text):
+                    start, end = match.span()
+                    if start > last:
+                        runs.append((text[last:start], tag))
+                    runs.append((text[start:end], ("hyperlink", tag)))
+                    last = end
+                if last < len(text):
+                    runs.append((text[last:], tag))
+            else:
+                runs.append((text, tag))
+    return runs
+
+
+def synthetic_capture(megabytes, seed=437):
+    rng = random.Random(seed)
+    blocks = "█▓▒░▄▀■ "
+    lines = []
+    size = 0
+    while size < megabytes * 1024 * 1024:
+        parts = []
+        for _ in range(rng.randint(8, 30)):
+            choice = rng.random()
+            if choice < 0.6:
+                parts.append(f"\x1b[{rng.choice([0, 1])};{rng.randint(30, 37)}m")
+            elif choice < 0.8:
+                parts.append(f"\x1b[{rng.randint(40, 47)}m")
+            elif choice < 0.9:
+                parts.append(f"\x1b[38;5;{rng.randint(0, 255)}m")
+            else:
+                parts.append(f"\x1b[{rng.randint(1, 50)};{rng.randint(1, 136)}H")
+            parts.append("".join(rng.choice(blocks) for _ in range(rng.randint(1, 10))))
+        line = "".join(parts) + "\x1b[0m\r\n"
+        lines.append(line)
+        size += len(line)
+    return "".join(lines)
+
+
+def timed(label, func, size, lines):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {size / elapsed / 1024 / 1024:7.2f} MB/s  {lines / elapsed:10,.0f} lines/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--file", help="ANSI capture to parse (decoded as cp437)")
+    parser.add_argument("--mb", type=float, default=8, help="size of the synthetic capture")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, "rb") as file:
+            data = file.read().decode("cp437")
+    else:
+        data = synthetic_capture(args.mb)
+    lines = data.replace("\r\n", "\n").split("\n")
+    print(f"{len(data) / 1024 / 1024:.1f} MB, {len(lines):,} lines")
+
+    timed("legacy regex, per line", lambda: [legacy_parse(line) for line in lines], len(data), len(lines))
+
+    def per_line():
+        ansi = AnsiParser()
+        for line in lines:
+            streaming_parse(ansi, line)
+    timed("AnsiParser, per line", per_line, len(data), len(lines))
+
+    def per_chunk():
+        ansi = AnsiParser()
+        for i in range(0, len(data), 4096):
+            streaming_parse(ansi, data[i:i + 4096])
+    timed("AnsiParser, 4096-char reads", per_chunk, len(data), len(lines))
+
+
+if __name__ == "__main__":
+    main()
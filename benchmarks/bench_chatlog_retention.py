@@ -0,0 +1,136 @@
+"""Chatlog retention benchmark.
+
+Fills a ChatlogStore up to the size cap (1GB by default), then measures the
+per-message cost of appending while every append has to evict, the memory the
+store's index takes (RSS growth), the time and memory to reopen the full store,
+and the cost of a one-off trim when the cap is lowered. For comparison it also
+times the old approach (json.dumps of the whole chatlog per message) on a
+smaller log and extrapolates it linearly to the cap.
+
+    python benchmarks/bench_chatlog_retention.py [--size-mb 1024] [--legacy-mb 32]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from chatlog_store import ChatlogStore  # noqa: E402
+from chatlog_retention import RetentionPolicy  # noqa: E402
+
+USERS = [f"user{i}" for i in range(200)]
+
+
+def message(i, size):
+    text = f"[2024-01-01 12:00:00] message {i} "
+    return text + "x" * max(0, size - len(text))
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def rss_kb():
+    """Resident set size of this process in KB (Linux; 0 elsewhere)."""
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def bench_store(size_mb, message_size, directory):
+    cap = size_mb * 1024 * 1024
+    rss_before = rss_kb()
+    store = ChatlogStore(directory, policy=RetentionPolicy(max_bytes=cap))
+
+    start = time.perf_counter()
+    i = 0
+    while store.total_bytes < cap:
+        store.append(USERS[i % len(USERS)], message(i, message_size), ts=i)
+        i += 1
+    fill_seconds = time.perf_counter() - start
+    print(f"filled {store.total_bytes / 1024 / 1024:.0f} MB ({i} messages) in {fill_seconds:.1f}s")
+
+    # Every append at the cap evicts at least one entry.
+    samples = []
+    for j in range(20000):
+        t0 = time.perf_counter()
+        store.append(USERS[j % len(USERS)], message(i + j, message_size), ts=i + j)
+        samples.append(time.perf_counter() - t0)
+    print(f"append at cap: mean {sum(samples) / len(samples) * 1e6:.1f} us, "
+          f"p99 {percentile(samples, 99) * 1e6:.1f} us, max {max(samples) * 1e3:.2f} ms")
+    del samples
+    messages = store.retention.total_messages
+    rss_full = rss_kb()
+    print(f"index memory at cap: +{(rss_full - rss_before) / 1024:.1f} MB RSS "
+          f"({(rss_full - rss_before) * 1024 / messages:.1f} B per message)")
+
+    # Reopen the full store, as on startup, in a fresh process so its RSS is its own.
+    store.close()
+    subprocess.run([sys.executable, os.path.abspath(__file__), "--reopen", directory, "--size-mb", str(size_mb)],
+                   check=True)
+    store = ChatlogStore(directory, policy=RetentionPolicy(max_bytes=cap))
+
+    # Drop 10% of the log in one go.
+    t0 = time.perf_counter()
+    store.set_policy(RetentionPolicy(max_bytes=int(cap * 0.9)))
+    print(f"trim 10% ({cap * 0.1 / 1024 / 1024:.0f} MB): {(time.perf_counter() - t0) * 1e3:.1f} ms")
+    store.close()
+
+
+def bench_reopen(size_mb, directory):
+    rss_before = rss_kb()
+    t0 = time.perf_counter()
+    store = ChatlogStore(directory, policy=RetentionPolicy(max_bytes=size_mb * 1024 * 1024))
+    print(f"reopen at cap: {(time.perf_counter() - t0) * 1e3:.1f} ms, "
+          f"+{(rss_kb() - rss_before) / 1024:.1f} MB RSS ({store.retention.total_messages} messages)")
+    store.close()
+
+
+def bench_legacy(legacy_mb, size_mb, message_size):
+    chatlog = {}
+    size = 0
+    i = 0
+    while size < legacy_mb * 1024 * 1024:
+        chatlog.setdefault(USERS[i % len(USERS)], []).append(message(i, message_size))
+        size += message_size + 4
+        i += 1
+    t0 = time.perf_counter()
+    len(json.dumps(chatlog).encode("utf-8"))
+    dumps_seconds = time.perf_counter() - t0
+    per_message_at_cap = dumps_seconds * size_mb / legacy_mb
+    print(f"legacy json.dumps size check at {legacy_mb} MB: {dumps_seconds * 1e3:.1f} ms per message "
+          f"(~{per_message_at_cap:.1f}s per message at {size_mb} MB, before the trim loop)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--legacy-mb", type=int, default=32)
+    parser.add_argument("--message-size", type=int, default=200)
+    parser.add_argument("--reopen", metavar="DIR", help=argparse.SUPPRESS)  # child process of bench_store
+    args = parser.parse_args()
+    if args.reopen:
+        bench_reopen(args.size_mb, args.reopen)
+        return
+
+    directory = tempfile.mkdtemp(prefix="chatlog-bench-")
+    try:
+        bench_store(args.size_mb, args.message_size, directory)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    bench_legacy(args.legacy_mb, args.size_mb, args.message_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Line classification benchmark.
+
+Compares the old per-line matching in process_data_chunk (ANSI stripped
+twice, directed / ding / chatlog regexes matched separately, some compiled
+per call, plus the roster and logon prompt checks) with the single-pass
+line_classifier.classify on a synthetic chat session.
+
+    python benchmarks/bench_classifier.py [--lines 200000]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from line_classifier import classify  # noqa: E402
+
+NAMES = ["Bob", "Ann", "Cy", "sysop", "Zed", "mary.k"]
+WORDS = "hello there the board is slow again who wants to play trivia later tonight".split()
+
+
+def make_lines(count, rng):
+    lines = []
+    for _ in range(count):
+        body = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))
+        name = rng.choice(NAMES)
+        choice = rng.random()
+        if choice < 0.55:
+            line = f"\x1b[1;32mFrom {name}:\x1b[0m {body}"
+        elif choice < 0.65:
+            line = f"\x1b[1;33mFrom {name} (to you):\x1b[0m {body}"
+        elif choice < 0.7:
+            line = f"From {name} (whispered): {body}"
+        elif choice < 0.72:
+            line = "You are in Topic: General Chat"
+        elif choice < 0.74:
+            line = "Bob, Ann and Cy are here with you."
+        else:
+            line = f"\x1b[0;36m{body}\x1b[0m"
+        lines.append(line)
+    return lines
+
+
+def legacy_classify(line):
+    """The matching the old process_data_chunk did for one line, without the side effects."""
+    ansi_regex = re.compile(r'\x1b\[[0-9;]*m')
+    clean_line = ansi_regex.sub('', line).strip()
+    "are here with you." in clean_line
+    clean_line.startswith("You are in")
+    directed = re.match(r'^From\s+(\S+)\s+\((to you|whispered)\):\s*(.+)$', clean_line, re.IGNORECASE)
+    if directed:
+        return "directed"
+    chat_clean = re.sub(r'\x1b\[[0-9;]*m', '', line)
+    public = re.match(r'^\s*From\s+(\S+)(?:\s+\(to\s+([^)]+)\))?:\s*(.+)$', chat_clean, re.IGNORECASE)
+    lower_line = line.lower()
+    "enter your password:" in lower_line or "type it in and press enter" in lower_line \
+        or 'otherwise type "new":' in lower_line
+    re.match(r'^From\s+\S+', clean_line, re.IGNORECASE)
+    return "public" if public else "plain"
+
+
+def timed(label, func, lines):
+    start = time.perf_counter()
+    for line in lines:
+        func(line)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {len(lines) / elapsed:12,.0f} lines/s  {elapsed / len(lines) * 1e6:6.2f} us/line")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=200000)
+    args = parser.parse_args()
+
+    lines = make_lines(args.lines, random.Random(10))
+    timed("legacy matching", legacy_classify, lines)
+    timed("classify()", classify, lines)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Text decoding benchmark.
+
+Compares the stream codec path (telnetlib3's reader runs an incremental
+CP437 decoder on every read) with text_codec.TextCodec, which decodes
+complete text with precomputed tables and an ASCII fast path. Three
+multi-megabyte captures: plain chat, ANSI art heavy in block characters,
+and a mix (art banners between chat).
+
+    python benchmarks/bench_codec.py [--mb 8] [--read 4096] [--repeat 3]
+"""
+import argparse
+import codecs
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from text_codec import TextCodec  # noqa: E402
+
+WORDS = "hello there the board is slow again who wants to play trivia later tonight".split()
+BLOCKS = "░▒▓█▀▄▌▐■─│┌┐└┘╔╗╚╝═║"
+
+
+def chat_line(rng):
+    return f"\x1b[1;32mFrom Bob:\x1b[0m {' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))}\r\n"
+
+
+def art_line(rng):
+    return f"\x1b[0;3{rng.randint(0, 7)}m" + "".join(rng.choice(BLOCKS) for _ in range(79)) + "\r\n"
+
+
+def capture(size, rng, art_share):
+    parts, total = [], 0
+    while total < size:
+        line = art_line(rng) if rng.random() < art_share else chat_line(rng)
+        parts.append(line)
+        total += len(line)
+    return "".join(parts).encode("cp437")
+
+
+class StreamDecoder:
+    """What the telnetlib3 reader does per read: look up the codec, then decode incrementally."""
+
+    def __init__(self, encoding="cp437"):
+        self.encoding = encoding
+        self.decoder = None
+
+    def decode(self, data):
+        if self.decoder is None or self.decoder._encoding != self.encoding:
+            self.decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+            self.decoder._encoding = self.encoding
+        return self.decoder.decode(data, False)
+
+
+def timed(label, decoder, chunks, size, repeat):
+    best = None
+    for _ in range(repeat):
+        decode = decoder.decode
+        start = time.perf_counter()
+        for chunk in chunks:
+            decode(chunk)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {label:<14} {size / best / 1024 / 1024:9.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mb", type=float, default=8)
+    parser.add_argument("--read", type=int, default=4096, help="bytes per read")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per path; the best is reported")
+    args = parser.parse_args()
+
+    rng = random.Random(16)
+    size = int(args.mb * 1024 * 1024)
+    for name, art_share in (("chat", 0.0), ("ANSI art", 1.0), ("mixed (10% art)", 0.1)):
+        data = capture(size, rng, art_share)
+        chunks = [data[i:i + args.read] for i in range(0, len(data), args.read)]
+        assert b"".join(chunks).decode("cp437") == "".join(TextCodec().decode(c) for c in chunks)
+        print(f"{name}: {len(data) / 1024 / 1024:.1f} MB in {args.read}-byte reads")
+        timed("stream codec", StreamDecoder(), chunks, len(data), args.repeat)
+        timed("TextCodec", TextCodec(), chunks, len(data), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
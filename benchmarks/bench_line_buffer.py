@@ -0,0 +1,89 @@
+"""Receive-path line splitting benchmark.
+
+Compares the old path (the stream codec decodes every read, then
+process_data_chunk normalizes newlines, appends to partial_line and splits
+it) with LineBuffer, which buffers raw bytes and decodes complete lines
+only. Two captures: chat-sized lines, and ANSI art sent as a single long
+line that arrives over many reads (quadratic in the old path).
+
+    python benchmarks/bench_line_buffer.py [--mb 4] [--read 4096] [--repeat 3]
+"""
+import argparse
+import codecs
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from line_buffer import LineBuffer  # noqa: E402
+
+
+class LegacySplitter:
+    """The old receive path: incremental decode per read, then str splitting."""
+
+    def __init__(self, encoding="cp437"):
+        self.decoder = codecs.getincrementaldecoder(encoding)("replace")
+        self.partial_line = ""
+
+    def feed(self, data):
+        data = self.decoder.decode(data)
+        data = data.replace('\r\n', '\n').replace('\r', '\n')
+        self.partial_line += data
+        lines = self.partial_line.split("\n")
+        self.partial_line = lines[-1]
+        return lines[:-1]
+
+
+def chat_capture(size, rng):
+    words = "hello there the board is slow again who wants to play trivia later tonight".split()
+    parts, total = [], 0
+    while total < size:
+        line = f"\x1b[1;32mFrom Bob:\x1b[0m {' '.join(rng.choice(words) for _ in range(rng.randint(3, 12)))}\r\n"
+        parts.append(line)
+        total += len(line)
+    return "".join(parts).encode("cp437")
+
+
+def art_capture(size, rng):
+    blocks = "░▒▓█▀▄▌▐■"
+    parts, total = [], 0
+    while total < size:
+        chunk = f"\x1b[{rng.randint(1, 50)};{rng.randint(1, 136)}H\x1b[3{rng.randint(0, 7)}m" + \
+                "".join(rng.choice(blocks) for _ in range(40))
+        parts.append(chunk)
+        total += len(chunk)
+    return ("".join(parts) + "\r\n").encode("cp437")
+
+
+def timed(label, make_splitter, data, read_size, repeat):
+    best = None
+    for _ in range(repeat):
+        splitter = make_splitter()
+        start = time.perf_counter()
+        lines = 0
+        for i in range(0, len(data), read_size):
+            lines += len(splitter.feed(data[i:i + read_size]))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {label:<12} {len(data) / best / 1024 / 1024:8.1f} MB/s  ({lines:,} lines)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mb", type=float, default=4)
+    parser.add_argument("--read", type=int, default=4096, help="bytes per read")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per path; the best is reported")
+    args = parser.parse_args()
+
+    rng = random.Random(15)
+    size = int(args.mb * 1024 * 1024)
+    for name, data in (("chat lines", chat_capture(size, rng)), ("one long line", art_capture(size, rng))):
+        print(f"{name}: {len(data) / 1024 / 1024:.1f} MB in {args.read}-byte reads")
+        timed("legacy", LegacySplitter, data, args.read, args.repeat)
+        timed("LineBuffer", LineBuffer, data, args.read, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Terminal rendering throughput benchmark.
+
+Pushes the same synthetic ANSI screen dump into a Tk Text widget twice:
+once the old way (state toggle, one insert per run and see(END) for every
+line) and once through RenderBatcher (one multi-argument insert per 16 ms
+frame), and reports lines per second for both. Needs a display.
+
+    python benchmarks/bench_render.py [--lines 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from render_batcher import RenderBatcher, FRAME_MS  # noqa: E402
+
+COLORS = ["normal", "red", "green", "yellow", "blue", "magenta", "cyan", "white"]
+
+
+def make_lines(count, seed=437):
+    """Lines of (text, tags) runs shaped like colored ANSI art and chat."""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        runs = []
+        for _ in range(rng.randint(3, 12)):
+            runs.append(("█" * rng.randint(1, 12), rng.choice(COLORS)))
+        if i % 50 == 0:
+            runs.append((" https://example.com/pic.png", ("hyperlink", "normal")))
+        runs.append(("\n", runs[-1][1]))
+        lines.append(runs)
+    return lines
+
+
+def make_widget(root):
+    widget = tk.Text(root, wrap=tk.WORD, state=tk.DISABLED, bg="black")
+    widget.pack()
+    for color in COLORS:
+        widget.tag_configure(color, foreground="white" if color == "normal" else color)
+    widget.tag_configure("hyperlink", foreground="blue", underline=True)
+    return widget
+
+
+def bench_per_line(root, lines):
+    widget = make_widget(root)
+    start = time.perf_counter()
+    for runs in lines:
+        widget.configure(state=tk.NORMAL)
+        for text, tags in runs:
+            widget.insert(tk.END, text, tags)
+        widget.see(tk.END)
+        widget.configure(state=tk.DISABLED)
+    root.update_idletasks()
+    elapsed = time.perf_counter() - start
+    widget.destroy()
+    return elapsed
+
+
+def bench_batched(root, lines):
+    widget = make_widget(root)
+    batcher = RenderBatcher(widget)
+    start = time.perf_counter()
+    frame_start = start
+    for runs in lines:
+        batcher.add(runs)
+        now = time.perf_counter()
+        if now - frame_start >= FRAME_MS / 1000:
+            batcher.flush()
+            frame_start = now
+    batcher.flush()
+    root.update_idletasks()
+    elapsed = time.perf_counter() - start
+    widget.destroy()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=20000)
+    args = parser.parse_args()
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"bench_render needs a display: {e}")
+        return
+    root.withdraw()
+
+    lines = make_lines(args.lines)
+    before = bench_per_line(root, lines)
+    after = bench_batched(root, lines)
+    print(f"per-line inserts: {args.lines / before:,.0f} lines/s ({before:.2f}s)")
+    print(f"frame batching:   {args.lines / after:,.0f} lines/s ({after:.2f}s)")
+    print(f"speedup:          {before / after:.1f}x")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Headless session benchmark.
+
+Drives BBSSession.process_data_chunk directly, with no Tk, telnet or worker
+thread, on a synthetic CP437 chat capture fed in 4096-byte reads. Reports
+lines per second for the whole per-line path: line splitting and
+decoding, ANSI parsing, classification, triggers, chatlog writes and
+roster updates. --stats turns on the perf_stats.py timers (showing their
+cost) and prints the per-stage latencies.
+
+    python benchmarks/bench_session.py [--lines 100000] [--triggers 100] [--mode Log|Screen] [--stats]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from perf_stats import STAGES  # noqa: E402
+from session import BBSSession, CollectingSink  # noqa: E402
+
+NAMES = ["Bob", "Ann", "Cy", "sysop", "Zed", "mary.k"]
+WORDS = "hello there the board is slow again who wants to play trivia later tonight".split()
+
+
+def synthetic_session(count, seed=11):
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        body = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))
+        name = rng.choice(NAMES)
+        choice = rng.random()
+        if choice < 0.6:
+            lines.append(f"\x1b[1;32mFrom {name}:\x1b[0m {body}")
+        elif choice < 0.7:
+            lines.append(f"\x1b[1;33mFrom {name} (to you):\x1b[0m {body}")
+        elif i % 500 == 0:
+            lines.append("You are in Topic: General Chat")
+            lines.append(", ".join(NAMES[:-1]) + f" and {NAMES[-1]} are here with you.")
+        else:
+            lines.append(f"\x1b[0;3{rng.randint(1, 7)}m{body}\x1b[0m")
+    return ("\r\n".join(lines) + "\r\n").encode("cp437"), len(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--triggers", type=int, default=100)
+    parser.add_argument("--mode", choices=["Log", "Screen"], default="Log")
+    parser.add_argument("--stats", action="store_true", help="time each stage")
+    args = parser.parse_args()
+
+    data, line_count = synthetic_session(args.lines)
+    rng = random.Random(3)
+    triggers = [{'trigger': "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(8)),
+                 'response': "ok"} for _ in range(args.triggers)]
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        sink = CollectingSink(keep=False)
+        session = BBSSession(sink=sink, data_dir=data_dir, triggers=triggers)
+        session.display_mode = args.mode
+        session.stats.set_enabled(args.stats)
+        start = time.perf_counter()
+        for i in range(0, len(data), 4096):
+            session.process_data_chunk(data[i:i + 4096])
+        elapsed = time.perf_counter() - start
+        stages = session.stats.snapshot()["stages"]
+        session.close()
+
+    print(f"{line_count:,} lines, {len(data) / 1024 / 1024:.1f} MB, {args.triggers} triggers, {args.mode} mode")
+    print(f"{line_count / elapsed:,.0f} lines/s  ({elapsed / line_count * 1e6:.2f} us/line)")
+    print("ops:", ", ".join(f"{kind}={count:,}" for kind, count in sorted(sink.counts.items())))
+    for stage in STAGES:
+        if stage in stages:
+            timing = stages[stage]
+            print(f"  {stage:<10} {timing['count']:>9,}  p50 {timing['p50_ms'] * 1000:.1f} us  "
+                  f"p99 {timing['p99_ms'] * 1000:.1f} us  max {timing['max_ms'] * 1000:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Trigger matching benchmark.
+
+Per-line match time of the old linear check_triggers loop (lowercase the
+message again per trigger, substring test) against the compiled
+TriggerEngine, for 10, 100 and 1000 triggers.
+
+    python benchmarks/bench_triggers.py [--lines 20000] [--counts 10 100 1000]
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from trigger_engine import TriggerEngine  # noqa: E402
+
+WORDS = ("hello there anyone around tonight the board is slow again who wants to play "
+         "a round of trivia later bbs door game high score logoff sysop message base").split()
+
+
+def random_word(rng):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+
+
+def make_triggers(count, rng):
+    # A few realistic triggers that do match, the rest random words that rarely do.
+    triggers = [{'trigger': word, 'response': f"re: {word}"} for word in ("trivia", "high score")]
+    while len(triggers) < count:
+        triggers.append({'trigger': random_word(rng), 'response': "ok"})
+    return triggers[:count]
+
+
+def make_lines(count, rng):
+    lines = []
+    for _ in range(count):
+        sender = random_word(rng).capitalize()
+        body = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 14)))
+        lines.append(f"From {sender}: {body}")
+    return lines
+
+
+def legacy_check(triggers, message):
+    fired = []
+    for trigger_obj in triggers:
+        if trigger_obj['trigger'] and trigger_obj['trigger'].lower() in message.lower():
+            fired.append(trigger_obj)
+    return fired
+
+
+def per_line_us(func, lines):
+    start = time.perf_counter()
+    for line in lines:
+        func(line)
+    return (time.perf_counter() - start) / len(lines) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    rng = random.Random(9)
+    lines = make_lines(args.lines, rng)
+    print(f"{'triggers':>8} {'legacy us/line':>15} {'engine us/line':>15} {'build ms':>9}")
+    for count in args.counts:
+        triggers = make_triggers(count, rng)
+        start = time.perf_counter()
+        engine = TriggerEngine(triggers)
+        build_ms = (time.perf_counter() - start) * 1000
+        legacy = per_line_us(lambda line: legacy_check(triggers, line), lines)
+        compiled = per_line_us(lambda line: engine.match(line, now=0.0), lines)
+        print(f"{count:>8} {legacy:>15.2f} {compiled:>15.2f} {build_ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Local fake telnet BBS for load and latency testing.
+
+An asyncio telnetlib3 server that acts enough like a MajorLink-style
+teleconference to drive every client path offline. It:
+
+- negotiates TTYPE and NAWS, and its banner echoes what the client reported;
+- asks the logon prompts that detect_logon_prompt answers;
+- sends "You are in ... are here with you." rosters;
+- sends public chat, optionally in bursts, plus "From X (to you):" DMs;
+- sends ANSI art floods.
+
+"=x" logs off, and the roster command (default "/who") repeats the roster.
+
+    python benchmarks/fake_bbs.py [--port 2323] [--chat 20] [--burst 50 --burst-every 5]
+                                  [--dm 0.1] [--roster-every 30] [--art 40 --art-every 10]
+                                  [--login] [--prompt-every 0] [--stamp]
+
+--stamp appends " #t=<send time>" to chat lines so a client can measure
+end-to-end latency (see stress_sessions.py). Other scripts start it with
+start_in_process().
+"""
+import argparse
+import asyncio
+import multiprocessing
+import random
+import time
+
+import telnetlib3
+
+NAMES = ["Bob", "Ann", "Cy", "sysop", "Zed", "mary.k"]
+WORDS = "hello there the board is slow again who wants to play trivia later tonight".split()
+BLOCKS = "░▒▓█▀▄▌▐■"
+
+USERNAME_PROMPT = 'If you have an account, type it in and press ENTER. Otherwise type "new":'
+PASSWORD_PROMPT = "Enter your password:"
+
+
+class Traffic:
+    """What the board sends each connection. Rates are per connection; 0 turns a kind off."""
+
+    def __init__(self, chat=20, burst=0, burst_every=5, dm=0.1, roster_every=0, art=0, art_every=10,
+                 login=False, prompt_every=0, stamp=False, roster_command="/who"):
+        self.chat = chat                  # public chat lines per second
+        self.burst = burst                # chat lines sent back to back every burst_every seconds
+        self.burst_every = burst_every
+        self.dm = dm                      # share of chat lines that are "(to you)" DMs
+        self.roster_every = roster_every  # seconds between roster banners (always sent on entry)
+        self.art = art                    # lines per ANSI art flood, every art_every seconds
+        self.art_every = art_every
+        self.login = login                # ask for username and password before the teleconference
+        self.prompt_every = prompt_every  # seconds between repeated logon prompts
+        self.stamp = stamp                # append " #t=<time.time()>" to chat lines
+        self.roster_command = roster_command
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(chat=args.chat, burst=args.burst, burst_every=args.burst_every, dm=args.dm,
+                   roster_every=args.roster_every, art=args.art, art_every=args.art_every,
+                   login=args.login, prompt_every=args.prompt_every, stamp=args.stamp)
+
+
+def chat_line(rng, traffic):
+    body = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))
+    if traffic.stamp:
+        body += f" #t={time.time():.6f}"
+    name = rng.choice(NAMES)
+    if rng.random() < traffic.dm:
+        return f"\x1b[1;33mFrom {name} (to you):\x1b[0m {body}\r\n"
+    return f"\x1b[1;32mFrom {name}:\x1b[0m {body}\r\n"
+
+
+def roster_lines():
+    return ("You are in Topic: General Chat\r\n"
+            + ", ".join(NAMES[:-1]) + f" and {NAMES[-1]} are here with you.\r\n")
+
+
+def art_lines(rng, count, cols):
+    lines = []
+    for _ in range(count):
+        line = "".join(f"\x1b[{rng.choice((0, 1))};3{rng.randint(1, 7)}m" + rng.choice(BLOCKS) * rng.randint(1, 8)
+                       for _ in range(cols // 8))
+        lines.append(line + "\x1b[0m\r\n")
+    return "".join(lines)
+
+
+def make_shell(traffic):
+    async def shell(reader, writer):
+        rng = random.Random()
+        term = writer.get_extra_info("TERM") or "unknown"
+        cols = writer.get_extra_info("cols") or 80
+        rows = writer.get_extra_info("rows") or 25
+        writer.write(f"Welcome to the fake BBS. Your terminal is {term}, {cols}x{rows}.\r\n")
+        try:
+            if traffic.login:
+                writer.write(USERNAME_PROMPT + "\r\n")
+                await reader.readline()
+                writer.write(PASSWORD_PROMPT + "\r\n")
+                await reader.readline()
+            writer.write(roster_lines())
+            tasks = [asyncio.ensure_future(handle_commands(reader, writer, traffic)),
+                     asyncio.ensure_future(send_traffic(writer, traffic, rng, cols))]
+            try:
+                await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for task in tasks:
+                    task.cancel()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+    return shell
+
+
+async def handle_commands(reader, writer, traffic):
+    while True:
+        line = await reader.readline()
+        if not line:
+            return
+        command = line.strip()
+        if command == "=x":
+            writer.write("Goodbye!\r\n")
+            writer.close()
+            return
+        if command == traffic.roster_command:
+            writer.write(roster_lines())
+
+
+async def send_traffic(writer, traffic, rng, cols):
+    """Write every kind of traffic that is due, sleep until the next is, repeat."""
+    now = time.monotonic()
+    schedule = {}  # kind -> (next due time, interval)
+    for kind, interval in (("chat", 1 / traffic.chat if traffic.chat else 0),
+                           ("burst", traffic.burst_every if traffic.burst else 0),
+                           ("roster", traffic.roster_every),
+                           ("art", traffic.art_every if traffic.art else 0),
+                           ("prompt", traffic.prompt_every)):
+        if interval:
+            schedule[kind] = [now + interval, interval]
+    if not schedule:
+        await asyncio.Event().wait()  # only answer commands, until the client leaves
+
+    while not writer.is_closing():
+        now = time.monotonic()
+        out = []
+        for kind, due in schedule.items():
+            while due[0] <= now:
+                due[0] += due[1]
+                if kind == "chat":
+                    out.append(chat_line(rng, traffic))
+                elif kind == "burst":
+                    out.extend(chat_line(rng, traffic) for _ in range(traffic.burst))
+                elif kind == "roster":
+                    out.append(roster_lines())
+                elif kind == "art":
+                    out.append(art_lines(rng, traffic.art, cols))
+                else:
+                    out.append(USERNAME_PROMPT + "\r\n" + PASSWORD_PROMPT + "\r\n")
+        if out:
+            writer.write("".join(out))
+            await writer.drain()
+        await asyncio.sleep(max(0.0, min(due[0] for due in schedule.values()) - time.monotonic()))
+
+
+async def start_server(traffic, host="127.0.0.1", port=0):
+    """Start the board on the running loop and return the server (port 0 picks a free one)."""
+    return await telnetlib3.create_server(host=host, port=port, shell=make_shell(traffic),
+                                          encoding="cp437", force_binary=True, connect_maxwait=0.5)
+
+
+def _serve(traffic, host, port, port_queue):
+    async def serve():
+        server = await start_server(traffic, host, port)
+        port_queue.put(server.sockets[0].getsockname()[1])
+        await asyncio.Event().wait()
+    asyncio.run(serve())
+
+
+def start_in_process(traffic, host="127.0.0.1", port=0):
+    """Run the board in a child process, so it does not share the client's CPU. Returns (process, port)."""
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(traffic, host, port, port_queue), daemon=True)
+    process.start()
+    return process, port_queue.get(timeout=10)
+
+
+def add_traffic_arguments(parser):
+    parser.add_argument("--chat", type=float, default=20, help="public chat lines per second per connection")
+    parser.add_argument("--burst", type=int, default=0, help="chat lines per burst")
+    parser.add_argument("--burst-every", type=float, default=5, help="seconds between bursts")
+    parser.add_argument("--dm", type=float, default=0.1, help="share of chat lines that are DMs")
+    parser.add_argument("--roster-every", type=float, default=0, help="seconds between roster banners")
+    parser.add_argument("--art", type=int, default=0, help="lines per ANSI art flood")
+    parser.add_argument("--art-every", type=float, default=10, help="seconds between art floods")
+    parser.add_argument("--login", action="store_true", help="ask for username and password on connect")
+    parser.add_argument("--prompt-every", type=float, default=0, help="seconds between repeated logon prompts")
+    parser.add_argument("--stamp", action="store_true", help="append send timestamps to chat lines")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2323)
+    add_traffic_arguments(parser)
+    args = parser.parse_args()
+
+    async def serve():
+        server = await start_server(Traffic.from_args(args), args.host, args.port)
+        print(f"Fake BBS listening on {args.host}:{server.sockets[0].getsockname()[1]}")
+        await asyncio.Event().wait()
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Replay a session capture through the parsing and rendering path.
+
+Feeds a capture file (see capture.py; Settings > Capture Raw Sessions
+writes them under <session data dir>/captures) back into a BBSSession at
+its original pacing (--speed 1), accelerated (--speed 10) or as fast as
+possible (--speed 0), and reports lines per second and frame times.
+
+Headless (default): process_data_chunk runs on this thread with a counting
+sink, and a frame is the processing of one recorded read. With --tk the
+reads go through a BBSTerminalApp tab's pipeline into its widgets, and a
+frame is one terminal batcher / screen painter flush (needs a display).
+The app runs in a scratch directory so a replay never touches your
+chatlog or settings.
+
+    python benchmarks/replay.py CAPTURE [--speed 0] [--mode Log|Screen] [--triggers 100] [--tk]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from capture import read_capture  # noqa: E402
+from session import BBSSession, CollectingSink  # noqa: E402
+
+
+def make_triggers(count):
+    rng = random.Random(3)
+    return [{'trigger': "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(8)),
+             'response': "ok"} for _ in range(count)]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def replay_headless(header, records, args):
+    """Returns (wall seconds, frame durations)."""
+    frames = []
+    with tempfile.TemporaryDirectory() as data_dir:
+        session = BBSSession(sink=CollectingSink(keep=False), data_dir=data_dir,
+                             triggers=make_triggers(args.triggers), cols=header.get("cols", 136),
+                             rows=header.get("rows", 50), encoding=header.get("encoding", "cp437"))
+        session.display_mode = args.mode
+        start = time.perf_counter()
+        for offset, data in records:
+            if args.speed:
+                delay = start + offset / args.speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            frame_start = time.perf_counter()
+            session.process_data_chunk(data)
+            frames.append(time.perf_counter() - frame_start)
+        elapsed = time.perf_counter() - start
+        session.close()
+    return elapsed, frames
+
+
+def time_flushes(painter, frames):
+    """Wrap a RenderBatcher / ScreenPainter flush to record how long each frame takes."""
+    flush = painter.flush
+
+    def timed_flush():
+        start = time.perf_counter()
+        flush()
+        frames.append(time.perf_counter() - start)
+    painter.flush = timed_flush
+
+
+def replay_tk(header, records, args):
+    """Returns (wall seconds, frame durations)."""
+    import tkinter as tk
+    from main import BBSTerminalApp
+
+    frames = []
+    result = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            root = tk.Tk()
+            app = BBSTerminalApp(root)
+            app.display_mode.set(args.mode)
+            app.apply_display_mode()
+            tab = app.active_tab
+            session = tab.session
+            session.set_encoding(header.get("encoding", "cp437"))
+            session.set_triggers(make_triggers(args.triggers))
+            painter = tab.screen_painter if args.mode == "Screen" else tab.terminal_batcher
+            time_flushes(painter, frames)
+            pipeline = session.pipeline
+            start = time.perf_counter()
+
+            def feed(i=0):
+                while i < len(records):
+                    offset, data = records[i]
+                    if args.speed:
+                        delay = start + offset / args.speed - time.perf_counter()
+                        if delay > 0:
+                            root.after(int(delay * 1000), feed, i)
+                            return
+                    if not pipeline.try_feed(data):
+                        root.after(1, feed, i)  # let Tk drain the render ops first
+                        return
+                    i += 1
+                wait_for_idle()
+
+            def wait_for_idle(quiet=0):
+                idle = pipeline.inbound.empty() and not pipeline.has_pending() and painter.flush_id is None
+                if idle and quiet >= 3:
+                    result["elapsed"] = time.perf_counter() - start
+                    root.quit()
+                else:
+                    root.after(20, wait_for_idle, quiet + 1 if idle else 0)
+
+            root.after(0, feed)
+            root.mainloop()
+            app.manager.stop()
+            root.destroy()
+        finally:
+            os.chdir(cwd)
+    return result.get("elapsed", 0.0), frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture")
+    parser.add_argument("--speed", type=float, default=0, help="1 = real time, 10 = ten times faster, 0 = no waiting")
+    parser.add_argument("--mode", choices=["Log", "Screen"], default="Log")
+    parser.add_argument("--triggers", type=int, default=0)
+    parser.add_argument("--tk", action="store_true", help="render into a BBSTerminalApp window")
+    args = parser.parse_args()
+
+    header, records = read_capture(args.capture)
+    size = sum(len(data) for _, data in records)
+    lines = sum(data.count(b"\n") for _, data in records)
+    duration = records[-1][0] if records else 0.0
+    print(f"{args.capture}: {header.get('host', '?')}, {len(records):,} reads, {size / 1024:,.0f} KB, "
+          f"{lines:,} lines over {duration:.1f} s")
+
+    elapsed, frames = (replay_tk if args.tk else replay_headless)(header, records, args)
+    speed = f"{args.speed:g}x" if args.speed else "max speed"
+    busy = sum(frames)
+    frames.sort()
+    print(f"replayed at {speed}, {args.mode} mode{' in Tk' if args.tk else ''}: {elapsed:.2f} s wall")
+    rate = f"{lines / elapsed if elapsed else 0:,.0f} wall"
+    if not args.tk:  # headless frames cover all the processing
+        rate += f", {lines / busy if busy else 0:,.0f} busy"
+    print(f"lines/s:    {rate}")
+    print(f"frames:     {len(frames):,}  p50 {percentile(frames, 0.5) * 1000:.2f} ms  "
+          f"p99 {percentile(frames, 0.99) * 1000:.2f} ms  max {(frames[-1] if frames else 0) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Multi-session stress test.
+
+Starts the fake BBS (fake_bbs.py) in a child process, connects --sessions
+BBSSessions to it through one SessionManager (one asyncio loop thread) and
+lets the board send traffic for --duration seconds. Reports the client
+process's CPU time and resident memory, in total and per session, and the
+latency from the board writing a chat line to the session emitting it.
+
+    python benchmarks/stress_sessions.py [--sessions 50] [--duration 10] [--chat 20] [--stats] [fake_bbs options]
+
+--chat is chat lines per second per session. With --login the sessions answer
+the board's username and password prompts (with blank credentials). --stats also reports the
+per-stage latencies of perf_stats.py, pooled over all sessions (timing
+costs a little CPU, so it is off by default). No Tk is needed.
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fake_bbs import Traffic, add_traffic_arguments, start_in_process  # noqa: E402
+from perf_stats import PerfStats, STAGES  # noqa: E402
+from session import CollectingSink  # noqa: E402
+from session_manager import SessionManager  # noqa: E402
+
+STAMP_RE = re.compile(r"#t=(\d+\.\d+)")
+
+
+class LatencySink(CollectingSink):
+    """Counts ops and records how long stamped chat lines took to reach the sink."""
+
+    def __init__(self):
+        super().__init__(keep=False)
+        self.latencies = []
+
+    def emit(self, op):
+        super().emit(op)
+        if op[0] == "terminal":
+            now = time.time()
+            for text, _ in op[1]:
+                match = STAMP_RE.search(text)
+                if match:
+                    self.latencies.append(now - float(match.group(1)))
+
+
+def rss_kb():
+    with open("/proc/self/status") as file:
+        for line in file:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--stats", action="store_true", help="report per-stage latencies")
+    add_traffic_arguments(parser)
+    args = parser.parse_args()
+
+    traffic = Traffic.from_args(args)
+    traffic.stamp = True
+    server, port = start_in_process(traffic)
+
+    manager = SessionManager()
+    manager.start()
+    sinks = []
+    stats = PerfStats(max_samples=1_000_000)
+    with tempfile.TemporaryDirectory() as data_dir:
+        rss_before = rss_kb()
+        for i in range(args.sessions):
+            sink = LatencySink()
+            sinks.append(sink)
+            session = manager.add(f"s{i}", host="127.0.0.1", port=port, sink=sink,
+                                  data_dir=os.path.join(data_dir, f"s{i}"))
+            session.stats = stats  # pooled; the stage deques take appends from any thread
+            session.auto_login = args.login  # the fake board takes any credentials
+        for name in manager.sessions:
+            manager.connect(name)
+
+        deadline = time.monotonic() + 15
+        while time.monotonic() < deadline and not all(s.connected for s in manager.sessions.values()):
+            time.sleep(0.05)
+        connected = sum(s.connected for s in manager.sessions.values())
+
+        cpu_start = time.process_time()
+        lines_start = sum(sink.counts.get("terminal", 0) for sink in sinks)
+        for sink in sinks:
+            sink.latencies.clear()  # ignore the connect phase
+        stats.set_enabled(args.stats)
+        time.sleep(args.duration)
+        cpu = time.process_time() - cpu_start
+        lines = sum(sink.counts.get("terminal", 0) for sink in sinks) - lines_start
+        rss_after = rss_kb()
+        threads = threading.active_count()
+        latencies = sorted(latency for sink in sinks for latency in sink.latencies)
+        channels = [session.pipeline.metrics() for session in manager.sessions.values()]
+        stages = stats.snapshot()["stages"]
+
+        manager.stop()
+    server.terminate()
+
+    n = max(connected, 1)
+    print(f"{connected}/{args.sessions} sessions connected, {threads} threads, {args.duration:.0f} s at {args.chat:g} lines/s each")
+    print(f"lines processed:  {lines:,} ({lines / args.duration:,.0f}/s)")
+    print(f"CPU:              {cpu / args.duration * 100:.1f}% of one core total, "
+          f"{cpu / args.duration / n * 1000:.2f} ms/s per session")
+    print(f"memory (RSS):     +{(rss_after - rss_before) / 1024:.1f} MB total, "
+          f"{(rss_after - rss_before) / n:.0f} KB per session")
+    puts = sum(m["puts"] for m in channels) or 1
+    print(f"inbound channel:  merge ratio {sum(m['merge_ratio'] * m['puts'] for m in channels) / puts:.2f}, "
+          f"peak {max(m['peak_bytes'] for m in channels) / 1024:.0f} KB, "
+          f"{sum(m['stalls'] for m in channels)} stalls ({sum(m['stall_time'] for m in channels):.2f} s)")
+    if latencies:
+        print(f"latency:          p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms, max {latencies[-1] * 1000:.2f} ms")
+    for stage in STAGES:
+        if stage in stages:
+            timing = stages[stage]
+            print(f"  {stage:<15} {timing['count']:>9,}  p50 {timing['p50_ms']:.3f} ms  "
+                  f"p99 {timing['p99_ms']:.3f} ms  max {timing['max_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
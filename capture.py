@@ -0,0 +1,69 @@
+import json
+import struct
+import time
+
+###############################################################################
+#                 Session Capture (raw inbound bytes, timestamped)
+###############################################################################
+#
+# A capture file records exactly what the BBS sent, one record per read, so
+# a session can be replayed later through the same parsing and rendering
+# path (see benchmarks/replay.py).
+#
+#   magic      b"BBSCAP1\n"
+#   header     uint32 length + UTF-8 JSON: host, port, encoding, cols, rows,
+#              started (wall clock, seconds since the epoch)
+#   records    uint64 microseconds since the capture started
+#              + uint32 length + that many raw bytes, repeated to EOF
+#
+# All integers are little-endian. Timestamps are monotonic offsets, so
+# replays keep the original pacing even if the wall clock jumped.
+
+MAGIC = b"BBSCAP1\n"
+_LENGTH = struct.Struct("<I")
+_RECORD = struct.Struct("<QI")
+
+
+class CaptureWriter:
+    def __init__(self, path, **header):
+        self.path = path
+        self.file = open(path, "wb")
+        self.started = time.monotonic()
+        header.setdefault("started", time.time())
+        meta = json.dumps(header).encode("utf-8")
+        self.file.write(MAGIC + _LENGTH.pack(len(meta)) + meta)
+        self.records = 0
+        self.bytes = 0
+
+    def write(self, data):
+        """Append one read, stamped with the time since the capture started."""
+        offset = int((time.monotonic() - self.started) * 1_000_000)
+        self.file.write(_RECORD.pack(offset, len(data)))
+        self.file.write(data)
+        self.records += 1
+        self.bytes += len(data)
+
+    def close(self):
+        self.file.close()
+
+
+def read_capture(path):
+    """Return (header, records) for a capture file; records is a list of (seconds, bytes)."""
+    with open(path, "rb") as file:
+        blob = file.read()
+    if not blob.startswith(MAGIC):
+        raise ValueError(f"{path} is not a session capture")
+    pos = len(MAGIC)
+    (length,) = _LENGTH.unpack_from(blob, pos)
+    pos += _LENGTH.size
+    header = json.loads(blob[pos:pos + length].decode("utf-8"))
+    pos += length
+
+    records = []
+    end = len(blob)
+    while pos + _RECORD.size <= end:
+        offset, length = _RECORD.unpack_from(blob, pos)
+        pos += _RECORD.size
+        records.append((offset / 1_000_000, blob[pos:pos + length]))
+        pos += length
+    return header, records
@@ -0,0 +1,82 @@
+import time
+
+###############################################################################
+#                     Chatlog Retention (size/age/count caps)
+###############################################################################
+#
+# The store reports every entry it adds or removes, and the tracker keeps the
+# per-user and total byte/message counts, so checking a cap never walks the
+# log. Which entry goes first is up to the store: it is always the oldest live
+# one (found from the store's head pointer), or a user's oldest for the
+# per-user cap. The tracker only says whether it has to go.
+
+DEFAULT_MAX_BYTES = 1 * 1024 * 1024 * 1024  # 1GB
+
+
+class RetentionPolicy:
+    """Caps applied to the chatlog. None disables a cap."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_age=None, max_messages_per_user=None):
+        self.max_bytes = max_bytes
+        self.max_age = max_age  # seconds
+        self.max_messages_per_user = max_messages_per_user
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            max_bytes=data.get("max_bytes", DEFAULT_MAX_BYTES),
+            max_age=data.get("max_age"),
+            max_messages_per_user=data.get("max_messages_per_user"),
+        )
+
+    def to_dict(self):
+        return {
+            "max_bytes": self.max_bytes,
+            "max_age": self.max_age,
+            "max_messages_per_user": self.max_messages_per_user,
+        }
+
+
+class RetentionTracker:
+    """Incremental byte/message accounting and the caps' verdict on the oldest entry."""
+
+    def __init__(self, policy=None):
+        self.policy = policy or RetentionPolicy()
+        self.user_bytes = {}
+        self.user_counts = {}
+        self.total_bytes = 0
+        self.total_messages = 0
+
+    def add(self, user, length, count=1):
+        """Account for count entries of user, length bytes in all, joining the log."""
+        self.user_bytes[user] = self.user_bytes.get(user, 0) + length
+        self.user_counts[user] = self.user_counts.get(user, 0) + count
+        self.total_bytes += length
+        self.total_messages += count
+
+    def remove(self, user, length, count=1):
+        """Account for count entries of user, length bytes in all, leaving the log."""
+        self.user_bytes[user] -= length
+        self.user_counts[user] -= count
+        if not self.user_counts[user]:
+            del self.user_bytes[user]
+            del self.user_counts[user]
+        self.total_bytes -= length
+        self.total_messages -= count
+
+    def over_user_limit(self, user):
+        limit = self.policy.max_messages_per_user
+        return limit is not None and self.user_counts.get(user, 0) > limit
+
+    def over_size(self):
+        return self.policy.max_bytes is not None and self.total_bytes > self.policy.max_bytes
+
+    def expired(self, ts, now=None):
+        """Whether the size or age cap says the oldest live entry (logged at ts) must go."""
+        if self.over_size():
+            return True
+        if self.policy.max_age is not None:
+            if now is None:
+                now = time.time()
+            return ts < now - self.policy.max_age
+        return False
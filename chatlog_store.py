@@ -0,0 +1,720 @@
+import json
+import os
+import re
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from chatlog_retention import RetentionTracker
+
+###############################################################################
+#                 Chatlog Store (append-only segments + index)
+###############################################################################
+#
+# Layout of the store directory:
+#
+#   segment-000001.log   one JSON record per line, append-only
+#   segment-000001.idx   compact index written when the segment is sealed
+#   segment-000002.log   the active segment (indexed by scanning on open)
+#
+# Records are JSON objects:
+#   {"t": ts, "u": user, "m": message}              a new message
+#   {"op": "amend", "t": ts, "u": user, "m": text}  replaces the user's last message
+#   {"op": "clear", "t": ts, "u": user}             drops all of the user's messages
+#   {"op": "head", "h": ..., "uh": ...}             eviction marks only (see below)
+#
+# Appending a message is one write() on the active segment, no matter how much
+# history there is. Retention caps are applied as records are added (and again
+# on open); a sealed segment is deleted once it is the oldest one left and
+# holds no live entries.
+#
+# Messages and amends are entries, numbered by their position in their
+# segment. An amend supersedes the user's last live entry, and everything
+# else that removes entries (the caps, a clear) takes a user's oldest. So a
+# user's live entries in a segment are always the last `count` of their
+# non-superseded ones there, and all the store keeps in memory per segment
+# is {user: [live count, live bytes]}. The per-entry arrays (offset, length,
+# time, user) and each user's positions are a SegmentDetail, loaded when a
+# read or an eviction needs them; at most max_loaded sealed ones are kept.
+#
+# Evictions by the caps write nothing of their own. The size and age caps
+# always take the oldest live entry, so everything before self.head is dead;
+# the per-user cap takes a user's oldest, so everything of theirs before
+# user_heads[user] is dead. Whenever these marks have moved, the next record
+# written carries them ("h": [segment, index], "uh": {user: [segment, index]})
+# and close() writes a bare "head" record. The first record of each segment
+# carries all of them, so reclaiming older segments never loses a mark. On
+# open the last marks seen are applied before the caps, so entries evicted
+# while the log was bigger stay evicted after space has been freed.
+#
+# A sealed .idx is a one-line JSON header followed by the detail's arrays.
+# The header holds the segment's users, its entry counts per user (after any
+# clear in the segment), the last eviction marks its records carried and, in
+# order, the clears and cross-segment amends that changed earlier segments. Opening the store reads only the headers and
+# scans the active segment; a missing or old-format .idx is rebuilt from its
+# .log.
+
+SEGMENT_MAX_BYTES = 8 * 1024 * 1024
+INDEX_VERSION = 2
+TIMESTAMP_PREFIX = re.compile(r'^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\]')
+
+
+class Segment:
+    """What is always in memory for a segment: its live entry count and bytes per user."""
+    __slots__ = ("id", "stats", "live", "live_bytes")
+
+    def __init__(self, segment_id):
+        self.id = segment_id
+        self.stats = {}  # user -> [live count, live bytes]
+        self.live = 0
+        self.live_bytes = 0
+
+
+class SegmentDetail:
+    """Per-entry arrays of one segment, plus each user's non-superseded entries in it."""
+
+    def __init__(self, users=()):
+        self.offsets = array("I")
+        self.lengths = array("I")
+        self.times = array("d")
+        self.user_ids = array("I")
+        self.superseded = bytearray()  # 1 = replaced by an amend in the same segment
+        self.users = list(users)       # user id -> name
+        self.ids_by_user = {user: i for i, user in enumerate(self.users)}
+        self.positions = {}  # user -> array of non-superseded entry indexes, oldest first
+        self.cleared = {}    # user -> entry count at the user's last clear in this segment
+        self.events = []     # clears and cross-segment amends, in order, for the .idx header
+        self.head = None     # last eviction marks carried by the segment's records
+        self.user_heads = {}
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def add(self, user, offset, length, ts):
+        user_id = self.ids_by_user.get(user)
+        if user_id is None:
+            user_id = self.ids_by_user[user] = len(self.users)
+            self.users.append(user)
+        index = len(self.offsets)
+        self.offsets.append(offset)
+        self.lengths.append(length)
+        self.times.append(ts)
+        self.user_ids.append(user_id)
+        self.superseded.append(0)
+        self.positions.setdefault(user, array("I")).append(index)
+        return index
+
+    def user(self, index):
+        return self.users[self.user_ids[index]]
+
+    def first_live(self, user, count):
+        """Index of the user's oldest live entry here, given that count of them are live."""
+        positions = self.positions[user]
+        return positions[len(positions) - count]
+
+    def index_positions(self, cross_superseded=()):
+        """Rebuild positions from the arrays, leaving out superseded entries."""
+        positions = {}
+        users, user_ids, superseded = self.users, self.user_ids, self.superseded
+        for index in range(len(user_ids)):
+            if not superseded[index] and index not in cross_superseded:
+                user = users[user_ids[index]]
+                entries = positions.get(user)
+                if entries is None:
+                    entries = positions[user] = array("I")
+                entries.append(index)
+        self.positions = positions
+
+    def sealed_stats(self):
+        """{user: [count, bytes]} of the entries not superseded or cleared within this segment."""
+        stats = {}
+        for user, positions in self.positions.items():
+            floor = self.cleared.get(user, 0)
+            kept = [index for index in positions if index >= floor]
+            if kept:
+                stats[user] = [len(kept), sum(self.lengths[index] for index in kept)]
+        return stats
+
+    def write(self, file):
+        header = {
+            "version": INDEX_VERSION,
+            "entries": len(self),
+            "users": self.users,
+            "stats": self.sealed_stats(),
+            "events": self.events,
+            "head": self.head,
+            "user_heads": self.user_heads,
+        }
+        file.write(json.dumps(header).encode("utf-8") + b"\n")
+        for values in (self.offsets, self.lengths, self.times, self.user_ids):
+            values.tofile(file)
+        file.write(self.superseded)
+
+    @classmethod
+    def read(cls, file):
+        """Read a detail written by write(). Raises ValueError or EOFError if it is not one."""
+        header = json.loads(file.readline())
+        if not isinstance(header, dict) or header.get("version") != INDEX_VERSION:
+            raise ValueError("not a chatlog index")
+        detail = cls(header["users"])
+        count = header["entries"]
+        for values in (detail.offsets, detail.lengths, detail.times, detail.user_ids):
+            values.fromfile(file, count)
+        detail.superseded = bytearray(file.read(count))
+        if len(detail.superseded) != count:
+            raise EOFError("chatlog index is truncated")
+        return detail
+
+
+class ChatlogStore:
+    def __init__(self, directory="chatlog", segment_max_bytes=SEGMENT_MAX_BYTES, policy=None, max_loaded=4):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.max_loaded = max_loaded
+        self.lock = threading.RLock()
+
+        # segment id -> Segment, oldest first
+        self.segments = {}
+        # sealed segment id -> SegmentDetail, least recently used first
+        self.loaded = OrderedDict()
+        # segment id -> indexes of its entries superseded by amends in later segments
+        self.cross_superseded = {}
+        # (segment id, index): entries before it in that segment (and all earlier ones) are dead
+        self.head = (0, 0)
+        # user -> (segment id, index): the same for the per-user cap
+        self.user_heads = {}
+        # the marks as last written to disk, and the users whose mark has moved since
+        self.saved_head = (0, 0)
+        self.saved_user_heads = {}
+        self.unsaved_users = set()
+        self.retention = RetentionTracker(policy)
+
+        self.active_segment = None
+        self.active_detail = None
+        self.active_file = None
+        self.active_size = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._open()
+
+    # 1️⃣ OPEN / INDEX
+    def _segment_path(self, segment, ext="log"):
+        return os.path.join(self.directory, f"segment-{segment:06d}.{ext}")
+
+    def _list_segments(self):
+        segments = []
+        for name in os.listdir(self.directory):
+            match = re.match(r'^segment-(\d+)\.log$', name)
+            if match:
+                segments.append(int(match.group(1)))
+        return sorted(segments)
+
+    def _open(self):
+        """Rebuild the in-memory index from the sealed .idx headers and the active segment."""
+        segments = self._list_segments() or [1]
+        for segment in segments[:-1]:
+            header = self._read_header(segment)
+            if header is None:
+                self._replay(segment)
+                self._seal()
+                self.active_segment = None  # sealed: later amends of it go to cross_superseded
+            else:
+                self._apply_header(segment, header)
+        self._replay(segments[-1])
+
+        path = self._segment_path(self.active_segment)
+        self.active_file = open(path, "ab")
+        self.active_size = self.active_file.tell()
+        self._restore_marks()
+        for user in list(self.retention.user_counts):
+            self._enforce_user_limit(user)
+        self._enforce_retention()
+
+    def _read_header(self, segment):
+        """The header of a sealed segment's .idx, or None if it is missing or not the current format."""
+        try:
+            with open(self._segment_path(segment, "idx"), "rb") as file:
+                header = json.loads(file.readline())
+        except (OSError, ValueError):
+            return None
+        if not isinstance(header, dict) or header.get("version") != INDEX_VERSION:
+            return None
+        return header
+
+    def _apply_header(self, segment_id, header):
+        """Add a sealed segment from its header, replaying its effect on earlier segments."""
+        self._note_marks(header.get("head"), header.get("user_heads"))
+        for event in header["events"]:
+            if event[0] == "clear":
+                self._drop_user(event[1])
+            else:
+                _, user, target, index, length = event
+                self._supersede(target, index, user, length)
+        segment = self.segments[segment_id] = Segment(segment_id)
+        for user, (count, length) in header["stats"].items():
+            segment.stats[user] = [count, length]
+            segment.live += count
+            segment.live_bytes += length
+            self.retention.add(user, length, count)
+
+    def _replay(self, segment_id):
+        """Make segment_id the active segment and index it by scanning its records."""
+        self.active_segment = segment_id
+        self.active_detail = SegmentDetail()
+        self.segments[segment_id] = Segment(segment_id)
+        for data, offset, length in self._read_records(segment_id):
+            self._apply_record(data, offset, length)
+
+    def _note_marks(self, head, user_heads, detail=None):
+        """Remember eviction marks found on disk (or just written there)."""
+        if head is not None:
+            self.saved_head = tuple(head)
+            if detail is not None:
+                detail.head = head
+        if user_heads:
+            for user, mark in user_heads.items():
+                self.saved_user_heads[user] = tuple(mark)
+                self.unsaved_users.discard(user)
+            if detail is not None:
+                detail.user_heads.update(user_heads)
+
+    def _restore_marks(self):
+        """Kill what the saved eviction marks say was evicted before the store was closed."""
+        head_segment, head_index = self.saved_head
+        for segment in list(self.segments.values()):
+            if segment.id > head_segment:
+                break
+            if segment.id < head_segment:
+                self._drop_segment(segment)
+            else:
+                self._kill_before(segment, head_index, list(segment.stats))
+        self.head = self.saved_head
+        self.user_heads = dict(self.saved_user_heads)
+        for user, (mark_segment, mark_index) in self.user_heads.items():
+            for segment in list(self.segments.values()):
+                if segment.id > mark_segment:
+                    break
+                if user not in segment.stats:
+                    continue
+                if segment.id < mark_segment:
+                    self._drop_stats(segment, user)
+                else:
+                    self._kill_before(segment, mark_index, [user])
+
+    def _kill_before(self, segment, index, users):
+        """Kill the live entries of users in segment that come before index."""
+        if not index or not segment.live:
+            return
+        detail = self._detail(segment.id)
+        for user in users:
+            stats = segment.stats.get(user)
+            if not stats:
+                continue
+            positions = detail.positions[user]
+            for position in positions[len(positions) - stats[0]:]:
+                if position >= index:
+                    break
+                self._kill(segment, user, detail.lengths[position])
+
+    def _read_records(self, segment):
+        """Yield (record, offset, length) for each record of a segment file.
+
+        A torn record left at the end by a crash is cut off so appends resume
+        on a clean line boundary.
+        """
+        path = self._segment_path(segment)
+        if not os.path.exists(path):
+            return
+        offset = 0
+        with open(path, "rb") as file:
+            for raw in file:
+                if not raw.endswith(b"\n"):
+                    break
+                try:
+                    data = json.loads(raw)
+                except ValueError:
+                    offset += len(raw)
+                    continue
+                yield data, offset, len(raw)
+                offset += len(raw)
+        if offset != os.path.getsize(path):
+            with open(path, "r+b") as file:
+                file.truncate(offset)
+
+    def _seal(self):
+        """Write the active segment's .idx and keep its detail loaded."""
+        path = self._segment_path(self.active_segment, "idx")
+        try:
+            with open(path + ".tmp", "wb") as file:
+                self.active_detail.write(file)
+            os.replace(path + ".tmp", path)
+        except Exception as e:
+            print(f"[DEBUG] Error writing chatlog index for segment {self.active_segment}: {e}")
+        self._cache_detail(self.active_segment, self.active_detail)
+
+    def _detail(self, segment_id):
+        """The SegmentDetail of a segment, loading it if needed."""
+        if segment_id == self.active_segment:
+            return self.active_detail
+        detail = self.loaded.get(segment_id)
+        if detail is None:
+            detail = self._load_detail(segment_id)
+        self._cache_detail(segment_id, detail)
+        return detail
+
+    def _cache_detail(self, segment_id, detail):
+        self.loaded[segment_id] = detail
+        self.loaded.move_to_end(segment_id)
+        while len(self.loaded) > self.max_loaded:
+            self.loaded.popitem(last=False)
+
+    def _load_detail(self, segment_id):
+        try:
+            with open(self._segment_path(segment_id, "idx"), "rb") as file:
+                detail = SegmentDetail.read(file)
+        except (OSError, ValueError, EOFError) as e:
+            print(f"[DEBUG] Error loading chatlog index for segment {segment_id}, rescanning: {e}")
+            detail = self._scan_detail(segment_id)
+        detail.index_positions(self.cross_superseded.get(segment_id, ()))
+        return detail
+
+    def _scan_detail(self, segment_id):
+        """Rebuild a sealed segment's arrays from its .log, for an unreadable .idx."""
+        detail = SegmentDetail()
+        for data, offset, length in self._read_records(segment_id):
+            op = data.get("op", "msg")
+            if op == "head":
+                continue
+            user = data["u"]
+            if op == "clear":
+                detail.cleared[user] = len(detail)
+                continue
+            positions = detail.positions.get(user)
+            if op == "amend" and positions and positions[-1] >= detail.cleared.get(user, 0):
+                detail.superseded[positions.pop()] = 1
+            detail.add(user, offset, length, data.get("t", 0))
+        return detail
+
+    def _apply_record(self, data, offset, length):
+        """Index one record just written to (or read back from) the active segment."""
+        detail = self.active_detail
+        self._note_marks(data.get("h"), data.get("uh"), detail)
+        op = data.get("op", "msg")
+        if op == "head":
+            return
+        user = data["u"]
+        if op == "clear":
+            self._drop_user(user)
+            detail.cleared[user] = len(detail)
+            detail.events.append(["clear", user])
+            return
+        last = self._last_live(user) if op == "amend" else None
+        detail.add(user, offset, length, data.get("t", 0))
+        segment = self.segments[self.active_segment]
+        stats = segment.stats.setdefault(user, [0, 0])
+        stats[0] += 1
+        stats[1] += length
+        segment.live += 1
+        segment.live_bytes += length
+        self.retention.add(user, length)
+        if last is not None:
+            # Superseded after the add, so the user's count never touches zero
+            target_segment, target, index = last
+            target_length = target.lengths[index]
+            self._supersede(target_segment.id, index, user, target_length)
+            if target_segment.id != self.active_segment:
+                detail.events.append(["amend", user, target_segment.id, index, target_length])
+
+    def _kill(self, segment, user, length):
+        """Account for one of user's live entries in segment leaving the log."""
+        stats = segment.stats[user]
+        stats[0] -= 1
+        stats[1] -= length
+        if not stats[0]:
+            del segment.stats[user]
+        segment.live -= 1
+        segment.live_bytes -= length
+        self.retention.remove(user, length)
+
+    def _drop_stats(self, segment, user):
+        """Kill all of user's live entries in segment."""
+        count, length = segment.stats.pop(user)
+        segment.live -= count
+        segment.live_bytes -= length
+        self.retention.remove(user, length, count)
+
+    def _drop_user(self, user):
+        for segment in self.segments.values():
+            if user in segment.stats:
+                self._drop_stats(segment, user)
+        self.user_heads.pop(user, None)
+        self.unsaved_users.discard(user)
+
+    def _supersede(self, segment_id, index, user, length):
+        """Kill user's last live entry, at index in segment_id, replaced by an amend."""
+        segment = self.segments.get(segment_id)
+        if segment is None or user not in segment.stats:
+            return  # already gone (its segment was reclaimed)
+        self._kill(segment, user, length)
+        if segment_id == self.active_segment:
+            detail = self.active_detail
+            detail.superseded[index] = 1
+        else:
+            detail = self.loaded.get(segment_id)
+            self.cross_superseded.setdefault(segment_id, set()).add(index)
+        if detail is not None:
+            positions = detail.positions[user]
+            del positions[positions.index(index)]
+
+    def _last_live(self, user):
+        """(segment, detail, index) of user's newest live entry, or None."""
+        for segment in reversed(self.segments.values()):
+            if user in segment.stats:
+                detail = self._detail(segment.id)
+                return segment, detail, detail.positions[user][-1]
+        return None
+
+    # 2️⃣ WRITES
+    def _write_record(self, data):
+        """Append one record, with any eviction marks that moved, to the active segment and index it."""
+        record = self._with_marks(data)
+        raw = (json.dumps(record) + "\n").encode("utf-8")
+        if self.active_size and self.active_size + len(raw) > self.segment_max_bytes:
+            self._roll_segment()
+            record = self._with_marks(data)
+            raw = (json.dumps(record) + "\n").encode("utf-8")
+        offset = self.active_size
+        self.active_file.write(raw)
+        self.active_file.flush()
+        self.active_size += len(raw)
+        self._apply_record(record, offset, len(raw))
+        self._enforce_retention(data.get("u"))
+
+    def _with_marks(self, data):
+        """data plus the eviction marks that have moved since they were last written."""
+        record = dict(data)
+        if self.head != self.saved_head:
+            record["h"] = list(self.head)
+        moved = {user: list(self.user_heads[user]) for user in self.unsaved_users if user in self.user_heads}
+        if moved:
+            record["uh"] = moved
+        return record
+
+    def _save_marks(self):
+        """Write a bare "head" record if an eviction mark has moved since the last record."""
+        if self.head != self.saved_head or self.unsaved_users:
+            self._write_record({"op": "head"})
+
+    def _roll_segment(self):
+        """Seal the active segment and start a new one."""
+        self.active_file.close()
+        self._seal()
+        self.active_segment += 1
+        self.active_detail = SegmentDetail()
+        self.segments[self.active_segment] = Segment(self.active_segment)
+        self.active_file = open(self._segment_path(self.active_segment), "ab")
+        self.active_size = 0
+        # The new segment's first record carries every mark (see the layout notes)
+        self.saved_head = None
+        self.unsaved_users = set(self.user_heads)
+        self._reclaim_segments()
+
+    def append(self, username, message, ts=None):
+        """Append a message for username in O(1)."""
+        with self.lock:
+            self._write_record({"t": ts or time.time(), "u": username, "m": message})
+
+    def amend_last(self, username, extra_text):
+        """Append extra_text to the last message logged for username."""
+        with self.lock:
+            last = self._last_live(username)
+            if last is None:
+                return
+            segment, detail, index = last
+            location = (segment.id, detail.offsets[index], detail.lengths[index])
+            message = self._read_entries([location])[0] + "\n" + extra_text
+            self._write_record({"op": "amend", "t": detail.times[index], "u": username, "m": message})
+
+    def clear_user(self, username):
+        """Drop all messages for username."""
+        with self.lock:
+            if self.count(username):
+                self._write_record({"op": "clear", "t": time.time(), "u": username})
+
+    # 3️⃣ RETENTION
+    def set_policy(self, policy):
+        """Switch to a new retention policy and apply it right away."""
+        with self.lock:
+            self.retention.policy = policy
+            for user in list(self.retention.user_counts):
+                self._enforce_user_limit(user)
+            self._enforce_retention()
+            self._save_marks()
+
+    @property
+    def total_bytes(self):
+        return self.retention.total_bytes
+
+    def user_bytes(self, username):
+        return self.retention.user_bytes.get(username, 0)
+
+    def _enforce_user_limit(self, user):
+        """Kill user's oldest entries while over the per-user cap, whole segments at a time where possible."""
+        retention = self.retention
+        while retention.over_user_limit(user):
+            excess = retention.user_counts[user] - retention.policy.max_messages_per_user
+            segment = next(segment for segment in self.segments.values() if user in segment.stats)
+            count = segment.stats[user][0]
+            if count <= excess:
+                self._drop_stats(segment, user)
+                self.user_heads[user] = (segment.id + 1, 0)
+            else:
+                detail = self._detail(segment.id)
+                index = detail.first_live(user, count)
+                self._kill(segment, user, detail.lengths[index])
+                self.user_heads[user] = (segment.id, index + 1)
+            self.unsaved_users.add(user)
+
+    def _enforce_retention(self, user=None, now=None):
+        """Evict the oldest entries until every cap holds. Amortized O(1) per appended entry."""
+        if user is not None:
+            self._enforce_user_limit(user)
+        retention = self.retention
+        while retention.total_messages and (retention.over_size() or retention.policy.max_age is not None):
+            segment = next(segment for segment in self.segments.values() if segment.live)
+            if (retention.over_size() and segment.id != self.active_segment
+                    and retention.total_bytes - segment.live_bytes > retention.policy.max_bytes):
+                # Everything in it has to go: no need to load its entries
+                self._drop_segment(segment)
+                continue
+            detail, index, oldest_user = self._oldest(segment)
+            if not retention.expired(detail.times[index], now):
+                break
+            self._kill(segment, oldest_user, detail.lengths[index])
+            self.head = (segment.id, index + 1)
+        self._reclaim_segments()
+
+    def _oldest(self, segment):
+        """(detail, index, user) of the oldest live entry, which is in segment, the first with any."""
+        detail = self._detail(segment.id)
+        cross_superseded = self.cross_superseded.get(segment.id, ())
+        index = self.head[1] if self.head[0] == segment.id else 0
+        while True:
+            user = detail.user(index)
+            stats = segment.stats.get(user)
+            if (stats and not detail.superseded[index] and index not in cross_superseded
+                    and index >= detail.first_live(user, stats[0])):
+                self.head = (segment.id, index)
+                return detail, index, user
+            index += 1
+
+    def _drop_segment(self, segment):
+        for user, (count, length) in segment.stats.items():
+            self.retention.remove(user, length, count)
+        segment.stats = {}
+        segment.live = 0
+        segment.live_bytes = 0
+        self.head = (segment.id + 1, 0)
+
+    def _reclaim_segments(self):
+        """Delete sealed segments from the front of the log once they hold nothing live."""
+        for segment in list(self.segments.values()):
+            if segment.id == self.active_segment or segment.live:
+                break
+            del self.segments[segment.id]
+            self.loaded.pop(segment.id, None)
+            self.cross_superseded.pop(segment.id, None)
+            for user in [user for user, mark in self.user_heads.items() if mark[0] <= segment.id]:
+                del self.user_heads[user]  # nothing of theirs is left before the mark
+                self.unsaved_users.discard(user)
+            for ext in ("log", "idx"):
+                path = self._segment_path(segment.id, ext)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    # 4️⃣ READS
+    def users(self):
+        """Return the usernames that have live messages, in the order they (re)appeared."""
+        with self.lock:
+            return list(self.retention.user_counts)
+
+    def count(self, username):
+        with self.lock:
+            return self.retention.user_counts.get(username, 0)
+
+    def messages(self, username, start=0, stop=None):
+        """Return messages start..stop (Python slice semantics) for username.
+
+        Only the segments holding the requested messages are loaded.
+        """
+        with self.lock:
+            start, stop, _ = slice(start, stop).indices(self.count(username))
+            locations = []
+            position = 0  # messages of username in the segments before this one
+            for segment in list(self.segments.values()):
+                stats = segment.stats.get(username)
+                if not stats:
+                    continue
+                count = stats[0]
+                if position < stop and position + count > start:
+                    detail = self._detail(segment.id)
+                    positions = detail.positions[username]
+                    live = positions[len(positions) - count:]
+                    for index in live[max(0, start - position):stop - position]:
+                        locations.append((segment.id, detail.offsets[index], detail.lengths[index]))
+                position += count
+            return self._read_entries(locations)
+
+    def _read_entries(self, locations):
+        """Read the messages at (segment, offset, length) locations."""
+        self.active_file.flush()
+        messages = []
+        handles = {}
+        try:
+            for segment, offset, length in locations:
+                file = handles.get(segment)
+                if file is None:
+                    file = handles[segment] = open(self._segment_path(segment), "rb")
+                file.seek(offset)
+                messages.append(json.loads(file.read(length))["m"])
+        finally:
+            for file in handles.values():
+                file.close()
+        return messages
+
+    # 5️⃣ IMPORT / CLOSE
+    def import_json(self, path="chatlog.json"):
+        """Import a legacy chatlog.json ({user: [messages]}) and rename it out of the way."""
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, "r") as file:
+                chatlog = json.load(file)
+        except Exception as e:
+            print(f"[DEBUG] Error importing {path}: {e}")
+            return False
+
+        fallback_ts = os.path.getmtime(path)
+        with self.lock:
+            for username, messages in chatlog.items():
+                for message in messages:
+                    self.append(username, message, self._message_timestamp(message, fallback_ts))
+        os.replace(path, path + ".imported")
+        return True
+
+    def _message_timestamp(self, message, fallback_ts):
+        match = TIMESTAMP_PREFIX.match(message)
+        if match:
+            try:
+                return time.mktime(time.strptime(match.group(1), "%Y-%m-%d %H:%M:%S"))
+            except ValueError:
+                pass
+        return fallback_ts
+
+    def close(self):
+        with self.lock:
+            if self.active_file:
+                self._save_marks()
+                self.active_file.close()
+                self.active_file = None
@@ -0,0 +1,159 @@
+import asyncio
+import collections
+import threading
+import time
+
+###############################################################################
+#                  Chunk Channel (telnet reader -> pipeline worker)
+###############################################################################
+#
+# A FIFO of inbound chunks bounded in bytes rather than items. When a put
+# finds raw bytes at the tail, it appends to them instead of queueing
+# another item, up to max_chunk. A backlog therefore drains as a few large
+# chunks rather than many 4 KB ones. Text (local status lines), pushed
+# items (render ops from the I/O loop) and CLOSED are never merged.
+#
+# Backpressure: at high_water bytes, producers wait until the consumer has
+# brought the depth down to low_water.
+# - put_async awaits a future, so the asyncio read loop stops calling
+#   reader.read and TCP flow control pushes back on the BBS.
+# - put blocks on a condition.
+# - try_put returns False.
+# - push never waits; it is for small items that must not be held up.
+#
+# metrics() reports depth, merge ratio (puts folded into an existing chunk),
+# stalls and the total time producers spent waiting.
+
+CLOSED = object()
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+def _size(data):
+    return len(data) if isinstance(data, (bytes, bytearray, str)) else 0
+
+
+class ChunkChannel:
+    def __init__(self, high_water=1024 * 1024, low_water=None, max_chunk=64 * 1024):
+        self.high_water = high_water
+        self.low_water = high_water // 2 if low_water is None else low_water
+        self.max_chunk = max_chunk
+        self.items = collections.deque()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+        self.async_waiters = []  # (loop, future) of put_async calls waiting for room
+
+        # Metrics
+        self.puts = 0
+        self.merged = 0
+        self.peak_bytes = 0
+        self.stalls = 0
+        self.stall_time = 0.0
+
+    def __len__(self):
+        return len(self.items)
+
+    def empty(self):
+        return not self.items
+
+    def _append(self, data):
+        """Queue or merge data. Caller holds the lock."""
+        items = self.items
+        size = _size(data)
+        self.puts += 1
+        tail = items[-1] if items else None
+        if (isinstance(data, (bytes, bytearray)) and isinstance(tail, (bytes, bytearray))
+                and len(tail) + size <= self.max_chunk):
+            if isinstance(tail, bytes):
+                tail = items[-1] = bytearray(tail)
+            tail += data
+            self.merged += 1
+        else:
+            items.append(data)
+        self.bytes += size
+        if self.bytes > self.peak_bytes:
+            self.peak_bytes = self.bytes
+        self.not_empty.notify()
+
+    # 1️⃣ PRODUCERS
+    def put(self, data):
+        """Queue data, blocking while the channel is at high water."""
+        with self.lock:
+            if self.bytes >= self.high_water:
+                self.stalls += 1
+                start = time.monotonic()
+                while self.bytes > self.low_water:
+                    self.not_full.wait()
+                self.stall_time += time.monotonic() - start
+            self._append(data)
+
+    def try_put(self, data):
+        """Queue data without blocking. Returns False at high water."""
+        with self.lock:
+            if self.bytes >= self.high_water:
+                return False
+            self._append(data)
+            return True
+
+    async def put_async(self, data):
+        """Queue data from an asyncio loop, awaiting (not blocking the loop) at high water."""
+        with self.lock:
+            if self.bytes < self.high_water:
+                self._append(data)
+                return
+            loop = asyncio.get_running_loop()
+            waiter = (loop, loop.create_future())
+            self.async_waiters.append(waiter)
+            self.stalls += 1
+        start = time.monotonic()
+        try:
+            await waiter[1]
+        finally:
+            with self.lock:
+                self.stall_time += time.monotonic() - start
+                if waiter in self.async_waiters:
+                    self.async_waiters.remove(waiter)
+        with self.lock:
+            self._append(data)
+
+    def push(self, item):
+        """Queue item after whatever is pending, regardless of high water. Never blocks."""
+        with self.lock:
+            self.items.append(item)
+            self.not_empty.notify()
+
+    def close(self):
+        """Queue CLOSED after whatever is pending, regardless of high water."""
+        self.push(CLOSED)
+
+    # 2️⃣ CONSUMER
+    def get(self):
+        """Take the oldest chunk (or CLOSED), blocking while the channel is empty."""
+        with self.lock:
+            while not self.items:
+                self.not_empty.wait()
+            data = self.items.popleft()
+            self.bytes -= _size(data)
+            if self.bytes <= self.low_water:
+                self.not_full.notify_all()
+                for loop, future in self.async_waiters:
+                    loop.call_soon_threadsafe(_wake, future)
+                self.async_waiters = []
+            return data
+
+    def metrics(self):
+        with self.lock:
+            return {
+                "depth": len(self.items),
+                "depth_bytes": self.bytes,
+                "peak_bytes": self.peak_bytes,
+                "puts": self.puts,
+                "merge_ratio": self.merged / self.puts if self.puts else 0.0,
+                "stalls": self.stalls,
+                "stall_time": self.stall_time,
+            }
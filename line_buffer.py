@@ -0,0 +1,45 @@
+from text_codec import TextCodec
+
+###############################################################################
+#                   Line Buffer (raw bytes in, decoded lines out)
+###############################################################################
+#
+# Raw telnet bytes are appended to one reusable bytearray. Each read is
+# scanned once, from where the previous read ended, for the last line end
+# (\r\n, \r or \n); everything up to it is decoded in a single call and
+# split into lines, and the rest stays buffered as bytes. A long line that
+# arrives over many reads is therefore never re-concatenated, re-scanned or
+# decoded twice, and a multi-byte character split across reads stays intact.
+#
+# Consumed bytes are dropped with del buffer[:n], which CPython's bytearray
+# does in place by advancing its start offset, so the buffer acts as a ring
+# without copying the tail on every read.
+
+
+class LineBuffer:
+    def __init__(self, codec=None):
+        self.codec = codec or TextCodec()
+        self.buffer = bytearray()
+        self.after_cr = False  # the last line ended with \r; a leading \n belongs to it
+
+    def feed(self, data):
+        """Append raw bytes and return the lines they complete, decoded, without line ends."""
+        buffer = self.buffer
+        scan_from = len(buffer)
+        buffer += data
+        if self.after_cr:
+            self.after_cr = False
+            if buffer[scan_from:scan_from + 1] == b"\n":  # \r\n split across reads
+                del buffer[scan_from]
+
+        end = max(buffer.rfind(b"\n", scan_from), buffer.rfind(b"\r", scan_from)) + 1
+        if not end:
+            return []
+        text = self.codec.decode(buffer[:end])
+        self.after_cr = end == len(buffer) and buffer[end - 1] == 13
+        del buffer[:end]
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        lines = text.split("\n")
+        lines.pop()  # the empty string after the last line end
+        return lines
@@ -0,0 +1,89 @@
+import re
+
+###############################################################################
+#                      Line Classifier (one pass per line)
+###############################################################################
+#
+# classify() strips escape sequences from a line once and sorts it into one
+# event kind with a single dispatch on how the line starts:
+#
+#   DIRECTED      From <sender> (to you|whispered): <message>
+#   PUBLIC        From <sender>[ (to <recipient>)]: <message>
+#   ROSTER_START  You are in ...            (first line of the user list banner)
+#   ROSTER_END    ... are here with you.    (last line of the banner)
+#   LOGIN_PROMPT  a password / username prompt; event.prompt says which
+#   PLAIN         anything else
+#
+# Consumers (display, triggers, chatlog, roster, auto-login) read the event
+# instead of re-matching the line.
+
+DIRECTED = "directed"
+PUBLIC = "public"
+ROSTER_START = "roster-start"
+ROSTER_END = "roster-end"
+LOGIN_PROMPT = "login-prompt"
+PLAIN = "plain"
+
+PROMPT_PASSWORD = "password"
+PROMPT_USERNAME = "username"
+
+ROSTER_START_TEXT = "You are in"
+ROSTER_END_TEXT = "are here with you."
+
+_ESCAPE_RE = re.compile(r'\x1b\[[0-?]*[ -/]*[@-~]|\x1b[@-Z\\-_]')
+_FROM_RE = re.compile(
+    r'From\s+(\S+)(?:\s+\((to\s+[^)]+|whispered)\))?:\s*(.+)$',
+    re.IGNORECASE,
+)
+_TO_YOU_RE = re.compile(r'to\s+you$', re.IGNORECASE)
+_PASSWORD_PROMPTS = ("enter your password:",)
+_USERNAME_PROMPTS = ("type it in and press enter", 'otherwise type "new":')
+
+
+class LineEvent:
+    __slots__ = ("kind", "line", "clean", "sender", "recipient", "message", "prompt")
+
+    def __init__(self, kind, line, clean, sender=None, recipient=None, message=None, prompt=None):
+        self.kind = kind
+        self.line = line          # the line as received, escape sequences included
+        self.clean = clean        # escape sequences removed, whitespace stripped
+        self.sender = sender
+        self.recipient = recipient
+        self.message = message
+        self.prompt = prompt
+
+    def __repr__(self):
+        return f"LineEvent({self.kind!r}, {self.clean!r})"
+
+
+def strip_ansi(line):
+    if "\x1b" not in line:
+        return line.strip()
+    return _ESCAPE_RE.sub('', line).strip()
+
+
+def classify(line):
+    """Classify one complete line (without its newline) into a LineEvent."""
+    clean = strip_ansi(line)
+    head = clean[:4]
+    if head == "From" or head.lower() == "from":
+        match = _FROM_RE.match(clean)
+        if match:
+            sender, target, message = match.groups()
+            if target is None:
+                return LineEvent(PUBLIC, line, clean, sender, None, message)
+            if target.lower() == "whispered" or _TO_YOU_RE.match(target):
+                return LineEvent(DIRECTED, line, clean, sender, None, message)
+            return LineEvent(PUBLIC, line, clean, sender, target[2:].strip(), message)
+    if clean.startswith(ROSTER_START_TEXT):
+        return LineEvent(ROSTER_START, line, clean)
+    if ROSTER_END_TEXT in clean:
+        return LineEvent(ROSTER_END, line, clean)
+    lower = clean.lower()
+    for prompt in _PASSWORD_PROMPTS:
+        if prompt in lower:
+            return LineEvent(LOGIN_PROMPT, line, clean, prompt=PROMPT_PASSWORD)
+    for prompt in _USERNAME_PROMPTS:
+        if prompt in lower:
+            return LineEvent(LOGIN_PROMPT, line, clean, prompt=PROMPT_USERNAME)
+    return LineEvent(PLAIN, line, clean)
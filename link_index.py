@@ -0,0 +1,82 @@
+import bisect
+import time
+
+###############################################################################
+#                 Link Index (where the hyperlinks in a Text are)
+###############################################################################
+#
+# One per output widget. The render batcher records each hyperlink run's
+# range as it inserts it, so finding the URL under the mouse is a binary
+# search rather than a Text.search backwards through the scrollback.
+#
+# Links only ever arrive at the end of the widget, so the ranges stay
+# sorted. They are kept in absolute line numbers:
+#
+#   widget line = absolute line - line_offset
+#
+# Trimming lines from the top (Scrollback.on_trim) raises line_offset and
+# forgets the links that were cut. Paging older lines back in at the top
+# (Scrollback.on_load) lowers it; paged-in text carries no links. A URL
+# never spans lines, so each range is (line, start col, end col).
+
+class LinkIndex:
+    def __init__(self):
+        self.starts = []    # (absolute line, column) of each link's first character
+        self.ends = []      # column just past each link's last character
+        self.urls = []
+        self.added = []     # time.time() each link arrived, for the recent links panel
+        self.line_offset = 0
+        self.on_change = []  # callbacks taking no arguments
+
+    def __len__(self):
+        return len(self.urls)
+
+    def add(self, line, column, end_column, url):
+        """Record a link inserted at widget line.column. Links must be added in document order."""
+        self.starts.append((line + self.line_offset, column))
+        self.ends.append(end_column)
+        self.urls.append(url)
+        self.added.append(time.time())
+
+    def lookup(self, line, column):
+        """URL of the link covering widget position line.column, or None."""
+        i = bisect.bisect_right(self.starts, (line + self.line_offset, column)) - 1
+        if i >= 0 and self.starts[i][0] == line + self.line_offset and column < self.ends[i]:
+            return self.urls[i]
+        return None
+
+    def drop_top(self, count):
+        """Lines 1..count were deleted from the widget: forget their links."""
+        self.line_offset += count
+        cut = bisect.bisect_left(self.starts, (self.line_offset + 1, 0))
+        if cut:
+            del self.starts[:cut], self.ends[:cut], self.urls[:cut], self.added[:cut]
+            self.changed()
+
+    def insert_top(self, count):
+        """count lines without links were inserted above line 1."""
+        self.line_offset -= count
+
+    def clear(self):
+        """The widget was emptied."""
+        self.starts, self.ends, self.urls, self.added = [], [], [], []
+        self.line_offset = 0
+        self.changed()
+
+    def changed(self):
+        for callback in self.on_change:
+            callback()
+
+    def recent(self, count):
+        """Up to count (time, url) pairs, newest first, each URL once."""
+        result = []
+        seen = set()
+        for i in range(len(self.urls) - 1, -1, -1):
+            url = self.urls[i]
+            if url in seen:
+                continue
+            seen.add(url)
+            result.append((self.added[i], url))
+            if len(result) == count:
+                break
+        return result
@@ -0,0 +1,131 @@
+import collections
+import threading
+import time
+
+###############################################################################
+#           Link Prefetcher (warm the preview cache as links arrive)
+###############################################################################
+#
+# Sessions hand it the URLs found in incoming lines (process_data_chunk, on
+# their pipeline workers). One background thread passes them to the
+# PreviewCache. By the time the user hovers over a link, its thumbnail, or
+# the fact that it has none, is usually already in memory.
+#
+# Prefetching is opt-in and runs under three budgets:
+#
+#   rate         at most `rate` new fetches a minute (token bucket, bursts of `burst`)
+#   concurrency  at most max_in_flight fetches at once, leaving the rest of
+#                the cache's fetch pool free for hovers
+#   bytes        pauses once the cache has downloaded max_bytes_per_hour in
+#                the current hour (hovers included)
+#
+# The queue keeps only the newest max_queued URLs: on a busy night the
+# latest links are the likeliest to be hovered, so they are fetched first.
+# URLs seen recently, or already in the cache's memory, are skipped.
+
+
+class LinkPrefetcher:
+    def __init__(self, cache, rate=20, burst=5, max_in_flight=2, max_bytes_per_hour=50 * 1024 * 1024,
+                 max_queued=100, max_seen=2000):
+        self.cache = cache
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.max_bytes_per_hour = max_bytes_per_hour
+        self.max_seen = max_seen
+        self.queue = collections.deque(maxlen=max_queued)  # newest last; the oldest fall off
+        self.seen = collections.OrderedDict()  # recently submitted URLs, oldest first
+        self.in_flight = 0
+        self.tokens = burst
+        self.refilled = time.monotonic()
+        self.window_start = time.monotonic()
+        self.window_bytes = cache.downloaded_bytes
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+
+        # Metrics
+        self.submitted = 0
+        self.prefetched = 0
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.running = True
+            self.thread = threading.Thread(target=self._run, name="link-prefetch", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread:
+            self.thread.join(timeout=1)
+        self.thread = None
+
+    # 1️⃣ PRODUCERS (pipeline workers)
+    def submit(self, urls):
+        """Queue URLs for prefetching, skipping the ones seen recently."""
+        with self.condition:
+            for url in urls:
+                if url in self.seen:
+                    self.seen.move_to_end(url)
+                    continue
+                self.seen[url] = True
+                if len(self.seen) > self.max_seen:
+                    self.seen.popitem(last=False)
+                self.queue.append(url)
+                self.submitted += 1
+            self.condition.notify()
+
+    # 2️⃣ PREFETCH THREAD
+    def _run(self):
+        while True:
+            url = self._next_url()
+            if url is None:
+                return
+            self.prefetched += 1
+            self.cache.get(url, self._done)
+
+    def _next_url(self):
+        """Wait until the budgets allow another fetch and return its URL, or None once stopped."""
+        with self.condition:
+            while self.running:
+                while self.queue and self.cache.cached(self.queue[-1]):
+                    self.queue.pop()
+                delay = self.budget_delay()
+                if delay == 0:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    return self.queue.pop()
+                self.condition.wait(delay)
+            return None
+
+    def budget_delay(self):
+        """0 if a fetch may start now, else seconds until one might (None: until submit or a fetch ends)."""
+        if not self.queue or self.in_flight >= self.max_in_flight:
+            return None
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled) * self.rate / 60)
+        self.refilled = now
+        if now - self.window_start >= 3600:
+            self.window_start = now
+            self.window_bytes = self.cache.downloaded_bytes
+        if self.cache.downloaded_bytes - self.window_bytes >= self.max_bytes_per_hour:
+            return self.window_start + 3600 - now
+        if self.tokens < 1:
+            return (1 - self.tokens) * 60 / self.rate
+        return 0
+
+    def _done(self, thumbnail):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+
+    def metrics(self):
+        with self.condition:
+            return {
+                "queued": len(self.queue),
+                "in_flight": self.in_flight,
+                "submitted": self.submitted,
+                "prefetched": self.prefetched,
+            }
@@ -1,23 +1,63 @@
 import tkinter as tk
 from tkinter import ttk
-import threading
-import asyncio
-import telnetlib3
 import time
-import queue
 import re
 import json
 import os
 import webbrowser
-from PIL import Image, ImageTk
-import requests
-from io import BytesIO
-import winsound  # Import winsound for playing sound effects on Windows
+from PIL import ImageTk
+from chatlog_retention import RetentionPolicy
+from perf_stats import STAGES
+from link_index import LinkIndex
+from link_prefetcher import LinkPrefetcher
+from preview_cache import PreviewCache
+from render_batcher import FRAME_MS, RenderBatcher, ScreenPainter
+from scrollback import Scrollback
+from ansi_parser import style_colors, tag_style
+from session import DEFAULT_ROSTER_COMMAND, adopt_legacy_data, board_data_dir, split_hyperlinks
+from session_manager import SessionManager
+from text_codec import CP437, ENCODINGS
+try:
+    import winsound  # Import winsound for playing sound effects on Windows
+except ImportError:
+    winsound = None
 
 ###############################################################################
 #                         BBS Telnet App (No Chatbot)
 ###############################################################################
 
+STYLE_TAG_LIMIT = 1024  # Tk style tags a display may hold before unused ones are deleted
+
+
+class SessionTab:
+    """One notebook tab: a session plus the widgets and Tk-side state that show it."""
+
+    def __init__(self, name, session):
+        self.name = name
+        self.session = session
+        self.host = None  # last host/port/encoding this tab connected with
+        self.port = None
+        self.encoding = None
+        self.data_dir = None  # where its session keeps the chatlog and roster (see use_board_data_dir)
+        self.members = sorted(session.chat_members)
+        self.configured_style_tags = set()  # style tags already configured on its display
+        self.style_tag_limit = STYLE_TAG_LIMIT  # sweep unused style tags past this many
+        self.screen_mode_active = False
+        # Widgets, filled in by BBSTerminalApp.build_session_tab
+        self.frame = None
+        self.paned = None
+        self.output_frame = None
+        self.terminal_display = None
+        self.directed_msg_display = None
+        self.terminal_scrollback = None
+        self.directed_scrollback = None
+        self.terminal_batcher = None
+        self.directed_batcher = None
+        self.screen_painter = None
+        self.terminal_links = LinkIndex()  # hyperlink ranges of each pane, for lookups and Recent Links
+        self.directed_links = LinkIndex()
+
+
 class BBSTerminalApp:
     def __init__(self, master):
         # 1.0️⃣ 🎉 SETUP
@@ -41,9 +81,6 @@ class BBSTerminalApp:
         self.logon_automation_enabled = tk.BooleanVar(value=False)
         self.auto_login_enabled = tk.BooleanVar(value=False)
 
-        # A queue to pass incoming telnet data => main thread
-        self.msg_queue = queue.Queue()
-
         # Terminal font
         self.font_name = tk.StringVar(value="Courier New")
         self.font_size = tk.IntVar(value=10)
@@ -51,23 +88,38 @@ class BBSTerminalApp:
         # Terminal mode (ANSI or something else)
         self.terminal_mode = tk.StringVar(value="ANSI")
 
-        # Telnet references
-        self.reader = None
-        self.writer = None
-        self.stop_event = threading.Event()  # signals background thread to stop
-        self.connected = False
+        # Text encoding of the board: CP437, or latin1 / UTF-8 (set per favorite)
+        self.encoding = tk.StringVar(value=CP437)
 
-        # Buffer for partial lines
-        self.partial_line = ""
+        # Display mode: "Log" scrolls lines, "Screen" emulates the cols x rows screen
+        self.display_mode = tk.StringVar(value="Log")
 
         # Keep-Alive
-        self.keep_alive_stop_event = threading.Event()
-        self.keep_alive_task = None
         self.keep_alive_enabled = tk.BooleanVar(value=False)
 
-        # Our own event loop for asyncio
-        self.loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self.loop)
+        # Record raw inbound bytes per connection for replay (benchmarks/replay.py)
+        self.capture_enabled = tk.BooleanVar(value=False)
+
+        # Fetch link previews in the background as URLs arrive (rate, byte and concurrency limited)
+        self.prefetch_links = tk.BooleanVar(value=False)
+
+        # Reconnect after drops, then log in again and re-request the roster
+        self.auto_reconnect_enabled = tk.BooleanVar(value=False)
+        self.roster_command = tk.StringVar(value=DEFAULT_ROSTER_COMMAND)
+
+        # Hot-path stats: sampled once a second while the overlay is open or
+        # the JSONL log is on (one line per session per sample)
+        self.perf_log_enabled = tk.BooleanVar(value=False)
+        self.perf_log_path = "perf_stats.jsonl"
+        self.perf_interval_ms = 1000
+        self.perf_window = None
+        self.perf_label = None
+        self.perf_sample_id = None
+        self.perf_log_enabled.trace_add("write", self.update_performance_sampling)
+
+        # One long-lived asyncio loop thread runs every session's connection
+        self.manager = SessionManager()
+        self.manager.start()
 
         # Favorites
         self.favorites = self.load_favorites()
@@ -78,19 +130,54 @@ class BBSTerminalApp:
         self.triggers_window = None
         self.chatlog_window = None
 
-        self.last_message_info = None  # will hold (sender, recipient) of the last parsed message
+        self.cols = 136  # Set the number of columns
+        self.rows = 50   # Set the number of rows
+
+        # One notebook tab per session. A session does the protocol, parsing,
+        # triggers, chatlog and roster work off the Tk thread; Tk only applies
+        # the render ops it queues. self.session and the widget attributes
+        # (terminal_display, ...) always refer to the selected tab.
+        retention = self.load_chatlog_retention()
+        self.retention = retention
+        self.tabs = []
+        self.active_tab = None
+        self.session = None
+        self.session_counter = 0
+        self.max_ops_per_pass = 500
+
+        # Plain copies of the Tk variables the sessions read (they never touch Tk)
+        self.mirrored_variables = {}
+        self.mirror_variable(self.username, "username")
+        self.mirror_variable(self.password, "password")
+        self.mirror_variable(self.auto_login_enabled, "auto_login")
+        self.mirror_variable(self.logon_automation_enabled, "logon_automation")
+        self.mirror_variable(self.auto_reconnect_enabled, "auto_reconnect")
+        self.mirror_variable(self.roster_command, "roster_command")
+        self.mirror_variable(self.capture_enabled, "capture_enabled")
+        self.mirror_variable(self.prefetch_links, "prefetch_links")
+
+        # Chatlog retention settings (0 = no limit)
+        self.chatlog_max_mb = tk.IntVar(value=(retention.max_bytes or 0) // (1024 * 1024))
+        self.chatlog_max_age_days = tk.IntVar(value=(retention.max_age or 0) // 86400)
+        self.chatlog_max_per_user = tk.IntVar(value=retention.max_messages_per_user or 0)
 
         # Chat members
-        self.chat_members = self.load_chat_members_file()
-        self.last_seen = self.load_last_seen_file()
+        self.displayed_members = None  # what the members listbox currently shows
 
-        self.user_list_buffer = []
-        self.collecting_users = False
-
-        self.cols = 136  # Set the number of columns
-        self.rows = 50   # Set the number of rows
+        # Recent Links panel
+        self.max_recent_links = 50
+        self.recent_links = []  # URLs the links listbox currently shows
+        self.recent_links_id = None  # pending after_idle refresh
 
         self.preview_window = None  # Initialize the preview_window attribute
+        self.preview_cache = PreviewCache("preview_cache")  # hover thumbnails, in memory and on disk
+        self.preview_request = None  # (url, callback) of the preview being shown, to cancel on leave
+        self.link_prefetcher = LinkPrefetcher(self.preview_cache)  # warms the cache when enabled
+        self.link_prefetcher.start()
+
+        # Scrollback limits for the output panes (0 = unlimited)
+        self.scrollback_lines = tk.IntVar(value=5000)
+        self.scrollback_spill = tk.BooleanVar(value=False)
 
         # Variables to track visibility of sections
         self.show_connection_settings = tk.BooleanVar(value=True)
@@ -101,11 +188,22 @@ class BBSTerminalApp:
         # 1.2️⃣ 🎉 BUILD UI
         self.build_ui()
 
-        # Periodically check for incoming telnet data
-        self.master.after(100, self.process_incoming_messages)
+        # Apply the render ops the sessions' workers have queued, checked once per frame
+        self.master.after(FRAME_MS, self.process_incoming_messages)
+
+        # Each tab keeps its chatlog and roster under the board it connects to
+        self.new_session_tab()
 
-        # Start the periodic task to refresh chat members
-        self.master.after(5000, self.refresh_chat_members)
+    def mirror_variable(self, variable, name):
+        """Keep an attribute of every session in sync with a Tk variable for use off the Tk thread."""
+        self.mirrored_variables[name] = variable
+
+        def update(*args):
+            value = variable.get()
+            for tab in self.tabs:
+                setattr(tab.session, name, value)
+        variable.trace_add("write", update)
+        update()
 
     def build_ui(self):
         """Creates all the frames and widgets for the UI."""
@@ -113,13 +211,22 @@ class BBSTerminalApp:
         container = ttk.Frame(self.master)
         container.pack(fill=tk.BOTH, expand=True)
         
-        # Create the Chatroom Members panel on the RIGHT
-        members_frame = ttk.LabelFrame(container, text="Chatroom Members")
-        members_frame.pack(side=tk.RIGHT, fill=tk.Y, padx=5, pady=5)
+        # Create the Chatroom Members and Recent Links panels on the RIGHT
+        side_frame = ttk.Frame(container)
+        side_frame.pack(side=tk.RIGHT, fill=tk.Y)
+        members_frame = ttk.LabelFrame(side_frame, text="Chatroom Members")
+        members_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         self.members_listbox = tk.Listbox(members_frame, height=20, width=20)
         self.members_listbox.pack(fill=tk.BOTH, expand=True)
         self.create_members_context_menu()
 
+        # Newest links in the selected tab's panes; double-click opens one
+        links_frame = ttk.LabelFrame(side_frame, text="Recent Links")
+        links_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.links_listbox = tk.Listbox(links_frame, height=10, width=20)
+        self.links_listbox.pack(fill=tk.BOTH, expand=True)
+        self.links_listbox.bind("<Double-Button-1>", self.open_recent_link)
+
         # Create the main UI frame on the LEFT using grid layout
         main_frame = ttk.Frame(container, name='main_frame')
         main_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -178,6 +285,16 @@ class BBSTerminalApp:
         chatlog_button = ttk.Button(self.conn_frame, text="Chatlog", command=self.show_chatlog_window)
         chatlog_button.grid(row=0, column=9, padx=5, pady=5)
 
+        # Session tab buttons
+        new_tab_button = ttk.Button(self.conn_frame, text="New Tab", command=self.new_session_tab)
+        new_tab_button.grid(row=0, column=10, padx=5, pady=5)
+        close_tab_button = ttk.Button(self.conn_frame, text="Close Tab", command=self.close_session_tab)
+        close_tab_button.grid(row=0, column=11, padx=5, pady=5)
+
+        # Performance overlay
+        stats_button = ttk.Button(self.conn_frame, text="Stats", command=self.show_performance_overlay)
+        stats_button.grid(row=0, column=12, padx=5, pady=5)
+
         # Checkbox frame for visibility toggles
         checkbox_frame = ttk.Frame(top_frame)
         checkbox_frame.grid(row=2, column=0, columnspan=5, sticky="ew", padx=5, pady=5)
@@ -216,41 +333,16 @@ class BBSTerminalApp:
         self.send_password_button = ttk.Button(self.password_frame, text="Send", command=self.send_password)
         self.send_password_button.pack(side=tk.LEFT, padx=5, pady=5)
         
-        # --- Row 1: Paned container for BBS Output and Messages to You ---
+        # --- Row 1: Session tabs, each a paned BBS Output / Messages to You ---
         paned_container = ttk.Frame(main_frame)
         paned_container.grid(row=1, column=0, columnspan=2, sticky="nsew", padx=5, pady=5)
         paned_container.columnconfigure(0, weight=1)
         paned_container.rowconfigure(0, weight=1)
         
-        self.paned = tk.PanedWindow(paned_container, orient=tk.VERTICAL, sashwidth=10, sashrelief=tk.RAISED)
-        self.paned.pack(fill=tk.BOTH, expand=True)
-        
-        # Top pane: BBS Output
-        self.output_frame = ttk.LabelFrame(self.paned, text="BBS Output")
-        self.paned.add(self.output_frame)
-        self.paned.paneconfig(self.output_frame, minsize=200)  # Set minimum size for the top pane
-        self.terminal_display = tk.Text(self.output_frame, wrap=tk.WORD, state=tk.DISABLED, bg="black", font=("Courier New", 10))
-        self.terminal_display.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scroll_bar = ttk.Scrollbar(self.output_frame, command=self.terminal_display.yview)
-        scroll_bar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.terminal_display.configure(yscrollcommand=scroll_bar.set)
-        self.define_ansi_tags()
-        self.terminal_display.tag_configure("hyperlink", foreground="blue", underline=True)
-        self.terminal_display.tag_bind("hyperlink", "<Button-1>", self.open_hyperlink)
-        self.terminal_display.tag_bind("hyperlink", "<Enter>", self.show_thumbnail_preview)
-        self.terminal_display.tag_bind("hyperlink", "<Leave>", self.hide_thumbnail_preview)
-        
-        # Bottom pane: Messages to You
-        messages_frame = ttk.LabelFrame(self.paned, text="Messages to You")
-        self.paned.add(messages_frame)
-        self.paned.paneconfig(messages_frame, minsize=100)  # Set minimum size for the bottom pane
-        self.directed_msg_display = tk.Text(messages_frame, wrap=tk.WORD, state=tk.DISABLED, bg="lightyellow", font=("Courier New", 10, "bold"))
-        self.directed_msg_display.pack(fill=tk.BOTH, expand=True)
-        self.directed_msg_display.tag_configure("hyperlink", foreground="blue", underline=True)
-        self.directed_msg_display.tag_bind("hyperlink", "<Button-1>", self.open_directed_message_hyperlink)
-        self.directed_msg_display.tag_bind("hyperlink", "<Enter>", self.show_directed_message_thumbnail_preview)
-        self.directed_msg_display.tag_bind("hyperlink", "<Leave>", self.hide_thumbnail_preview)
-        
+        self.session_notebook = ttk.Notebook(paned_container)
+        self.session_notebook.pack(fill=tk.BOTH, expand=True)
+        self.session_notebook.bind("<<NotebookTabChanged>>", self.on_session_tab_changed)
+
         # --- Row 2: Input frame for sending messages ---
         input_frame = ttk.LabelFrame(main_frame, text="Send Message")
         input_frame.grid(row=2, column=0, columnspan=2, sticky="ew", padx=5, pady=5)
@@ -264,6 +356,138 @@ class BBSTerminalApp:
         
         self.update_display_font()
 
+    def new_session_tab(self):
+        """Create a session, give it a notebook tab and select it."""
+        self.session_counter += 1
+        name = f"session-{self.session_counter}"
+        session = self.manager.add(
+            name,
+            data_dir=None,  # chosen by use_board_data_dir on connect
+            retention=self.retention,
+            triggers=self.triggers,
+            cols=self.cols,
+            rows=self.rows,
+        )
+        for attribute, variable in self.mirrored_variables.items():
+            setattr(session, attribute, variable.get())
+        session.keep_alive_enabled = self.keep_alive_enabled.get()
+        session.link_prefetcher = self.link_prefetcher
+        session.stats.set_enabled(self.perf_sample_id is not None)
+        tab = SessionTab(name, session)
+        self.tabs.append(tab)
+        self.build_session_tab(tab)
+        self.session_notebook.add(tab.frame, text=f"Session {self.session_counter}")
+        self.session_notebook.select(tab.frame)
+        self.select_session_tab(tab)
+        return tab
+
+    def build_session_tab(self, tab):
+        """Create the paned BBS Output / Messages to You widgets for a tab."""
+        tab.frame = ttk.Frame(self.session_notebook)
+        tab.paned = tk.PanedWindow(tab.frame, orient=tk.VERTICAL, sashwidth=10, sashrelief=tk.RAISED)
+        tab.paned.pack(fill=tk.BOTH, expand=True)
+
+        # Top pane: BBS Output
+        tab.output_frame = ttk.LabelFrame(tab.paned, text="BBS Output")
+        tab.paned.add(tab.output_frame)
+        tab.paned.paneconfig(tab.output_frame, minsize=200)  # Set minimum size for the top pane
+        tab.terminal_display = tk.Text(tab.output_frame, wrap=tk.WORD, state=tk.DISABLED, bg="black", font=("Courier New", 10))
+        tab.terminal_display.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scroll_bar = ttk.Scrollbar(tab.output_frame, command=tab.terminal_display.yview)
+        scroll_bar.pack(side=tk.RIGHT, fill=tk.Y)
+        tab.terminal_display.configure(yscrollcommand=scroll_bar.set)
+        self.define_ansi_tags(tab.terminal_display)
+        tab.terminal_display.tag_configure("hyperlink", foreground="blue", underline=True)
+        tab.terminal_display.tag_bind("hyperlink", "<Button-1>", self.open_hyperlink)
+        tab.terminal_display.tag_bind("hyperlink", "<Enter>", self.show_thumbnail_preview)
+        tab.terminal_display.tag_bind("hyperlink", "<Leave>", self.hide_thumbnail_preview)
+
+        # Bottom pane: Messages to You
+        messages_frame = ttk.LabelFrame(tab.paned, text="Messages to You")
+        tab.paned.add(messages_frame)
+        tab.paned.paneconfig(messages_frame, minsize=100)  # Set minimum size for the bottom pane
+        tab.directed_msg_display = tk.Text(messages_frame, wrap=tk.WORD, state=tk.DISABLED, bg="lightyellow", font=("Courier New", 10, "bold"))
+        tab.directed_msg_display.pack(fill=tk.BOTH, expand=True)
+        tab.directed_msg_display.tag_configure("hyperlink", foreground="blue", underline=True)
+        tab.directed_msg_display.tag_bind("hyperlink", "<Button-1>", self.open_hyperlink)
+        tab.directed_msg_display.tag_bind("hyperlink", "<Enter>", self.show_thumbnail_preview)
+        tab.directed_msg_display.tag_bind("hyperlink", "<Leave>", self.hide_thumbnail_preview)
+
+        # Output from the session is coalesced and written once per frame,
+        # then each pane is trimmed back to its scrollback limit
+        tab.terminal_scrollback = Scrollback(tab.terminal_display, spill_path=os.path.join("scrollback", f"{tab.name}-terminal.log"))
+        tab.directed_scrollback = Scrollback(tab.directed_msg_display, spill_path=os.path.join("scrollback", f"{tab.name}-directed.log"))
+        stats = tab.session.stats
+        tab.terminal_batcher = RenderBatcher(tab.terminal_display, on_flush=tab.terminal_scrollback.trim,
+                                             stats=stats, links=tab.terminal_links)
+        tab.screen_painter = ScreenPainter(tab.terminal_display, self.rows,
+                                           on_flush=lambda: self.release_style_tags(tab), stats=stats)
+        tab.directed_batcher = RenderBatcher(tab.directed_msg_display, on_flush=tab.directed_scrollback.trim,
+                                             stats=stats, links=tab.directed_links)
+        # Keep the link indexes in step with trimming and paging, and the Recent Links panel with them
+        for scrollback, links in ((tab.terminal_scrollback, tab.terminal_links),
+                                  (tab.directed_scrollback, tab.directed_links)):
+            scrollback.on_trim.append(links.drop_top)
+            scrollback.on_load.append(links.insert_top)
+            links.on_change.append(lambda tab=tab: self.schedule_recent_links(tab))
+        # Trimmed lines and repainted rows leave style tags behind that no text uses
+        tab.terminal_scrollback.on_trim.append(lambda count: self.release_style_tags(tab))
+        self.create_scrollback_context_menu(tab.terminal_display, tab.terminal_scrollback)
+        self.create_scrollback_context_menu(tab.directed_msg_display, tab.directed_scrollback)
+
+        self.apply_display_mode(tab)
+        self.apply_scrollback_settings(tab)
+        self.update_display_font(tab)
+        self.update_paned_size(tab)
+
+    def select_session_tab(self, tab):
+        """Point self.session and the widget attributes at tab and refresh the shared controls."""
+        self.active_tab = tab
+        self.session = tab.session
+        self.terminal_display = tab.terminal_display
+        self.directed_msg_display = tab.directed_msg_display
+        self.terminal_scrollback = tab.terminal_scrollback
+        self.directed_scrollback = tab.directed_scrollback
+        self.terminal_batcher = tab.terminal_batcher
+        self.directed_batcher = tab.directed_batcher
+        self.screen_painter = tab.screen_painter
+        if tab.host:
+            self.host.set(tab.host)
+            self.port.set(tab.port)
+            self.encoding.set(tab.encoding)
+        active = tab.session.connected or self.manager.is_running(tab.name)
+        self.connect_button.config(text="Disconnect" if active else "Connect")
+        self.update_members_display(tab.members)
+        self.update_recent_links()
+
+    def on_session_tab_changed(self, event=None):
+        selected = self.session_notebook.select()
+        for tab in self.tabs:
+            if str(tab.frame) == selected:
+                if tab is not self.active_tab:
+                    self.select_session_tab(tab)
+                break
+
+    def close_session_tab(self):
+        """Disconnect and close the selected session. The last tab stays open."""
+        if len(self.tabs) <= 1:
+            return
+        tab = self.active_tab
+        self.tabs.remove(tab)
+        self.session_notebook.forget(tab.frame)
+        self.on_session_tab_changed()
+        # The session closes on the I/O loop; Tk keeps running and destroys the widgets after
+        self.finish_closing_tab(tab, self.manager.discard(tab.name))
+
+    def finish_closing_tab(self, tab, closed):
+        """Destroy a closed tab's widgets once its session has shut down."""
+        if not closed.done():
+            self.master.after(50, self.finish_closing_tab, tab, closed)
+            return
+        if closed.exception():
+            print(f"Error closing session: {closed.exception()}")
+        tab.frame.destroy()
+
     def toggle_all_sections(self):
         """Toggle visibility of all sections based on the master checkbox."""
         show = self.show_all.get()
@@ -298,8 +522,8 @@ class BBSTerminalApp:
             self.password_frame.grid_remove()
         self.update_paned_size()
 
-    def update_paned_size(self):
-        """Update the size of the paned window based on the visibility of sections."""
+    def update_paned_size(self, tab=None):
+        """Update the size of the paned windows based on the visibility of sections."""
         total_height = 200  # Base height for the BBS Output pane
         if not self.show_connection_settings.get():
             total_height += 50
@@ -307,7 +531,8 @@ class BBSTerminalApp:
             total_height += 50
         if not self.show_password.get():
             total_height += 50
-        self.paned.paneconfig(self.output_frame, minsize=total_height)
+        for tab in [tab] if tab else self.tabs:
+            tab.paned.paneconfig(tab.output_frame, minsize=total_height)
 
     def create_context_menu(self, widget):
         """Create a right-click context menu for the given widget."""
@@ -322,6 +547,22 @@ class BBSTerminalApp:
 
         widget.bind("<Button-3>", show_context_menu)
 
+    def create_scrollback_context_menu(self, widget, scrollback):
+        """Create a right-click menu for an output pane with copy and scrollback paging."""
+        menu = tk.Menu(widget, tearoff=0)
+        menu.add_command(label="Copy", command=lambda: widget.event_generate("<<Copy>>"))
+        menu.add_command(label="Load Older Lines", command=lambda: self.load_older_scrollback(widget, scrollback))
+
+        def show_context_menu(event):
+            menu.tk_popup(event.x_root, event.y_root)
+
+        widget.bind("<Button-3>", show_context_menu)
+
+    def load_older_scrollback(self, widget, scrollback):
+        """Page older lines back in from the spill file and show them."""
+        if scrollback.load_older():
+            widget.see("1.0")
+
     def create_members_context_menu(self):
         """Create a right-click context menu for the members listbox."""
         menu = tk.Menu(self.members_listbox, tearoff=0)
@@ -383,8 +624,8 @@ class BBSTerminalApp:
             self.password_frame.grid_remove()
         self.update_paned_size()
 
-    def update_paned_size(self):
-        """Update the size of the paned window based on the visibility of sections."""
+    def update_paned_size(self, tab=None):
+        """Update the size of the paned windows based on the visibility of sections."""
         total_height = 200  # Base height for the BBS Output pane
         if not self.show_connection_settings.get():
             total_height += 50
@@ -392,7 +633,8 @@ class BBSTerminalApp:
             total_height += 50
         if not self.show_password.get():
             total_height += 50
-        self.paned.paneconfig(self.output_frame, minsize=total_height)
+        for tab in [tab] if tab else self.tabs:
+            tab.paned.paneconfig(tab.output_frame, minsize=total_height)
 
     def create_context_menu(self, widget):
         """Create a right-click context menu for the given widget."""
@@ -427,6 +669,18 @@ class BBSTerminalApp:
         ttk.Entry(settings_win, textvariable=self.font_size, width=5).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
         row_index += 1
 
+        # Encoding
+        ttk.Label(settings_win, text="Encoding:").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
+        encoding_dropdown = ttk.Combobox(settings_win, textvariable=self.encoding, values=ENCODINGS, state="readonly")
+        encoding_dropdown.grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
+        row_index += 1
+
+        # Display Mode
+        ttk.Label(settings_win, text="Display Mode:").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
+        mode_dropdown = ttk.Combobox(settings_win, textvariable=self.display_mode, values=["Log", "Screen"], state="readonly")
+        mode_dropdown.grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
+        row_index += 1
+
         # Logon Automation
         ttk.Label(settings_win, text="Logon Automation:").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
         ttk.Checkbutton(settings_win, variable=self.logon_automation_enabled).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
@@ -437,6 +691,52 @@ class BBSTerminalApp:
         ttk.Checkbutton(settings_win, variable=self.auto_login_enabled).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
         row_index += 1
 
+        # Auto Reconnect
+        ttk.Label(settings_win, text="Auto Reconnect:").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Checkbutton(settings_win, variable=self.auto_reconnect_enabled).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
+        row_index += 1
+
+        ttk.Label(settings_win, text="Roster Command After Reconnect:").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Entry(settings_win, textvariable=self.roster_command, width=20).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
+        row_index += 1
+
+        # Session capture
+        ttk.Label(settings_win, text="Capture Raw Sessions:").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Checkbutton(settings_win, variable=self.capture_enabled).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
+        row_index += 1
+
+        # Link preview prefetching
+        ttk.Label(settings_win, text="Prefetch Link Previews:").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Checkbutton(settings_win, variable=self.prefetch_links).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
+        row_index += 1
+
+        # Performance log
+        ttk.Label(settings_win, text=f"Log Performance Stats ({self.perf_log_path}):").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Checkbutton(settings_win, variable=self.perf_log_enabled).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
+        row_index += 1
+
+        # Scrollback
+        ttk.Label(settings_win, text="Scrollback Lines:").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Entry(settings_win, textvariable=self.scrollback_lines, width=8).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
+        row_index += 1
+
+        ttk.Label(settings_win, text="Save Trimmed Scrollback to Disk:").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Checkbutton(settings_win, variable=self.scrollback_spill).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
+        row_index += 1
+
+        # Chatlog retention
+        ttk.Label(settings_win, text="Chatlog Max Size (MB):").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Entry(settings_win, textvariable=self.chatlog_max_mb, width=8).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
+        row_index += 1
+
+        ttk.Label(settings_win, text="Chatlog Max Age (days):").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Entry(settings_win, textvariable=self.chatlog_max_age_days, width=8).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
+        row_index += 1
+
+        ttk.Label(settings_win, text="Chatlog Max Messages/User:").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Entry(settings_win, textvariable=self.chatlog_max_per_user, width=8).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
+        row_index += 1
+
         # Save Button
         save_button = ttk.Button(settings_win, text="Save", command=lambda: self.save_settings(settings_win))
         save_button.grid(row=row_index, column=0, columnspan=2, pady=10)
@@ -444,18 +744,55 @@ class BBSTerminalApp:
     def save_settings(self, window):
         """Called when user clicks 'Save' in the settings window."""
         self.update_display_font()
+        self.apply_display_mode()
+        self.apply_scrollback_settings()
+        self.apply_chatlog_retention()
         window.destroy()
 
-    def update_display_font(self):
-        """Update the Text widget's font."""
+    def apply_scrollback_settings(self, tab=None):
+        """Apply the scrollback limit and spill option to the output panes of every tab."""
+        try:
+            max_lines = max(0, self.scrollback_lines.get())
+        except tk.TclError:
+            return
+        for tab in [tab] if tab else self.tabs:
+            for scrollback in (tab.terminal_scrollback, tab.directed_scrollback):
+                scrollback.max_lines = max_lines
+                scrollback.spill_enabled = self.scrollback_spill.get()
+            if tab.screen_mode_active:
+                # Trimming would shift the screen rows; the grid is bounded anyway.
+                tab.terminal_scrollback.max_lines = 0
+            tab.terminal_scrollback.trim()
+            tab.directed_scrollback.trim()
+
+    def apply_display_mode(self, tab=None):
+        """Switch the BBS Output panes between the scrolling log and the screen grid."""
+        screen_mode = self.display_mode.get() == "Screen"
+        for tab in [tab] if tab else self.tabs:
+            if screen_mode == tab.screen_mode_active:
+                continue
+            tab.screen_mode_active = screen_mode
+            tab.session.display_mode = "Screen" if screen_mode else "Log"
+            tab.terminal_batcher.flush()
+            if screen_mode:
+                tab.terminal_display.configure(wrap=tk.NONE)
+                tab.screen_painter.reset()
+                tab.terminal_links.clear()
+                tab.session.repaint_screen()
+            else:
+                tab.terminal_display.configure(wrap=tk.WORD)
+
+    def update_display_font(self, tab=None):
+        """Update the Text widgets' font."""
         new_font = (self.font_name.get(), self.font_size.get())
-        self.terminal_display.configure(font=new_font)
-        self.directed_msg_display.configure(font=new_font)
+        for tab in [tab] if tab else self.tabs:
+            tab.terminal_display.configure(font=new_font)
+            tab.directed_msg_display.configure(font=new_font)
 
     # 1.4️⃣ ANSI PARSING
-    def define_ansi_tags(self):
+    def define_ansi_tags(self, widget):
         """Define text tags for basic ANSI foreground colors (30-37, 90-97) and custom colors."""
-        self.terminal_display.tag_configure("normal", foreground="white")
+        widget.tag_configure("normal", foreground="white")
 
         color_map = {
             '30': 'black',
@@ -480,222 +817,124 @@ class BBSTerminalApp:
         for code, tag in color_map.items():
             if tag == 'blue':
                 # Use a lighter blue instead of the default dark blue
-                self.terminal_display.tag_configure(tag, foreground="#3399FF")
+                widget.tag_configure(tag, foreground="#3399FF")
             elif tag == 'grey':
                 # Set grey color to a visible shade
-                self.terminal_display.tag_configure(tag, foreground="#B0B0B0")
+                widget.tag_configure(tag, foreground="#B0B0B0")
             elif tag.startswith("bright_"):
                 base_color = tag.split("_", 1)[1]
-                self.terminal_display.tag_configure(tag, foreground=base_color)
+                widget.tag_configure(tag, foreground=base_color)
             else:
-                self.terminal_display.tag_configure(tag, foreground=tag)
+                widget.tag_configure(tag, foreground=tag)
 
     # 1.5️⃣ CONNECT / DISCONNECT
     def toggle_connection(self):
         """Connect or disconnect from the BBS."""
-        if self.connected:
-            self.send_custom_message('=x')
+        if self.session.connected:
+            self.session.log_off('=x')
+        elif self.manager.is_running(self.active_tab.name):
+            self.manager.disconnect(self.active_tab.name)  # stop waiting to reconnect
         else:
             self.start_connection()
 
     def start_connection(self):
-        """Start the telnetlib3 client in a background thread."""
-        host = self.host.get()
-        port = self.port.get()
-        self.stop_event.clear()
-
-        def run_telnet():
-            asyncio.set_event_loop(self.loop)
-            self.loop.run_until_complete(self.telnet_client_task(host, port))
-
-        thread = threading.Thread(target=run_telnet, daemon=True)
-        thread.start()
-        self.append_terminal_text(f"Connecting to {host}:{port}...\n", "normal")
-        self.start_keep_alive()
-
-    async def telnet_client_task(self, host, port):
-        """Async function connecting via telnetlib3 (CP437 + ANSI)."""
-        try:
-            reader, writer = await telnetlib3.open_connection(
-                host=host,
-                port=port,
-                term=self.terminal_mode.get().lower(),
-                encoding='cp437',  # Use 'latin1' if your BBS uses it
-                cols=self.cols,    # Use the configured number of columns
-                rows=self.rows     # Use the configured number of rows
-            )
-        except Exception as e:
-            self.msg_queue.put_nowait(f"Connection failed: {e}\n")
-            return
-
-        self.reader = reader
-        self.writer = writer
-        self.connected = True
-        self.connect_button.config(text="Disconnect")
-        self.msg_queue.put_nowait(f"Connected to {host}:{port}\n")
-
-        try:
-            while not self.stop_event.is_set():
-                data = await reader.read(4096)
-                if not data:
-                    break
-                self.msg_queue.put_nowait(data)
-        except asyncio.CancelledError:
-            pass
-        except Exception as e:
-            self.msg_queue.put_nowait(f"Error reading from server: {e}\n")
-        finally:
-            await self.disconnect_from_bbs()
-
-    async def disconnect_from_bbs(self):
-        """Stop the background thread and close connections."""
-        if not self.connected or getattr(self, '_disconnecting', False):
+        """Start the selected tab's telnet connection on the shared I/O loop."""
+        tab = self.active_tab
+        session = tab.session
+        session.host = self.host.get()
+        session.port = self.port.get()
+        session.term = self.terminal_mode.get().lower()
+        session.set_encoding(self.encoding.get())
+        session.keep_alive_enabled = self.keep_alive_enabled.get()
+        # Logon automation may send these without the Send buttons
+        if self.remember_username.get():
+            self.save_username()
+        if self.remember_password.get():
+            self.save_password()
+
+        tab.host, tab.port, tab.encoding = session.host, session.port, session.encoding
+        self.use_board_data_dir(tab)
+        self.session_notebook.tab(tab.frame, text=session.host)
+        self.manager.connect(tab.name)
+        self.append_terminal_text(f"Connecting to {session.host}:{session.port}...\n", "normal")
+
+    def use_board_data_dir(self, tab):
+        """Point the tab's session at the data directory of the board it connects to.
+
+        Tabs connected to the same board at once get a numbered directory each,
+        since a chatlog store has one writer. The first board connected to after
+        upgrading takes over the old single-session files, into its own
+        directory, never a numbered one.
+        """
+        base = board_data_dir(tab.host, tab.port)
+        in_use = {other.data_dir for other in self.tabs if other is not tab}
+        data_dir, n = base, 1
+        while data_dir in in_use:
+            n += 1
+            data_dir = f"{base}-{n}"
+        if data_dir == tab.data_dir:
             return
-
-        self._disconnecting = True
-        try:
-            self.stop_event.set()
-            self.stop_keep_alive()
-
-            if self.writer:
-                try:
-                    # Try to close the writer and allow it time to drain
-                    self.writer.close()
-                    await self.writer.drain()
-                except Exception as e:
-                    print(f"Error closing writer: {e}")
-
-            # Mark the connection as closed
-            self.connected = False
-            self.reader = None
-            self.writer = None
-
-            def update_connect_button():
-                if self.connect_button and self.connect_button.winfo_exists():
-                    self.connect_button.config(text="Connect")
-            if threading.current_thread() is threading.main_thread():
-                update_connect_button()
-            else:
-                self.master.after_idle(update_connect_button)
-
-            self.msg_queue.put_nowait("Disconnected from BBS.\n")
-        finally:
-            self._disconnecting = False
+        moved = adopt_legacy_data(data_dir) if data_dir == base else []
+        if moved:
+            print(f"[DEBUG] Moved {', '.join(moved)} into {data_dir}")
+        tab.data_dir = data_dir
+        tab.session.use_data_dir(data_dir)
 
     # 1.6️⃣ MESSAGES
     def process_incoming_messages(self):
-        """Check the queue for data and parse lines for display."""
+        """Apply the render operations the sessions' pipeline workers have prepared.
+
+        Applies at most max_ops_per_pass ops per session, then yields to Tk
+        and continues almost at once, so a burst never freezes the window.
+        Once every queue is empty it looks again a frame later. The workers
+        never call into Tk, so a busy Tk cannot stall them.
+        """
+        pending = False
         try:
-            while True:
-                data = self.msg_queue.get_nowait()
-                self.process_data_chunk(data)
-        except queue.Empty:
-            pass
+            for tab in list(self.tabs):
+                pipeline = tab.session.pipeline
+                try:
+                    for op in pipeline.drain(self.max_ops_per_pass):
+                        self.apply_render_op(tab, op)
+                finally:
+                    pending = pending or pipeline.has_pending()
         finally:
-            self.master.after(100, self.process_incoming_messages)
-
-    def process_data_chunk(self, data):
-        """Accumulate data, split on newlines, and process each complete line."""
-        # Normalize newlines
-        data = data.replace('\r\n', '\n').replace('\r', '\n')
-        self.partial_line += data
-        lines = self.partial_line.split("\n")
-        
-        # Precompile an ANSI escape code regex
-        ansi_regex = re.compile(r'\x1b\[[0-9;]*m')
-        
-        for line in lines[:-1]:
-            # Remove ANSI codes for filtering purposes only.
-            clean_line = ansi_regex.sub('', line).strip()
-            
-            # --- Filter header lines ---
-            if self.collecting_users:
-                self.user_list_buffer.append(line)
-                if "are here with you." in clean_line:
-                    self.update_chat_members(self.user_list_buffer)
-                    self.collecting_users = False
-                    self.user_list_buffer = []
-                # continue  # Skip displaying header lines
-            
-            if clean_line.startswith("You are in"):
-                self.user_list_buffer = [line]
-                self.collecting_users = True
-                # continue  # Skip displaying header line
-            
-            # Skip the line immediately following the header block if it starts with "Just press"
-            # if clean_line.startswith("Just press") and not self.collecting_users:
-            #     continue
-            
-            # --- Process directed messages ---
-            directed_msg_match = re.match(r'^From\s+(\S+)\s+\((to you|whispered)\):\s*(.+)$', clean_line, re.IGNORECASE)
-            if directed_msg_match:
-                sender, _, message = directed_msg_match.groups()
-                self.append_directed_message(f"From {sender}: {message}\n")
-                self.play_ding_sound()  # Play ding sound for directed messages
-                # Display directed messages in the main terminal as well
-                self.append_terminal_text(line + "\n", "normal")
-                continue
-            
-            # --- Process and display non-header lines ---
-            self.append_terminal_text(line + "\n", "normal")
-            self.check_triggers(line)
-            self.parse_and_save_chatlog_message(line)
-            if self.auto_login_enabled.get() or self.logon_automation_enabled.get():
-                self.detect_logon_prompt(line)
-            
-            # Play ding sound for any message
-            if re.match(r'^From\s+\S+', clean_line, re.IGNORECASE):
-                self.play_ding_sound()
-        
-        self.partial_line = lines[-1]
-
-    def detect_logon_prompt(self, line):
-        """Simple triggers to automate login if toggles are on."""
-        lower_line = line.lower()
-        # Typical BBS prompts
-        if "enter your password:" in lower_line:
-            self.master.after(500, self.send_password)
-        elif "type it in and press enter" in lower_line or 'otherwise type "new":' in lower_line:
-            self.master.after(500, self.send_username)
-
-    def parse_and_save_chatlog_message(self, line):
-        """Parse and save chat messages with timestamps in formats:
-           - Public: 'From <username>: <message>'
-           - DM:     'From <username> (to <recipient>): <message>'
-        """
-        # Remove any ANSI escape sequences that might interfere with matching.
-        clean_line = re.sub(r'\x1b\[[0-9;]*m', '', line)
-        
-        # Use a regex that optionally captures the direct message recipient.
-        match = re.match(
-            r'^\s*From\s+(\S+)(?:\s+\(to\s+([^)]+)\))?:\s*(.+)$',
-            clean_line,
-            re.IGNORECASE
-        )
-        
-        if match:
-            sender, recipient, message = match.groups()
-            # Replace "you" with your local username if applicable:
-            if recipient and recipient.lower() == "you":
-                recipient = self.username.get()
-            
-            # Log the message only under the sender.
-            timestamp = time.strftime("[%Y-%m-%d %H:%M:%S] ")
-            self.save_chatlog_message(sender, timestamp + message)
-            
-            # Save the last parsed DM info for later continuation lines.
-            self.last_message_info = (sender, None)  # No recipient logged
-
-    def append_to_last_chatlog_message(self, username, extra_text):
-        """Append extra_text to the last message logged for username."""
-        chatlog = self.load_chatlog()
-        if username in chatlog and chatlog[username]:
-            chatlog[username][-1] += "\n" + extra_text
-            self.save_chatlog(chatlog)
+            self.master.after(1 if pending else FRAME_MS, self.process_incoming_messages)
+
+    def apply_render_op(self, tab, op):
+        """Apply one render operation from a tab's session on the Tk thread."""
+        kind = op[0]
+        if kind == "terminal":
+            if tab.screen_mode_active:
+                return  # emitted just before the switch to Screen mode
+            self.configure_style_tags(op[1], tab)
+            self.insert_terminal_runs(op[1], tab)
+        elif kind == "screen":
+            if not tab.screen_mode_active:
+                return  # emitted just before the switch back to Log mode
+            for runs in op[1].values():
+                self.configure_style_tags(runs, tab)
+            tab.screen_painter.add(op[1])
+        elif kind == "directed":
+            self.insert_directed_runs(op[1], tab)
+        elif kind == "members":
+            tab.members = op[1]
+            if tab is self.active_tab:
+                self.update_members_display(op[1])
+        elif kind == "ding":
+            self.play_ding_sound()
+        elif kind == "status":
+            if tab is self.active_tab:
+                self.connect_button.config(text="Disconnect" if op[1] else "Connect")
+        elif kind == "reconnecting":
+            if tab is self.active_tab:
+                self.connect_button.config(text="Disconnect")  # stops the retries
+        elif kind == "send_error":
+            self.append_terminal_text(op[1] + "\n", "normal", tab)
 
     def send_message(self, event=None):
         """Send the user's typed message to the BBS."""
-        if not self.connected or not self.writer:
+        if not self.session.connected:
             self.append_terminal_text("Not connected to any BBS.\n", "normal")
             return
 
@@ -707,39 +946,22 @@ class BBSTerminalApp:
             message = "\r\n"
         else:
             message = prefix + user_input + "\r\n"
-        asyncio.run_coroutine_threadsafe(self._send_message(message), self.loop)
-
-    async def _send_message(self, message):
-        self.writer.write(message)
-        await self.writer.drain()
+        self.session.send(message)
 
     def send_username(self):
         """Send the username to the BBS."""
-        if self.connected and self.writer:
-            asyncio.run_coroutine_threadsafe(self._send_message(self.username.get() + "\r\n"), self.loop)
-            if self.remember_username.get():
-                self.save_username()
+        if self.session.send_username() and self.remember_username.get():
+            self.save_username()
 
     def send_password(self):
         """Send the password to the BBS."""
-        if self.connected and self.writer:
-            asyncio.run_coroutine_threadsafe(self._send_message(self.password.get() + "\r\n"), self.loop)
-            if self.remember_password.get():
-                self.save_password()
-
-    def check_triggers(self, message):
-        """Check incoming messages for triggers and send automated response if matched."""
-        # Loop through the triggers array
-        for trigger_obj in self.triggers:
-            # Perform a case-insensitive check if the trigger text exists in the message
-            if trigger_obj['trigger'] and trigger_obj['trigger'].lower() in message.lower():
-                # Send the associated response
-                self.send_custom_message(trigger_obj['response'])
+        if self.session.send_password() and self.remember_password.get():
+            self.save_password()
 
     def send_custom_message(self, message):
-        """Send a custom message (for trigger responses)."""
+        """Send a custom message."""
         print(f"Sending custom message: {message}")
-        asyncio.run_coroutine_threadsafe(self._send_message(message + "\r\n"), self.loop)
+        self.session.send_line(message)
 
     def send_action(self, action):
         """Send an action to the BBS, optionally appending the highlighted username."""
@@ -747,36 +969,13 @@ class BBSTerminalApp:
         if selected_indices:
             username = self.members_listbox.get(selected_indices[0])
             action = f"{action} {username}"
-        asyncio.run_coroutine_threadsafe(self._send_message(action + "\r\n"), self.loop)
+        self.session.send_line(action)
 
     # 1.7️⃣ KEEP-ALIVE
-    async def keep_alive(self):
-        """Send an <ENTER> keystroke every 10 seconds."""
-        while not self.keep_alive_stop_event.is_set():
-            if self.connected and self.writer:
-                self.writer.write("\r\n")
-                await self.writer.drain()
-            await asyncio.sleep(60)
-
-    def start_keep_alive(self):
-        """Start the keep-alive coroutine if enabled."""
-        if self.keep_alive_enabled.get():
-            self.keep_alive_stop_event.clear()
-            if self.loop:
-                self.keep_alive_task = self.loop.create_task(self.keep_alive())
-
-    def stop_keep_alive(self):
-        """Stop the keep-alive coroutine."""
-        self.keep_alive_stop_event.set()
-        if self.keep_alive_task:
-            self.keep_alive_task.cancel()
-
     def toggle_keep_alive(self):
-        """Toggle the keep-alive coroutine based on the checkbox state."""
-        if self.keep_alive_enabled.get():
-            self.start_keep_alive()
-        else:
-            self.stop_keep_alive()
+        """Toggle the keep-alive coroutine of every session based on the checkbox state."""
+        for tab in self.tabs:
+            tab.session.set_keep_alive(self.keep_alive_enabled.get())
 
     # 1.8️⃣ FAVORITES
     def show_favorites_window(self):
@@ -801,6 +1000,12 @@ class BBSTerminalApp:
         add_button = ttk.Button(self.favorites_window, text="Add", command=self.add_favorite)
         add_button.grid(row=row_index, column=1, padx=5, pady=5)
 
+        row_index += 1
+        ttk.Label(self.favorites_window, text="Encoding:").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
+        self.new_favorite_encoding = tk.StringVar(value=CP437)
+        ttk.Combobox(self.favorites_window, textvariable=self.new_favorite_encoding, values=ENCODINGS,
+                     state="readonly", width=8).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
+
         row_index += 1
         remove_button = ttk.Button(self.favorites_window, text="Remove", command=self.remove_favorite)
         remove_button.grid(row=row_index, column=0, columnspan=2, pady=5)
@@ -809,13 +1014,16 @@ class BBSTerminalApp:
 
     def update_favorites_listbox(self):
         self.favorites_listbox.delete(0, tk.END)
-        for address in self.favorites:
-            self.favorites_listbox.insert(tk.END, address)
+        for favorite in self.favorites:
+            label = favorite['address']
+            if favorite['encoding'] != CP437:
+                label += f"  ({favorite['encoding']})"
+            self.favorites_listbox.insert(tk.END, label)
 
     def add_favorite(self):
         new_address = self.new_favorite_var.get().strip()
-        if new_address and new_address not in self.favorites:
-            self.favorites.append(new_address)
+        if new_address and all(f['address'] != new_address for f in self.favorites):
+            self.favorites.append({'address': new_address, 'encoding': self.new_favorite_encoding.get()})
             self.update_favorites_listbox()
             self.new_favorite_var.set("")
             self.save_favorites()
@@ -823,21 +1031,23 @@ class BBSTerminalApp:
     def remove_favorite(self):
         selected_index = self.favorites_listbox.curselection()
         if selected_index:
-            address = self.favorites_listbox.get(selected_index)
-            self.favorites.remove(address)
+            del self.favorites[selected_index[0]]
             self.update_favorites_listbox()
             self.save_favorites()
 
     def populate_host_field(self, event):
         selected_index = self.favorites_listbox.curselection()
         if selected_index:
-            address = self.favorites_listbox.get(selected_index)
-            self.host.set(address)
+            favorite = self.favorites[selected_index[0]]
+            self.host.set(favorite['address'])
+            self.encoding.set(favorite['encoding'])
 
     def load_favorites(self):
+        """Load favorites as {'address', 'encoding'} dicts; older files list bare addresses."""
         if os.path.exists("favorites.json"):
             with open("favorites.json", "r") as file:
-                return json.load(file)
+                favorites = json.load(file)
+            return [f if isinstance(f, dict) else {'address': f, 'encoding': CP437} for f in favorites]
         return []
 
     def save_favorites(self):
@@ -886,146 +1096,209 @@ class BBSTerminalApp:
         self.triggers_window = tk.Toplevel(self.master)
         self.triggers_window.title("Automation Triggers")
 
-        row_index = 0
         triggers_frame = ttk.Frame(self.triggers_window)
         triggers_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        triggers_frame.columnconfigure(1, weight=1)
+        triggers_frame.rowconfigure(0, weight=1)
+
+        # List of all triggers; scrolls, so there is no fixed number of slots.
+        columns = ("trigger", "response", "regex", "sender", "cooldown")
+        list_frame = ttk.Frame(triggers_frame)
+        list_frame.grid(row=0, column=0, columnspan=4, sticky="nsew")
+        self.triggers_tree = ttk.Treeview(list_frame, columns=columns, show="headings", height=12)
+        for column, heading, width in (("trigger", "Trigger", 200), ("response", "Response", 200),
+                                       ("regex", "Regex", 50), ("sender", "Sender", 100),
+                                       ("cooldown", "Cooldown (s)", 80)):
+            self.triggers_tree.heading(column, text=heading)
+            self.triggers_tree.column(column, width=width, stretch=column in ("trigger", "response"))
+        tree_scroll = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.triggers_tree.yview)
+        self.triggers_tree.configure(yscrollcommand=tree_scroll.set)
+        self.triggers_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        for trigger_obj in self.triggers:
+            self.triggers_tree.insert("", tk.END, values=self.trigger_row(trigger_obj))
+        self.triggers_tree.bind("<<TreeviewSelect>>", self.on_trigger_selected)
+
+        # Editor for the selected / new trigger
+        self.trigger_text_var = tk.StringVar()
+        self.trigger_response_var = tk.StringVar()
+        self.trigger_regex_var = tk.BooleanVar(value=False)
+        self.trigger_sender_var = tk.StringVar()
+        self.trigger_cooldown_var = tk.StringVar(value="0")
+
+        ttk.Label(triggers_frame, text="Trigger:").grid(row=1, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Entry(triggers_frame, textvariable=self.trigger_text_var, width=30).grid(row=1, column=1, padx=5, pady=5, sticky=tk.EW)
+        ttk.Checkbutton(triggers_frame, text="Regex", variable=self.trigger_regex_var).grid(row=1, column=2, padx=5, pady=5, sticky=tk.W)
+        ttk.Label(triggers_frame, text="Response:").grid(row=2, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Entry(triggers_frame, textvariable=self.trigger_response_var, width=30).grid(row=2, column=1, padx=5, pady=5, sticky=tk.EW)
+        ttk.Label(triggers_frame, text="Only from sender:").grid(row=3, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Entry(triggers_frame, textvariable=self.trigger_sender_var, width=20).grid(row=3, column=1, padx=5, pady=5, sticky=tk.W)
+        ttk.Label(triggers_frame, text="Cooldown (s):").grid(row=4, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Entry(triggers_frame, textvariable=self.trigger_cooldown_var, width=8).grid(row=4, column=1, padx=5, pady=5, sticky=tk.W)
+
+        buttons_frame = ttk.Frame(triggers_frame)
+        buttons_frame.grid(row=5, column=0, columnspan=4, pady=10)
+        ttk.Button(buttons_frame, text="Add", command=self.add_trigger).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Update Selected", command=self.update_selected_trigger).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Remove Selected", command=self.remove_selected_triggers).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Save", command=self.save_triggers).pack(side=tk.LEFT, padx=5)
+
+    def trigger_row(self, trigger_obj):
+        """Treeview values for a trigger dict."""
+        return (
+            trigger_obj.get('trigger', ''),
+            trigger_obj.get('response', ''),
+            "yes" if trigger_obj.get('regex') else "",
+            trigger_obj.get('sender', ''),
+            trigger_obj.get('cooldown', 0) or "",
+        )
 
-        self.trigger_vars = []
-        self.response_vars = []
+    def trigger_from_editor(self):
+        """Build a trigger dict from the editor fields, or None if it is incomplete."""
+        text = self.trigger_text_var.get().strip()
+        response = self.trigger_response_var.get().strip()
+        if not text or not response:
+            return None
+        if self.trigger_regex_var.get():
+            try:
+                re.compile(text)
+            except re.error as e:
+                print(f"[DEBUG] Invalid trigger regex {text!r}: {e}")
+                return None
+        try:
+            cooldown = max(0.0, float(self.trigger_cooldown_var.get() or 0))
+        except ValueError:
+            cooldown = 0.0
+        return {
+            'trigger': text,
+            'response': response,
+            'regex': self.trigger_regex_var.get(),
+            'sender': self.trigger_sender_var.get().strip(),
+            'cooldown': cooldown,
+        }
 
-        for i in range(10):
-            ttk.Label(triggers_frame, text=f"Trigger {i+1}:").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
-            trigger_var = tk.StringVar(value=self.triggers[i]['trigger'] if i < len(self.triggers) else "")
-            response_var = tk.StringVar(value=self.triggers[i]['response'] if i < len(self.triggers) else "")
-            self.trigger_vars.append(trigger_var)
-            self.response_vars.append(response_var)
-            ttk.Entry(triggers_frame, textvariable=trigger_var, width=30).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
-            ttk.Entry(triggers_frame, textvariable=response_var, width=30).grid(row=row_index, column=2, padx=5, pady=5, sticky=tk.W)
-            row_index += 1
+    def tree_values(self, item):
+        # ttk hands numeric-looking values back as numbers; triggers are text.
+        return [str(value) for value in self.triggers_tree.item(item, "values")]
 
-        save_button = ttk.Button(triggers_frame, text="Save", command=self.save_triggers)
-        save_button.grid(row=row_index, column=0, columnspan=3, pady=10)
+    def on_trigger_selected(self, event=None):
+        selection = self.triggers_tree.selection()
+        if not selection:
+            return
+        trigger, response, regex, sender, cooldown = self.tree_values(selection[0])
+        self.trigger_text_var.set(trigger)
+        self.trigger_response_var.set(response)
+        self.trigger_regex_var.set(regex == "yes")
+        self.trigger_sender_var.set(sender)
+        self.trigger_cooldown_var.set(cooldown or "0")
+
+    def add_trigger(self):
+        trigger_obj = self.trigger_from_editor()
+        if trigger_obj:
+            self.triggers_tree.insert("", tk.END, values=self.trigger_row(trigger_obj))
+
+    def update_selected_trigger(self):
+        selection = self.triggers_tree.selection()
+        trigger_obj = self.trigger_from_editor()
+        if selection and trigger_obj:
+            self.triggers_tree.item(selection[0], values=self.trigger_row(trigger_obj))
+
+    def remove_selected_triggers(self):
+        for item in self.triggers_tree.selection():
+            self.triggers_tree.delete(item)
 
     def save_triggers(self):
         """Save triggers from the triggers window."""
         self.triggers = []
-        for trigger_var, response_var in zip(self.trigger_vars, self.response_vars):
+        for item in self.triggers_tree.get_children():
+            trigger, response, regex, sender, cooldown = self.tree_values(item)
+            try:
+                cooldown = float(cooldown or 0)
+            except ValueError:
+                cooldown = 0.0
             self.triggers.append({
-                'trigger': trigger_var.get().strip(),
-                'response': response_var.get().strip()
+                'trigger': trigger,
+                'response': response,
+                'regex': regex == "yes",
+                'sender': sender,
+                'cooldown': cooldown,
             })
         self.save_triggers_to_file()
+        for tab in self.tabs:
+            tab.session.set_triggers(self.triggers)
         self.triggers_window.destroy()
 
-    def append_terminal_text(self, text, default_tag="normal"):
-        """Append text to the terminal display with optional ANSI parsing."""
-        self.terminal_display.configure(state=tk.NORMAL)
-        self.parse_ansi_and_insert(text)
-        self.terminal_display.see(tk.END)
-        self.terminal_display.configure(state=tk.DISABLED)
-
-    def parse_ansi_and_insert(self, text_data):
-        """Minimal parser for ANSI color codes (foreground only)."""
-        ansi_escape_regex = re.compile(r'\x1b\[(.*?)m')
-        url_regex = re.compile(r'(https?://\S+)')
-        last_end = 0
-        current_tag = "normal"
-
-        for match in ansi_escape_regex.finditer(text_data):
-            start, end = match.span()
-            if start > last_end:
-                segment = text_data[last_end:start]
-                self.insert_with_hyperlinks(segment, current_tag)
-            code_string = match.group(1)
-            codes = code_string.split(';')
-            if '0' in codes:
-                current_tag = "normal"
-                codes.remove('0')
-
-            for c in codes:
-                mapped_tag = self.map_code_to_tag(c)
-                if mapped_tag:
-                    current_tag = mapped_tag
-            last_end = end
-
-        if last_end < len(text_data):
-            segment = text_data[last_end:]
-            self.insert_with_hyperlinks(segment, current_tag)
-
-    def insert_with_hyperlinks(self, text, tag):
-        """Insert text with hyperlinks detected and tagged."""
-        url_regex = re.compile(r'(https?://\S+)')
-        last_end = 0
-        for match in url_regex.finditer(text):
-            start, end = match.span()
-            if start > last_end:
-                self.terminal_display.insert(tk.END, text[last_end:start], tag)
-            self.terminal_display.insert(tk.END, text[start:end], ("hyperlink", tag))
-            last_end = end
-        if last_end < len(text):
-            self.terminal_display.insert(tk.END, text[last_end:], tag)
-
-    def insert_directed_message_with_hyperlinks(self, text, tag):
-        """Insert directed message text with hyperlinks detected and tagged."""
-        url_regex = re.compile(r'(https?://\S+)')
-        last_end = 0
-        for match in url_regex.finditer(text):
-            start, end = match.span()
-            if start > last_end:
-                self.directed_msg_display.insert(tk.END, text[last_end:start], tag)
-            self.directed_msg_display.insert(tk.END, text[start:end], ("hyperlink", tag))
-            last_end = end
-        if last_end < len(text):
-            self.directed_msg_display.insert(tk.END, text[last_end:], tag)
+    def append_terminal_text(self, text, default_tag="normal", tab=None):
+        """Append a local status message to a terminal display (default: selected tab)."""
+        tab = tab or self.active_tab
+        if tab.screen_mode_active:
+            tab.session.pipeline.try_feed(text)  # written into the screen grid by the worker
+            return
+        self.insert_terminal_runs(split_hyperlinks(text, default_tag), tab)
+
+    def insert_terminal_runs(self, runs, tab=None):
+        """Queue pre-parsed (text, tags) runs for a terminal display's next frame (default: selected tab)."""
+        (tab or self.active_tab).terminal_batcher.add(runs)
+
+    def configure_style_tags(self, runs, tab):
+        """Configure Tk tags for ANSI styles the tab's terminal display has not seen yet."""
+        for _, tags in runs:
+            tag = tags[-1] if isinstance(tags, tuple) else tags
+            if tag in tab.configured_style_tags:
+                continue
+            style = tag_style(tag)
+            if style is None:
+                continue
+            foreground, background, underline, overstrike = style_colors(style)
+            options = {"foreground": foreground, "underline": underline, "overstrike": overstrike}
+            if background:
+                options["background"] = background
+            tab.terminal_display.tag_configure(tag, **options)
+            tab.terminal_display.tag_lower(tag)  # keep hyperlink styling on top
+            tab.configured_style_tags.add(tag)
+
+    def release_style_tags(self, tab):
+        """Delete style tags no text on the tab's display uses, once it has configured too many."""
+        configured = tab.configured_style_tags
+        if len(configured) <= tab.style_tag_limit:
+            return
+        queued = [tags for tags, _ in tab.terminal_batcher.runs]
+        for runs in tab.screen_painter.pending.values():
+            queued.extend(tags for _, tags in runs)
+        keep = {"normal"} | {tags[-1] if isinstance(tags, tuple) else tags for tags in queued}
+        display = tab.terminal_display
+        unused = [tag for tag in configured if tag not in keep and not display.tag_nextrange(tag, "1.0")]
+        if unused:
+            display.tag_delete(*unused)
+            configured.difference_update(unused)
+        # Sweep again once the live set has doubled, so the cost stays amortized
+        tab.style_tag_limit = max(STYLE_TAG_LIMIT, 2 * len(configured))
+
+    def link_under_pointer(self, event):
+        """URL of the hyperlink under the mouse, looked up in its pane's link index."""
+        for tab in self.tabs:
+            for widget, links in ((tab.terminal_display, tab.terminal_links),
+                                  (tab.directed_msg_display, tab.directed_links)):
+                if widget is event.widget:
+                    line, column = widget.index(f"@{event.x},{event.y}").split(".")
+                    return links.lookup(int(line), int(column))
+        return None
 
     def open_hyperlink(self, event):
-        """Open the hyperlink in a web browser."""
-        index = self.terminal_display.index("@%s,%s" % (event.x, event.y))
-        start_index = self.terminal_display.search("https://", index, backwards=True, stopindex="1.0")
-        if not start_index:
-            start_index = self.terminal_display.search("http://", index, backwards=True, stopindex="1.0")
-        end_index = self.terminal_display.search(r"\s", start_index, stopindex="end", regexp=True)
-        if not end_index:
-            end_index = self.terminal_display.index("end")
-        url = self.terminal_display.get(start_index, end_index).strip()
-        webbrowser.open(url)
-
-    def open_directed_message_hyperlink(self, event):
-        """Open the hyperlink in a web browser from directed messages."""
-        index = self.directed_msg_display.index("@%s,%s" % (event.x, event.y))
-        start_index = self.directed_msg_display.search("https://", index, backwards=True, stopindex="1.0")
-        if not start_index:
-            start_index = self.directed_msg_display.search("http://", index, backwards=True, stopindex="1.0")
-        end_index = self.directed_msg_display.search(r"\s", start_index, stopindex="end", regexp=True)
-        if not end_index:
-            end_index = self.directed_msg_display.index("end")
-        url = self.directed_msg_display.get(start_index, end_index).strip()
-        webbrowser.open(url)
+        """Open the hyperlink under the mouse in a web browser."""
+        url = self.link_under_pointer(event)
+        if url:
+            webbrowser.open(url)
 
     def show_thumbnail_preview(self, event):
-        """Show a thumbnail preview of the hyperlink."""
-        index = self.terminal_display.index("@%s,%s" % (event.x, event.y))
-        start_index = self.terminal_display.search("https://", index, backwards=True, stopindex="1.0")
-        end_index = self.terminal_display.search(r"\s", index, stopindex="end", regexp=True)
-        if not end_index:
-            end_index = self.terminal_display.index("end")
-        url = self.terminal_display.get(start_index, end_index).strip()
-        self.show_thumbnail(url, event)
-
-    def show_directed_message_thumbnail_preview(self, event):
-        """Show a thumbnail preview of the hyperlink from directed messages."""
-        index = self.directed_msg_display.index("@%s,%s" % (event.x, event.y))
-        start_index = self.directed_msg_display.search("https://", index, backwards=True, stopindex="1.0")
-        end_index = self.directed_msg_display.search(r"\s", index, stopindex="end", regexp=True)
-        if not end_index:
-            end_index = self.directed_msg_display.index("end")
-        url = self.directed_msg_display.get(start_index, end_index).strip()
-        self.show_thumbnail(url, event)
+        """Show a thumbnail preview of the hyperlink under the mouse."""
+        url = self.link_under_pointer(event)
+        if url:
+            self.show_thumbnail(url, event)
 
     def show_thumbnail(self, url, event):
         """Display a thumbnail preview near the mouse pointer."""
-        if self.preview_window is not None:
-            self.preview_window.destroy()
+        self.hide_thumbnail_preview(event)
 
         self.preview_window = tk.Toplevel(self.master)
         self.preview_window.overrideredirect(True)
@@ -1039,171 +1312,76 @@ class BBSTerminalApp:
         label = tk.Label(self.preview_window, text="Loading preview...", background="white")
         label.pack()
 
-        # Fetch and display the thumbnail in a separate thread
-        threading.Thread(target=self._fetch_and_display_thumbnail, args=(url, label), daemon=True).start()
+        # Thumbnails come from the preview cache; misses are fetched by its worker pool
+        def deliver(thumbnail):
+            self.master.after(0, self.display_thumbnail, thumbnail, label)
+        self.preview_request = (url, deliver)
+        self.preview_cache.get(url, deliver)
+
+    def display_thumbnail(self, thumbnail, label):
+        """Show a cached thumbnail (or that there is none) in the preview window's label."""
+        if not (self.preview_window and label.winfo_exists()):
+            return  # the pointer has left the link
+        if thumbnail is None:
+            label.config(text="Preview not available")
+            return
+        self.show_thumbnail_frame(thumbnail, label, 0)
 
-    def _fetch_and_display_thumbnail(self, url, label):
-        """Fetch and display the thumbnail. Handle GIFs and static images."""
-        try:
-            response = requests.get(url, timeout=5)
-            response.raise_for_status()
-            content_type = response.headers.get("Content-Type", "")
-
-            # Check if the URL is a GIF or another image type
-            if "image" in content_type:
-                image_data = BytesIO(response.content)
-
-                # Process GIF
-                if "gif" in content_type or url.endswith(".gif"):
-                    gif = Image.open(image_data)
-                    frames = []
-                    try:
-                        while True:
-                            frame = gif.copy()
-                            frame.thumbnail((200, 150))  # Resize
-                            frames.append(ImageTk.PhotoImage(frame))
-                            gif.seek(len(frames))  # Move to next frame
-                    except EOFError:
-                        pass  # End of GIF frames
-
-                    if frames:
-                        self._display_animated_gif(frames, label)
-                    return
-
-                # Process static images
-                image = Image.open(image_data)
-                image.thumbnail((200, 150))
-                photo = ImageTk.PhotoImage(image)
-
-                def update_label():
-                    if self.preview_window and label.winfo_exists():
-                        label.config(image=photo, text="")
-                        label.image = photo  # Keep reference to avoid garbage collection
-                self.master.after(0, update_label)
-
-        except Exception as e:
-            print(f"DEBUG: Exception in _fetch_and_display_thumbnail: {e}")
-            def update_label_error():
-                if self.preview_window and label.winfo_exists():
-                    label.config(text="Preview not available")
-            self.master.after(0, update_label_error)
-
-    def _display_animated_gif(self, frames, label):
-        """Display animated GIF in the label."""
-        def animate(index):
-            if self.preview_window and label.winfo_exists():
-                label.config(image=frames[index])
-                index = (index + 1) % len(frames)
-                label.image = frames[index]  # Keep reference
-                label.after(100, animate, index)  # Adjust speed as needed
-
-        self.master.after(0, animate, 0)
+    def show_thumbnail_frame(self, thumbnail, label, index):
+        """Show frame index of a thumbnail, then schedule the next one for as long as the frame lasts.
+
+        Animation frames are decoded here, one per tick, as they come due.
+        """
+        if not (self.preview_window and label.winfo_exists()):
+            return  # the preview was closed; stop animating
+        frame, duration = thumbnail.frame(index)
+        photo = ImageTk.PhotoImage(frame)
+        label.config(image=photo, text="")
+        label.image = photo  # Keep reference to avoid garbage collection
+        if thumbnail.animated:
+            label.after(duration, self.show_thumbnail_frame, thumbnail, label, index + 1)
 
     def hide_thumbnail_preview(self, event):
-        """Hide the thumbnail preview."""
+        """Hide the thumbnail preview and cancel its fetch if nothing else is waiting for it."""
+        if self.preview_request:
+            self.preview_cache.cancel(*self.preview_request)
+            self.preview_request = None
         if self.preview_window:
             self.preview_window.destroy()
             self.preview_window = None
 
-    def get_thumbnail(self, url):
-        """Attempt to load a thumbnail image from an image URL.
-           Returns a PhotoImage if successful, otherwise None.
-        """
-        if any(url.lower().endswith(ext) for ext in [".jpg", ".jpeg", ".png", ".gif"]):
-            try:
-                response = requests.get(url, timeout=5)
-                image_data = response.content
-                image = Image.open(BytesIO(image_data))
-                image.thumbnail((200, 200))  # Set thumbnail size as needed.
-                return ImageTk.PhotoImage(image)
-            except Exception as e:
-                print("Error loading thumbnail:", e)
-        return None
-
-    def show_preview(self, event, url):
-        """Display a live preview thumbnail in a small Toplevel near the mouse pointer."""
-        photo = self.get_thumbnail(url)
-        if photo:
-            self.preview_window = tk.Toplevel(self.master)
-            self.preview_window.overrideredirect(True)
-            self.preview_window.attributes("-topmost", True)
-            label = tk.Label(self.preview_window, image=photo, bd=1, relief="solid")
-            label.image = photo  # keep a reference to avoid garbage collection
-            label.pack()
-            x = event.x_root + 10
-            y = event.y_root + 10
-            self.preview_window.geometry(f"+{x}+{y}")
-
-    def hide_preview(self, event):
-        """Hide the preview window if it exists."""
-        if hasattr(self, 'preview_window') and self.preview_window:
-            self.preview_window.destroy()
-            self.preview_window = None
+    def load_chatlog_retention(self):
+        """Load the chatlog retention policy from a local file or use the 1GB default."""
+        if os.path.exists("chatlog_retention.json"):
+            with open("chatlog_retention.json", "r") as file:
+                try:
+                    return RetentionPolicy.from_dict(json.load(file))
+                except Exception as e:
+                    print(f"[DEBUG] Error loading chatlog retention file: {e}")
+        return RetentionPolicy()
 
-    def map_code_to_tag(self, color_code):
-        """Map numeric color code to a defined Tk tag."""
-        valid_codes = {
-            '30': 'black',
-            '31': 'red',
-            '32': 'green',
-            '33': 'yellow',
-            '34': 'blue',
-            '35': 'magenta',
-            '36': 'cyan',
-            '37': 'white',
-            '90': 'bright_black',
-            '91': 'bright_red',
-            '92': 'bright_green',
-            '93': 'bright_yellow',
-            '94': 'bright_blue',
-            '95': 'bright_magenta',
-            '96': 'bright_cyan',
-            '97': 'bright_white',
-        }
-        return valid_codes.get(color_code, None)
-
-    def save_chatlog_message(self, username, message):
-        """Save a message to the chatlog."""
-        chatlog = self.load_chatlog()
-        if username not in chatlog:
-            chatlog[username] = []
-        chatlog[username].append(message)
-
-        # Check if chatlog exceeds 1GB and trim if necessary
-        chatlog_size = len(json.dumps(chatlog).encode('utf-8'))
-        if chatlog_size > 1 * 1024 * 1024 * 1024:  # 1GB
-            self.trim_chatlog(chatlog)
-
-        self.save_chatlog(chatlog)
-
-    def load_chatlog(self):
-        """Load chatlog from a local file or initialize an empty dictionary."""
-        if os.path.exists("chatlog.json"):
-            with open("chatlog.json", "r") as file:
-                return json.load(file)
-        return {}
-
-    def save_chatlog(self, chatlog):
-        """Save chatlog to a local file."""
-        with open("chatlog.json", "w") as file:
-            json.dump(chatlog, file)
-
-    def trim_chatlog(self, chatlog):
-        """Trim the chatlog to fit within the size limit."""
-        usernames = list(chatlog.keys())
-        while len(json.dumps(chatlog).encode('utf-8')) > 1 * 1024 * 1024 * 1024:  # 1GB
-            for username in usernames:
-                if chatlog[username]:
-                    chatlog[username].pop(0)  # Remove the oldest message
-                    if len(json.dumps(chatlog).encode('utf-8')) <= 1 * 1024 * 1024 * 1024:
-                        break
+    def apply_chatlog_retention(self):
+        """Build a policy from the settings fields, apply it and save it."""
+        try:
+            max_mb = self.chatlog_max_mb.get()
+            max_age_days = self.chatlog_max_age_days.get()
+            max_per_user = self.chatlog_max_per_user.get()
+        except tk.TclError:
+            return
+        policy = RetentionPolicy(
+            max_bytes=max_mb * 1024 * 1024 if max_mb > 0 else None,
+            max_age=max_age_days * 86400 if max_age_days > 0 else None,
+            max_messages_per_user=max_per_user if max_per_user > 0 else None,
+        )
+        self.retention = policy
+        for tab in self.tabs:
+            tab.session.set_retention(policy)
+        with open("chatlog_retention.json", "w") as file:
+            json.dump(policy.to_dict(), file)
 
     def clear_chatlog_for_user(self, username):
         """Clear all chatlog messages for the specified username."""
-        chatlog = self.load_chatlog()
-        if username in chatlog:
-            chatlog[username] = []  # Reset the messages list
-            self.save_chatlog(chatlog)
+        self.session.clear_chatlog(username)
 
     def clear_active_chatlog(self):
         """Clear chatlog messages for the currently selected user in the listbox."""
@@ -1248,10 +1426,9 @@ class BBSTerminalApp:
         close_button.grid(row=row_index+1, column=0, columnspan=3, pady=10)
 
     def load_chatlog_list(self):
-        """Load chatlog from a local file and populate the listbox."""
-        chatlog = self.load_chatlog()
+        """Load the chatlog users and populate the listbox."""
         self.chatlog_listbox.delete(0, tk.END)
-        for username in chatlog.keys():
+        for username in self.session.chatlog_users():
             self.chatlog_listbox.insert(tk.END, username)
 
     def display_chatlog_messages(self, event):
@@ -1259,140 +1436,136 @@ class BBSTerminalApp:
         selected_index = self.chatlog_listbox.curselection()
         if selected_index:
             username = self.chatlog_listbox.get(selected_index)
-            chatlog = self.load_chatlog()
-            messages = chatlog.get(username, [])
+            messages = self.session.chatlog_messages(username)
             self.chatlog_display.configure(state=tk.NORMAL)
             self.chatlog_display.delete(1.0, tk.END)
             for message in messages:
                 self.chatlog_display.insert(tk.END, message + "\n")
             self.chatlog_display.configure(state=tk.DISABLED)
 
-    def update_members_display(self):
-        """Update the chat members Listbox with the current chat_members set."""
+    def update_members_display(self, members):
+        """Update the chat members Listbox with the sorted member list, if it changed."""
+        if members == self.displayed_members:
+            return
+        self.displayed_members = members
         self.members_listbox.delete(0, tk.END)
-        for member in sorted(self.chat_members):
-            self.members_listbox.insert(tk.END, member)
-
-    def update_chat_members(self, lines_with_users):
-        """Update the chat members based on the provided lines."""
-        combined = " ".join(lines_with_users)
-        combined_clean = re.sub(r'\x1b\[[0-9;]*m', '', combined)
-        print(f"[DEBUG] Combined user lines: {combined_clean}")
-
-        # Extract the relevant section of the banner
-        match = re.search(r'Topic:\s*General Chat\s*(.*?)\s*are here with you\.', combined_clean, re.DOTALL | re.IGNORECASE)
-        if match:
-            user_section = match.group(1)
-        else:
-            user_section = combined_clean
-
-        # Normalize the list by replacing "and" with a comma
-        user_section = user_section.replace("and", ",")
-        print(f"[DEBUG] User section: {user_section}")
-
-        # Refined regex pattern for valid usernames and email addresses
-        username_pattern = re.compile(r'\b[A-Za-z0-9._%+-]+(?:@[A-Za-z0-9.-]+\.[A-Za-z]{2,})?\b')
-
-        # Find all tokens that look like valid usernames
-        extracted_users = username_pattern.findall(user_section)
-
-        final_usernames = []
-        for user in extracted_users:
-            # If it's an email, only keep the local part
-            if "@" in user:
-                user = user.split("@")[0]
-            final_usernames.append(user.strip())
-
-        # Remove any unwanted common words
-        common_words = {"and", "are", "here", "with", "you", "topic", "general", "channel", "majorlink"}
-        final_usernames = {user for user in final_usernames if user.lower() not in common_words}
-
-        print(f"[DEBUG] Extracted usernames: {final_usernames}")
-        self.chat_members = final_usernames
-
-        # Optionally update last seen timestamps
-        current_time = int(time.time())
-        for member in self.chat_members:
-            self.last_seen[member.lower()] = current_time
-        self.save_last_seen_file()
-
-        # Save the chat members to file
-        self.save_chat_members_file()
-
-        # Refresh the members display panel
-        self.update_members_display()
-
-    def load_chat_members_file(self):
-        """Load chat members from chat_members.json, or return an empty set if not found."""
-        if os.path.exists("chat_members.json"):
-            with open("chat_members.json", "r") as file:
-                try:
-                    return set(json.load(file))
-                except Exception as e:
-                    print(f"[DEBUG] Error loading chat members file: {e}")
-                    return set()
-        return set()
+        self.members_listbox.insert(tk.END, *members)
+
+    def schedule_recent_links(self, tab):
+        """Refresh the Recent Links panel once Tk is idle, if it shows tab."""
+        if tab is self.active_tab and self.recent_links_id is None:
+            self.recent_links_id = self.master.after_idle(self.update_recent_links)
+
+    def update_recent_links(self):
+        """Show the newest links of the selected tab's panes, newest first, if they changed."""
+        if self.recent_links_id is not None:
+            self.master.after_cancel(self.recent_links_id)
+            self.recent_links_id = None
+        tab = self.active_tab
+        count = self.max_recent_links
+        urls = []
+        for _, url in sorted(tab.terminal_links.recent(count) + tab.directed_links.recent(count), reverse=True):
+            if url not in urls:  # a directed message shows in both panes
+                urls.append(url)
+        urls = urls[:count]
+        if urls == self.recent_links:
+            return
+        self.recent_links = urls
+        self.links_listbox.delete(0, tk.END)
+        self.links_listbox.insert(tk.END, *urls)
 
-    def save_chat_members_file(self):
-        """Save the current chat members set to chat_members.json."""
-        try:
-            with open("chat_members.json", "w") as file:
-                json.dump(list(self.chat_members), file)
-        except Exception as e:
-            print(f"[DEBUG] Error saving chat members file: {e}")
-
-    def load_last_seen_file(self):
-        """Load last seen timestamps from last_seen.json, or return an empty dictionary if not found."""
-        if os.path.exists("last_seen.json"):
-            with open("last_seen.json", "r") as file:
-                try:
-                    return json.load(file)
-                except Exception as e:
-                    print(f"[DEBUG] Error loading last seen file: {e}")
-                    return {}
-        return {}
+    def open_recent_link(self, event=None):
+        """Open the link selected in the Recent Links panel in a web browser."""
+        selection = self.links_listbox.curselection()
+        if selection:
+            webbrowser.open(self.recent_links[selection[0]])
 
-    def save_last_seen_file(self):
-        """Save the current last seen timestamps to last_seen.json."""
-        try:
-            with open("last_seen.json", "w") as file:
-                json.dump(self.last_seen, file)
-        except Exception as e:
-            print(f"[DEBUG] Error saving last seen file: {e}")
-
-    def refresh_chat_members(self):
-        """Periodically refresh the chat members list."""
-        self.update_members_display()
-        self.master.after(5000, self.refresh_chat_members)
-
-    def append_directed_message(self, text):
-        """Append text to the directed messages display with a timestamp."""
-        timestamp = time.strftime("[%Y-%m-%d %H:%M:%S] ")
-        self.directed_msg_display.configure(state=tk.NORMAL)
-        self.insert_directed_message_with_hyperlinks(timestamp + text + "\n", "normal")
-        self.directed_msg_display.see(tk.END)
-        self.directed_msg_display.configure(state=tk.DISABLED)
+    def insert_directed_runs(self, runs, tab=None):
+        """Queue pre-parsed (text, tags) runs for a directed messages display's next frame (default: selected tab)."""
+        (tab or self.active_tab).directed_batcher.add(runs)
 
     def play_ding_sound(self):
         """Play a standard ding sound effect."""
-        winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
+        if winsound:
+            winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
+        else:
+            self.master.bell()
+
+    # 1.🔟 PERFORMANCE OVERLAY
+    def show_performance_overlay(self):
+        """Open a small always-on-top window with the selected tab's rates, queues and stage latencies."""
+        if self.perf_window and self.perf_window.winfo_exists():
+            self.perf_window.lift()
+            return
+        self.perf_window = tk.Toplevel(self.master)
+        self.perf_window.title("Performance")
+        self.perf_window.attributes("-topmost", True)
+        self.perf_window.protocol("WM_DELETE_WINDOW", self.close_performance_overlay)
+        self.perf_label = tk.Label(self.perf_window, text="Collecting...", justify=tk.LEFT, anchor=tk.NW, font=("Courier New", 9))
+        self.perf_label.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.update_performance_sampling()
+
+    def close_performance_overlay(self):
+        self.perf_window.destroy()
+        self.perf_window = None
+        self.perf_label = None
+        self.update_performance_sampling()
+
+    def update_performance_sampling(self, *args):
+        """Collect stats while the overlay is open or the log is on; otherwise switch them off."""
+        enabled = self.perf_window is not None or self.perf_log_enabled.get()
+        for tab in self.tabs:
+            tab.session.stats.set_enabled(enabled)
+        if enabled and self.perf_sample_id is None:
+            self.perf_sample_id = self.master.after(self.perf_interval_ms, self.sample_performance)
+        elif not enabled and self.perf_sample_id is not None:
+            self.master.after_cancel(self.perf_sample_id)
+            self.perf_sample_id = None
+
+    def sample_performance(self):
+        """Snapshot every session's stats, append them to the log and refresh the overlay."""
+        self.perf_sample_id = self.master.after(self.perf_interval_ms, self.sample_performance)
+        now = round(time.time(), 3)
+        records = {}
+        for tab in self.tabs:
+            records[tab.name] = {"time": now, "session": tab.name, "host": tab.session.host,
+                                 **tab.session.performance_snapshot()}
+        if self.perf_log_enabled.get():
+            with open(self.perf_log_path, "a") as file:
+                for record in records.values():
+                    file.write(json.dumps(record) + "\n")
+        if self.perf_label is not None:
+            self.perf_label.config(text=self.format_performance(records[self.active_tab.name]))
+
+    def format_performance(self, record):
+        """Overlay text for one session's performance record."""
+        queue = record["queue"]
+        lines = [
+            f"{record['host'] or record['session']}",
+            f"in      {record['bytes_per_s'] / 1024:8.1f} KB/s {record['lines_per_s']:8.0f} lines/s "
+            f"{record['reads_per_s']:6.0f} reads/s",
+            f"queue   {queue['depth_bytes'] / 1024:8.1f} KB in {queue['depth']} chunks "
+            f"(peak {queue['peak_bytes'] / 1024:.0f} KB), {queue['render_ops']} render ops",
+            f"stalls  reader {queue['stalls']} ({queue['stall_time']:.2f} s), "
+            f"worker {queue['ui_stalls']} ({queue['ui_stall_time']:.2f} s)",
+            "",
+            f"{'stage':<10}{'count':>7}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}",
+        ]
+        for stage in STAGES:
+            timing = record["stages"].get(stage)
+            if timing:
+                lines.append(f"{stage:<10}{timing['count']:>7}{timing['p50_ms']:>9.3f}"
+                             f"{timing['p99_ms']:>9.3f}{timing['max_ms']:>9.3f}")
+        return "\n".join(lines)
 
 def main():
     root = tk.Tk()
     app = BBSTerminalApp(root)
     root.mainloop()
-    # Cleanup
-    if app.connected:
-        try:
-            asyncio.run_coroutine_threadsafe(app.disconnect_from_bbs(), app.loop).result()
-        except Exception as e:
-            print(f"Error during disconnect: {e}")
-    try:
-        loop = asyncio.get_event_loop()
-        if not loop.is_running():
-            loop.close()
-    except Exception as e:
-        print(f"Error closing loop: {e}")
+    # Cleanup: disconnect and close every session, then stop the I/O loop thread
+    app.manager.stop()
+    app.link_prefetcher.stop()
+    app.preview_cache.close()
 
 
 if __name__ == "__main__":
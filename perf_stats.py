@@ -0,0 +1,105 @@
+import collections
+import time
+
+###############################################################################
+#                  Perf Stats (hot-path timers and counters)
+###############################################################################
+#
+# Each session owns one PerfStats. The hot paths bracket their work with
+#
+#   start = stats.clock()        # None while disabled
+#   ...
+#   stats.record("stage", start) # no-op when start is None
+#
+# so a disabled instance costs an attribute check per stage. Every stage
+# and counter has a single writer thread: the telnet reader ("read", bytes,
+# reads), the pipeline worker (process, ansi, screen, triggers, chatlog,
+# lines) or Tk (tk_insert). Samples go into bounded deques, so memory stays
+# flat if nobody collects them.
+#
+# snapshot() is called by whoever reports (the Tk performance overlay once a
+# second, a benchmark at the end). It returns the rates and per-stage
+# p50/p99/max since the previous snapshot and starts a new window.
+#
+#   read       handing one socket read to the pipeline (capture + backpressure)
+#   process    process_data_chunk, per chunk
+#   ansi       ANSI parsing of one line for the scrolling log
+#   screen     applying a chunk to the screen grid
+#   triggers   matching one line against the triggers
+#   chatlog    persisting one chat message
+#   tk_insert  one batched Text insert (terminal, messages or screen rows)
+
+STAGES = ("read", "process", "ansi", "screen", "triggers", "chatlog", "tk_insert")
+COUNTERS = ("bytes", "reads", "lines")
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class PerfStats:
+    def __init__(self, max_samples=8192):
+        self.enabled = False
+        self.max_samples = max_samples
+        self.samples = {stage: collections.deque(maxlen=max_samples) for stage in STAGES}
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self.window_counts = dict(self.counts)
+        self.window_start = time.monotonic()
+
+    def set_enabled(self, enabled):
+        """Turn collection on or off. Turning it on starts a fresh window."""
+        if enabled and not self.enabled:
+            for samples in self.samples.values():
+                samples.clear()
+            self.window_counts = dict(self.counts)
+            self.window_start = time.monotonic()
+        self.enabled = enabled
+
+    # 1️⃣ HOT PATH
+    def clock(self):
+        """Start time for record(), or None while disabled."""
+        return time.perf_counter() if self.enabled else None
+
+    def record(self, stage, start):
+        """Record the time since start (from clock()) under stage."""
+        if start is not None:
+            self.samples[stage].append(time.perf_counter() - start)
+
+    def add(self, counter, amount=1):
+        if self.enabled:
+            self.counts[counter] += amount
+
+    # 2️⃣ REPORTING
+    def snapshot(self):
+        """Rates and stage latencies since the previous snapshot; starts a new window.
+
+        Returns {"interval": s, "bytes_per_s", "lines_per_s", "reads_per_s",
+        "stages": {stage: {"count", "p50_ms", "p99_ms", "max_ms"}}}, with
+        only the stages that saw samples in this window.
+        """
+        now = time.monotonic()
+        interval = max(now - self.window_start, 1e-9)
+        counts = dict(self.counts)
+        record = {"interval": round(interval, 3)}
+        for counter in COUNTERS:
+            record[f"{counter}_per_s"] = round((counts[counter] - self.window_counts[counter]) / interval, 1)
+        stages = {}
+        for stage in STAGES:
+            if not self.samples[stage]:
+                continue
+            # Swap in an empty deque; a writer still holding the old one only adds to this window.
+            samples = self.samples[stage]
+            self.samples[stage] = collections.deque(maxlen=self.max_samples)
+            taken = sorted(samples)
+            stages[stage] = {
+                "count": len(taken),
+                "p50_ms": round(percentile(taken, 0.5) * 1000, 4),
+                "p99_ms": round(percentile(taken, 0.99) * 1000, 4),
+                "max_ms": round(taken[-1] * 1000, 4),
+            }
+        record["stages"] = stages
+        self.window_counts = counts
+        self.window_start = now
+        return record
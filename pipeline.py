@@ -0,0 +1,124 @@
+import queue
+import threading
+import time
+
+from chunk_channel import ChunkChannel, CLOSED
+
+###############################################################################
+#                   Line Pipeline (parse off the Tk thread)
+###############################################################################
+#
+#   telnet reader --inbound--> worker thread --render_ops--> Tk main thread
+#
+# The worker runs the per-line work (newline splitting, ANSI parsing, message
+# classification, triggers, chatlog writes, logon detection) and only hands Tk
+# ready-to-apply render operations. Both queues are bounded: when Tk falls
+# behind the worker blocks on render_ops, inbound (a ChunkChannel, bounded in
+# bytes and merging adjacent reads) reaches high water, and the telnet reader
+# stops reading until the worker has drained it to low water.
+#
+# The worker never calls into Tk (under threaded Tcl even event_generate is
+# marshalled to the main thread and would stall the worker while Tk is busy).
+# Tk checks has_pending() once per frame and drains until the queue is empty.
+#
+# Only the worker emits. The asyncio loop thread, which serves every
+# session, must never wait on Tk: its ops (status, reconnecting, send_error)
+# are post()ed into inbound, in order with the data, and the worker emits
+# them when it gets there.
+
+
+class LinePipeline:
+    def __init__(self, process_chunk, max_bytes=1024 * 1024, max_ops=4096):
+        self.process_chunk = process_chunk
+        self.inbound = ChunkChannel(high_water=max_bytes)
+        self.render_ops = queue.Queue(maxsize=max_ops)
+        self.detached = False  # nobody draws the ops any more; emit drops them
+        self.thread = None
+        self.ui_stalls = 0  # times the worker waited on a full render_ops queue
+        self.ui_stall_time = 0.0
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name="line-pipeline", daemon=True)
+            self.thread.start()
+
+    def detach(self):
+        """Drop every op emitted from now on, and unblock a worker waiting for room in render_ops."""
+        self.detached = True
+        self.drain()
+
+    def stop(self, timeout=5):
+        """Detach, let the worker finish the input already queued and wait for it.
+
+        Returns True once the worker has exited (or never ran).
+        """
+        self.detach()
+        if self.thread and self.thread.is_alive():
+            self.inbound.close()
+            self.thread.join(timeout)
+            if self.thread.is_alive():
+                return False
+        self.thread = None
+        return True
+
+    # 1️⃣ PRODUCER SIDE (telnet reader)
+    def feed(self, data):
+        """Queue raw data for the worker, blocking while the pipeline is full."""
+        self.inbound.put(data)
+
+    def try_feed(self, data):
+        """Queue data without blocking. Returns False if the pipeline is full."""
+        return self.inbound.try_put(data)
+
+    async def feed_async(self, data):
+        """Queue raw data from the asyncio loop; awaits, without blocking the loop, while full."""
+        await self.inbound.put_async(data)
+
+    def post(self, op):
+        """Queue a render op behind the pending input for the worker to emit. Never blocks."""
+        self.inbound.push(op)
+
+    # 2️⃣ WORKER SIDE
+    def emit(self, op):
+        """Hand a render operation to the Tk thread, blocking while Tk is behind. Worker only."""
+        if self.detached:
+            return
+        try:
+            self.render_ops.put_nowait(op)
+        except queue.Full:
+            self.ui_stalls += 1
+            start = time.monotonic()
+            self.render_ops.put(op)
+            self.ui_stall_time += time.monotonic() - start
+
+    def _run(self):
+        while True:
+            data = self.inbound.get()
+            if data is CLOSED:
+                break
+            try:
+                self.process_chunk(data)
+            except Exception as e:
+                print(f"[DEBUG] Error in line pipeline: {e}")
+
+    # 3️⃣ CONSUMER SIDE (Tk thread)
+    def has_pending(self):
+        return not self.render_ops.empty()
+
+    def metrics(self):
+        """Inbound channel metrics plus the render op backlog and time spent waiting on Tk."""
+        metrics = self.inbound.metrics()
+        metrics["render_ops"] = self.render_ops.qsize()
+        metrics["ui_stalls"] = self.ui_stalls
+        metrics["ui_stall_time"] = self.ui_stall_time
+        return metrics
+
+    def drain(self, max_ops=None):
+        """Return the render operations that are ready, without blocking."""
+        ops = []
+        try:
+            while max_ops is None or len(ops) < max_ops:
+                ops.append(self.render_ops.get_nowait())
+        except queue.Empty:
+            pass
+        return ops
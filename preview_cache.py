@@ -0,0 +1,411 @@
+import collections
+import concurrent.futures
+import hashlib
+import json
+import os
+import threading
+from io import BytesIO
+
+import requests
+from PIL import Image
+from requests.adapters import HTTPAdapter
+
+###############################################################################
+#                   Preview Cache (hyperlink hover thumbnails)
+###############################################################################
+#
+# Two tiers in front of the network:
+#
+#   memory   decoded thumbnails (PIL frames), LRU, bounded by pixel bytes
+#   disk     downloaded image bodies under cache_dir, named by a hash of the
+#            URL, next to the ETag / Last-Modified they were served with
+#
+# get() calls back straight away on a memory hit. On a miss, the URL is
+# queued for a small fixed pool of fetch threads, and every get() for that
+# URL made meanwhile joins the same fetch. All fetches share one
+# requests.Session, so connections to a host are kept alive and reused.
+#
+# A fetch revalidates the disk copy with If-None-Match / If-Modified-Since:
+# a 304 reuses the copy, and so does a network error. Without a disk copy
+# it downloads the image. It then decodes the thumbnail and calls everyone
+# back on the fetch thread, so Tk code should hop back with after().
+#
+# Downloads are streamed, and a fetch gives up early on:
+# - a Content-Type that isn't an image;
+# - a Content-Length over max_download_bytes;
+# - a body whose first bytes aren't a known image signature, or whose
+#   header declares more than max_pixels;
+# - a body that runs past max_download_bytes.
+#
+# When every caller waiting on a fetch has called cancel() (the pointer
+# left the link), it stops between chunks. A fetch still in the queue
+# never starts.
+#
+# URLs that can't be previewed (web pages, huge files) are remembered too,
+# so hovering over them again costs nothing. Only PIL images are produced
+# here; PhotoImages belong to the Tk thread.
+#
+# Animated images are not decoded up front. The fetch thread decodes only
+# the first frame, so it can be shown at once. The Tk thread then decodes
+# each later frame when it is due, keeping the downsized frames in a
+# buffer of at most max_buffer_bytes. An animation that fits loops from
+# the buffer; a longer one keeps a window of the most recently decoded
+# frames and decodes the rest again on each loop.
+
+THUMBNAIL_SIZE = (200, 150)
+NOT_AN_IMAGE_COST = 1024  # memory budget charged for remembering a non-image URL
+MIN_FRAME_MS = 20         # shorter GIF frame delays are played at DEFAULT_FRAME_MS, as browsers do
+DEFAULT_FRAME_MS = 100
+CHUNK_SIZE = 16 * 1024
+SNIFF_BYTES = 64 * 1024   # enough for the header of most PNG, GIF and JPEG files
+IMAGE_SIGNATURES = (b"\x89PNG\r\n\x1a\n", b"\xff\xd8\xff", b"GIF87a", b"GIF89a", b"BM")
+
+
+def frame_bytes(frame):
+    return frame.width * frame.height * len(frame.getbands())
+
+
+class Thumbnail:
+    """A still preview: one downsized frame."""
+
+    animated = False
+
+    def __init__(self, image):
+        self.image = image
+        self.size_bytes = frame_bytes(image)
+
+    def frame(self, index=0):
+        """(frame, duration in ms); a still image has one frame that lasts forever."""
+        return self.image, 0
+
+
+class AnimatedThumbnail:
+    """An animated preview whose frames are decoded and downsized when first asked for.
+
+    frame() may be called from one thread at a time (the Tk thread, once
+    the fetch thread has handed the thumbnail over).
+    """
+
+    animated = True
+
+    def __init__(self, image, data_size, size=THUMBNAIL_SIZE, max_buffer_bytes=2 * 1024 * 1024):
+        self.source = image          # the open PIL image, positioned at its last decoded frame
+        self.size = size
+        self.max_buffer_bytes = max_buffer_bytes
+        self.buffer = collections.OrderedDict()  # index -> (frame, duration), oldest decoded first
+        self.buffer_bytes = 0
+        self.frame_count = None      # known once a seek runs off the end
+        self.size_bytes = data_size + max_buffer_bytes  # charged in full to the memory cache
+        self.frame(0)
+
+    def frame(self, index):
+        """(frame, duration in ms) of frame index, wrapping around at the end."""
+        if self.frame_count:
+            index %= self.frame_count
+        cached = self.buffer.get(index)
+        if cached is not None:
+            return cached
+        source = self.source
+        try:
+            source.seek(index)  # the next frame is a cheap step; going back rewinds to the start
+        except EOFError:
+            self.frame_count = index
+            return self.frame(0)
+        duration = source.info.get("duration") or 0
+        if duration < MIN_FRAME_MS:
+            duration = DEFAULT_FRAME_MS
+        frame = source.copy()
+        frame.thumbnail(self.size)
+        cached = (frame, duration)
+
+        cost = frame_bytes(frame)
+        while self.buffer and self.buffer_bytes + cost > self.max_buffer_bytes:
+            _, (old, _) = self.buffer.popitem(last=False)
+            self.buffer_bytes -= frame_bytes(old)
+        self.buffer[index] = cached
+        self.buffer_bytes += cost
+        return cached
+
+
+def looks_like_image(head):
+    """True if head starts like a PNG, JPEG, GIF, BMP or WebP file."""
+    return head.startswith(IMAGE_SIGNATURES) or (head[:4] == b"RIFF" and head[8:12] == b"WEBP")
+
+
+class Cancelled(Exception):
+    """Every caller waiting on a fetch cancelled it."""
+
+
+class Fetch:
+    """One URL being fetched, and the callbacks waiting for it."""
+
+    def __init__(self, url):
+        self.url = url
+        self.callbacks = []
+        self.cancelled = False  # set under the cache lock, read between chunks
+
+
+def decode_thumbnail(data, size=THUMBNAIL_SIZE):
+    """Thumbnail of an image file's bytes; only the first frame of an animation is decoded."""
+    image = Image.open(BytesIO(data))
+    if getattr(image, "is_animated", False):
+        return AnimatedThumbnail(image, len(data), size)
+    image.thumbnail(size)
+    return Thumbnail(image)
+
+
+class PreviewCache:
+    def __init__(self, cache_dir="preview_cache", max_bytes=32 * 1024 * 1024,
+                 max_disk_bytes=128 * 1024 * 1024, timeout=5, workers=4,
+                 max_download_bytes=10 * 1024 * 1024, max_pixels=25_000_000):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes            # pixel bytes of the decoded thumbnails kept in memory
+        self.max_disk_bytes = max_disk_bytes  # image bodies kept on disk
+        self.timeout = timeout
+        self.max_download_bytes = max_download_bytes
+        self.max_pixels = max_pixels          # larger images are not worth decoding for a thumbnail
+        self.memory = collections.OrderedDict()  # url -> Thumbnail, or None if not previewable
+        self.memory_bytes = 0
+        self.pending = {}  # url -> Fetch queued or in flight
+        self.lock = threading.Lock()
+
+        # One keep-alive connection pool shared by a fixed number of fetch threads
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="preview-fetch")
+
+        # Metrics
+        self.hits = 0
+        self.fetches = 0
+        self.coalesced = 0
+        self.cancelled = 0
+        self.revalidated = 0  # answered from disk (304, or the network was unreachable)
+        self.downloads = 0
+        self.rejected = 0     # not an image, or too large
+        self.downloaded_bytes = 0  # body bytes read from the network, rejected ones included
+
+    # 1️⃣ LOOKUP
+    def get(self, url, callback):
+        """Call callback(thumbnail) with url's thumbnail, or None if it can't be previewed.
+
+        Returns True if it was in memory and callback has already run.
+        """
+        with self.lock:
+            if url in self.memory:
+                self.memory.move_to_end(url)
+                thumbnail = self.memory[url]
+                self.hits += 1
+            else:
+                fetch = self.pending.get(url)
+                if fetch is not None and not fetch.cancelled:
+                    fetch.callbacks.append(callback)
+                    self.coalesced += 1
+                    return False
+                fetch = self.pending[url] = Fetch(url)  # replaces a cancelled one still winding down
+                fetch.callbacks.append(callback)
+                self.fetches += 1
+                self.pool.submit(self._fetch, fetch)
+                return False
+        callback(thumbnail)
+        return True
+
+    def cached(self, url):
+        """True if url's thumbnail (or that it has none) is in memory."""
+        with self.lock:
+            return url in self.memory
+
+    def cancel(self, url, callback):
+        """Withdraw a get(). When no caller is left, the fetch stops at its next chunk."""
+        with self.lock:
+            fetch = self.pending.get(url)
+            if fetch is None or callback not in fetch.callbacks:
+                return
+            fetch.callbacks.remove(callback)
+            if not fetch.callbacks:
+                fetch.cancelled = True
+                self.cancelled += 1
+
+    def close(self):
+        """Cancel every fetch and stop the pool without waiting for it."""
+        with self.lock:
+            for fetch in self.pending.values():
+                fetch.cancelled = True
+                fetch.callbacks = []
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _fetch(self, fetch):
+        url = fetch.url
+        thumbnail = None
+        try:
+            if fetch.cancelled:
+                raise Cancelled()
+            thumbnail = self.load(fetch)
+            self.remember(url, thumbnail)
+        except Cancelled:
+            pass
+        except Exception as e:
+            print(f"[DEBUG] Preview of {url} failed: {e}")  # not remembered; the next hover tries again
+        with self.lock:
+            if self.pending.get(url) is fetch:
+                del self.pending[url]
+            callbacks, fetch.callbacks = fetch.callbacks, []
+        for callback in callbacks:
+            callback(thumbnail)
+
+    def remember(self, url, thumbnail):
+        """Put a thumbnail (or None for a non-image) in the memory LRU, evicting the oldest."""
+        cost = thumbnail.size_bytes if thumbnail else NOT_AN_IMAGE_COST
+        if cost > self.max_bytes:
+            return
+        with self.lock:
+            if url in self.memory:
+                old = self.memory.pop(url)
+                self.memory_bytes -= old.size_bytes if old else NOT_AN_IMAGE_COST
+            self.memory[url] = thumbnail
+            self.memory_bytes += cost
+            while self.memory_bytes > self.max_bytes:
+                _, old = self.memory.popitem(last=False)
+                self.memory_bytes -= old.size_bytes if old else NOT_AN_IMAGE_COST
+
+    # 2️⃣ DISK AND NETWORK (fetch thread)
+    def paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + ".img", base + ".json"
+
+    def load(self, fetch):
+        """Revalidate or download a fetch's URL and decode it. Returns None if it can't be previewed."""
+        url = fetch.url
+        body_path, meta_path = self.paths(url)
+        meta = None
+        if os.path.exists(body_path):
+            try:
+                with open(meta_path, "r") as file:
+                    meta = json.load(file)
+            except (OSError, ValueError):
+                meta = None
+
+        headers = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        try:
+            response = self.http.get(url, headers=headers, timeout=self.timeout, stream=True)
+        except requests.RequestException:
+            if not meta:
+                raise
+            response = None  # offline: the disk copy will do
+
+        if response is None or response.status_code == 304:
+            if response is not None:
+                response.close()
+            self.revalidated += 1
+            with open(body_path, "rb") as file:
+                data = file.read()
+            os.utime(body_path)  # recently used, for prune_disk
+            return decode_thumbnail(data)
+
+        with response:
+            response.raise_for_status()
+            data = self.download(fetch, response)
+            if data is None:
+                self.rejected += 1
+                return None
+            self.downloads += 1
+            headers = response.headers
+        try:
+            thumbnail = decode_thumbnail(data)
+        except Exception:
+            return None  # looked like an image but PIL can't read it
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if etag or last_modified:  # without a validator a disk copy could never be reused
+            self.store(url, data, {"url": url, "etag": etag, "last_modified": last_modified})
+        return thumbnail
+
+    def download(self, fetch, response):
+        """Stream an image body, or return None as soon as it is clearly not one to preview."""
+        content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type and not content_type.startswith("image/") and content_type != "application/octet-stream":
+            return None
+        length = response.headers.get("Content-Length", "")
+        if length.isdigit() and int(length) > self.max_download_bytes:
+            return None
+
+        body = bytearray()
+        sniffed = False
+        for chunk in response.iter_content(CHUNK_SIZE):
+            if fetch.cancelled:
+                raise Cancelled()
+            self.downloaded_bytes += len(chunk)
+            body += chunk
+            if len(body) > self.max_download_bytes:
+                return None
+            if not sniffed and len(body) >= SNIFF_BYTES:
+                if not self.acceptable_header(body):
+                    return None
+                sniffed = True
+        if not sniffed and not self.acceptable_header(body):
+            return None
+        return bytes(body)
+
+    def acceptable_header(self, head):
+        """Check the first bytes of a body: a known image format of at most max_pixels."""
+        if not looks_like_image(head):
+            return False
+        try:
+            width, height = Image.open(BytesIO(head)).size
+        except Exception:
+            return True  # the header runs past what we have; the decoder will tell
+        return width * height <= self.max_pixels
+
+    def store(self, url, data, meta):
+        """Write an image body and its validators to the disk tier, then prune it."""
+        body_path, meta_path = self.paths(url)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for path, content, mode in ((body_path, data, "wb"), (meta_path, json.dumps(meta), "w")):
+            temp_path = f"{path}.{threading.get_ident()}.tmp"  # a cancelled fetch may still be writing
+            with open(temp_path, mode) as file:
+                file.write(content)
+            os.replace(temp_path, path)
+        self.prune_disk()
+
+    def prune_disk(self):
+        """Delete the least recently used bodies until the disk tier fits max_disk_bytes."""
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as scan:
+            for entry in scan:
+                if entry.name.endswith(".img"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            for stale in (path, path[:-len(".img")] + ".json"):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+            total -= size
+
+    def metrics(self):
+        with self.lock:
+            return {
+                "entries": len(self.memory),
+                "memory_bytes": self.memory_bytes,
+                "hits": self.hits,
+                "fetches": self.fetches,
+                "coalesced": self.coalesced,
+                "cancelled": self.cancelled,
+                "revalidated": self.revalidated,
+                "downloads": self.downloads,
+                "rejected": self.rejected,
+                "downloaded_bytes": self.downloaded_bytes,
+            }
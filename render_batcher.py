@@ -0,0 +1,151 @@
+import tkinter as tk
+
+###############################################################################
+#                   Render Batcher (one Text update per frame)
+###############################################################################
+#
+# Runs queued within one frame are merged when neighbours share the same tags
+# and written with a single multi-argument insert:
+#
+#   widget.insert(END, text1, tags1, text2, tags2, ...)
+#
+# followed by one NORMAL/DISABLED state toggle and one see(END), instead of a
+# toggle, an insert per run and a scroll for every line. The see(END) is left
+# out while the view is scrolled back, so reading history is not interrupted.
+#
+# With a PerfStats (perf_stats.py), each flush's widget work is recorded as
+# the "tk_insert" stage. With a LinkIndex (link_index.py), the position of
+# every ("hyperlink", tag) run is recorded as it is inserted; those runs are
+# never merged, so each one is exactly one URL.
+
+FRAME_MS = 16
+
+
+class RenderBatcher:
+    def __init__(self, widget, frame_ms=FRAME_MS, on_flush=None, stats=None, links=None):
+        self.widget = widget
+        self.frame_ms = frame_ms
+        self.on_flush = on_flush
+        self.stats = stats
+        self.links = links
+        self.runs = []  # [tags, [text parts]] with adjacent equal tags merged
+        self.flush_id = None
+
+    def add(self, runs):
+        """Queue (text, tags) runs and make sure a flush is scheduled for this frame."""
+        pending = self.runs
+        for text, tags in runs:
+            if not text:
+                continue
+            if pending and pending[-1][0] == tags and not isinstance(tags, tuple):
+                pending[-1][1].append(text)
+            else:
+                pending.append([tags, [text]])
+        if pending and self.flush_id is None:
+            self.flush_id = self.widget.after(self.frame_ms, self.flush)
+
+    def flush(self):
+        """Write everything queued so far to the widget in one insert."""
+        if self.flush_id is not None:
+            self.widget.after_cancel(self.flush_id)
+            self.flush_id = None
+        if not self.runs:
+            return
+        args = []
+        for tags, parts in self.runs:
+            args.append(parts[0] if len(parts) == 1 else "".join(parts))
+            args.append(tags)
+        self.runs = []
+
+        start = self.stats.clock() if self.stats else None
+        widget = self.widget
+        if self.links is not None:
+            position = widget.index("end-1c")
+        following = widget.yview()[1] >= 1.0
+        widget.configure(state=tk.NORMAL)
+        widget.insert(tk.END, *args)
+        if following:
+            widget.see(tk.END)
+        widget.configure(state=tk.DISABLED)
+        if start is not None:
+            self.stats.record("tk_insert", start)
+        if self.links is not None:
+            self.index_links(args, position)
+        if self.on_flush:
+            self.on_flush()
+
+    def index_links(self, args, position):
+        """Record the hyperlink runs of an insert that started at Text index position."""
+        links = self.links
+        line, column = map(int, position.split("."))
+        found = False
+        for i in range(0, len(args), 2):
+            text = args[i]
+            if isinstance(args[i + 1], tuple) and args[i + 1][:1] == ("hyperlink",):
+                links.add(line, column, column + len(text), text)
+                found = True
+            newlines = text.count("\n")
+            if newlines:
+                line += newlines
+                column = len(text) - text.rfind("\n") - 1
+            else:
+                column += len(text)
+        if found:
+            links.changed()
+
+
+class ScreenPainter:
+    """Repaints changed rows of a ScreenBuffer into a Text widget once per frame.
+
+    Row updates queued within a frame are merged so each row is repainted at
+    most once, with the latest contents.
+    """
+
+    def __init__(self, widget, rows, frame_ms=FRAME_MS, on_flush=None, stats=None):
+        self.widget = widget
+        self.rows = rows
+        self.frame_ms = frame_ms
+        self.on_flush = on_flush
+        self.stats = stats
+        self.pending = {}  # row -> [(text, tags)]
+        self.flush_id = None
+
+    def reset(self):
+        """Clear the widget down to rows empty lines."""
+        widget = self.widget
+        widget.configure(state=tk.NORMAL)
+        widget.delete("1.0", tk.END)
+        widget.insert("1.0", "\n" * (self.rows - 1))
+        widget.configure(state=tk.DISABLED)
+        self.pending = {}
+
+    def add(self, rows):
+        """Queue {row: runs} updates and make sure a flush is scheduled for this frame."""
+        self.pending.update(rows)
+        if self.pending and self.flush_id is None:
+            self.flush_id = self.widget.after(self.frame_ms, self.flush)
+
+    def flush(self):
+        if self.flush_id is not None:
+            self.widget.after_cancel(self.flush_id)
+            self.flush_id = None
+        if not self.pending:
+            return
+        rows, self.pending = self.pending, {}
+        start = self.stats.clock() if self.stats else None
+        widget = self.widget
+        widget.configure(state=tk.NORMAL)
+        for y in sorted(rows):
+            line = y + 1
+            widget.delete(f"{line}.0", f"{line}.end")
+            args = []
+            for text, tags in rows[y]:
+                args.append(text)
+                args.append(tags)
+            if args:
+                widget.insert(f"{line}.0", *args)
+        widget.configure(state=tk.DISABLED)
+        if start is not None:
+            self.stats.record("tk_insert", start)
+        if self.on_flush:
+            self.on_flush()
@@ -0,0 +1,368 @@
+import re
+from array import array
+
+from ansi_parser import TEXT, CSI, ESC, DEFAULT_STYLE
+
+###############################################################################
+#                    Screen Buffer (cursor-addressed mode)
+###############################################################################
+#
+# A cols x rows cell grid for boards that draw with cursor addressing (menus,
+# door games). Each row is stored as two arrays:
+#
+#   chars[y]  array('I') of code points
+#   attrs[y]  array('H') of style ids (index into self.styles)
+#
+# apply() takes AnsiParser records and updates the grid in place: text is
+# written at the cursor, CSI/ESC records move the cursor, erase, scroll the
+# scrolling region or switch to the alternate screen. Rows that change are
+# added to self.dirty; take_dirty_rows() turns just those rows into
+# (text, style) runs for repainting.
+#
+# Style ids only have to be unique among the cells on screen, so when the
+# table fills up (truecolor art can produce a new style per cell) it is
+# rebuilt from the styles the cells still use and the attrs are renumbered.
+
+_CONTROL_RE = re.compile(r'[\x00-\x1f]')
+SPACE = 0x20
+MAX_STYLES = 1 << 16  # style ids are stored in array('H')
+
+
+class ScreenBuffer:
+    def __init__(self, cols=136, rows=50, max_styles=MAX_STYLES):
+        self.max_styles = max_styles
+        self.cols = cols
+        self.rows = rows
+        self.styles = [DEFAULT_STYLE]
+        self.style_ids = {DEFAULT_STYLE: 0}
+        self.main = self._blank_planes()
+        self.alternate = None
+        self.chars, self.attrs = self.main
+        self.dirty = set(range(rows))
+        self.reset_state()
+
+    def reset_state(self):
+        self.x = 0
+        self.y = 0
+        self.saved_cursor = (0, 0)
+        self.top = 0
+        self.bottom = self.rows - 1
+        self.cursor_visible = True
+
+    def _blank_row(self):
+        return array('I', [SPACE]) * self.cols, array('H', [0]) * self.cols
+
+    def _blank_planes(self):
+        chars, attrs = [], []
+        for _ in range(self.rows):
+            row_chars, row_attrs = self._blank_row()
+            chars.append(row_chars)
+            attrs.append(row_attrs)
+        return chars, attrs
+
+    def style_id(self, style):
+        sid = self.style_ids.get(style)
+        if sid is None:
+            if len(self.styles) >= self.max_styles:
+                self.compact_styles()
+            sid = self.style_ids[style] = len(self.styles)
+            self.styles.append(style)
+        return sid
+
+    def compact_styles(self):
+        """Drop styles no cell uses any more and renumber the attrs to match."""
+        planes = [self.main[1]]
+        if self.alternate is not None:
+            planes.append(self.alternate[1])
+        used = set()
+        for attrs in planes:
+            for row in attrs:
+                used.update(row)
+        used.discard(0)
+        old_styles = self.styles
+        self.styles = [DEFAULT_STYLE]
+        self.style_ids = {DEFAULT_STYLE: 0}
+        remap = {0: 0}
+        for sid in sorted(used):
+            remap[sid] = self.style_ids[old_styles[sid]] = len(self.styles)
+            self.styles.append(old_styles[sid])
+        for attrs in planes:
+            for y, row in enumerate(attrs):
+                attrs[y] = array('H', map(remap.__getitem__, row))
+
+    def mark_all_dirty(self):
+        self.dirty.update(range(self.rows))
+
+    # 1️⃣ INPUT
+    def apply(self, records):
+        """Apply AnsiParser records to the grid."""
+        for record in records:
+            kind = record[0]
+            if kind == TEXT:
+                self.write_text(record[1], record[2])
+            elif kind == CSI:
+                self.apply_csi(record[1], record[2], record[3])
+            elif kind == ESC:
+                self.apply_esc(record[1])
+
+    def write_text(self, text, style):
+        sid = self.style_id(style)
+        pos = 0
+        for match in _CONTROL_RE.finditer(text):
+            if match.start() > pos:
+                self._put(text[pos:match.start()], sid)
+            self._control(match.group())
+            pos = match.end()
+        if pos < len(text):
+            self._put(text[pos:], sid)
+
+    def _put(self, text, sid):
+        """Write printable text at the cursor, wrapping at the right margin."""
+        cols = self.cols
+        while text:
+            if self.x >= cols:
+                self.x = 0
+                self._linefeed()
+            n = min(len(text), cols - self.x)
+            x, y = self.x, self.y
+            self.chars[y][x:x + n] = array('I', text[:n].encode('utf-32-le'))
+            self.attrs[y][x:x + n] = array('H', [sid]) * n
+            self.dirty.add(y)
+            self.x += n
+            text = text[n:]
+
+    def _control(self, char):
+        if char == "\n":
+            self._linefeed()
+        elif char == "\r":
+            self.x = 0
+        elif char == "\b":
+            self.x = max(0, min(self.x, self.cols - 1) - 1)
+        elif char == "\t":
+            self.x = min(self.cols - 1, (self.x // 8 + 1) * 8)
+        elif char == "\x0c":
+            self.erase_display(2)
+            self.x = self.y = 0
+        # BEL and other controls do not touch the grid.
+
+    def _linefeed(self):
+        if self.y == self.bottom:
+            self.scroll_up(1)
+        elif self.y < self.rows - 1:
+            self.y += 1
+
+    def _reverse_index(self):
+        if self.y == self.top:
+            self.scroll_down(1)
+        elif self.y > 0:
+            self.y -= 1
+
+    # 2️⃣ CONTROL SEQUENCES
+    def apply_csi(self, final, params, private):
+        def param(i, default=1):
+            value = params[i] if i < len(params) else None
+            return default if not value else value
+
+        if private == "?":
+            if final in ("h", "l"):
+                for mode in params:
+                    self.set_private_mode(mode, final == "h")
+            return
+
+        cols, rows = self.cols, self.rows
+        if final == "A":
+            self.y = max(self.top if self.y >= self.top else 0, self.y - param(0))
+        elif final == "B":
+            self.y = min(self.bottom if self.y <= self.bottom else rows - 1, self.y + param(0))
+        elif final in ("C", "a"):
+            self.x = min(cols - 1, self.x + param(0))
+        elif final == "D":
+            self.x = max(0, min(self.x, cols - 1) - param(0))
+        elif final == "E":
+            self.y = min(rows - 1, self.y + param(0))
+            self.x = 0
+        elif final == "F":
+            self.y = max(0, self.y - param(0))
+            self.x = 0
+        elif final in ("G", "`"):
+            self.x = min(cols - 1, param(0) - 1)
+        elif final == "d":
+            self.y = min(rows - 1, param(0) - 1)
+        elif final in ("H", "f"):
+            self.y = min(rows - 1, param(0) - 1)
+            self.x = min(cols - 1, param(1) - 1)
+        elif final == "J":
+            self.erase_display(param(0, 0))
+        elif final == "K":
+            self.erase_line(param(0, 0))
+        elif final == "X":
+            x = min(self.x, cols - 1)
+            self._clear_cells(self.y, x, min(cols, x + param(0)))
+        elif final == "P":
+            self.delete_chars(param(0))
+        elif final == "@":
+            self.insert_chars(param(0))
+        elif final == "L":
+            self.insert_lines(param(0))
+        elif final == "M":
+            self.delete_lines(param(0))
+        elif final == "S":
+            self.scroll_up(param(0))
+        elif final == "T":
+            self.scroll_down(param(0))
+        elif final == "r":
+            top = param(0) - 1
+            bottom = min(rows, param(1, rows)) - 1
+            if top < bottom:
+                self.top, self.bottom = top, bottom
+                self.x = self.y = 0
+        elif final == "s":
+            self.saved_cursor = (self.x, self.y)
+        elif final == "u":
+            self.x, self.y = self.saved_cursor
+
+    def apply_esc(self, char):
+        if char == "7":
+            self.saved_cursor = (self.x, self.y)
+        elif char == "8":
+            self.x, self.y = self.saved_cursor
+        elif char == "D":
+            self._linefeed()
+        elif char == "E":
+            self.x = 0
+            self._linefeed()
+        elif char == "M":
+            self._reverse_index()
+        elif char == "c":
+            self.main = self._blank_planes()
+            self.alternate = None
+            self.chars, self.attrs = self.main
+            self.reset_state()
+            self.mark_all_dirty()
+
+    def set_private_mode(self, mode, enabled):
+        if mode == 25:
+            self.cursor_visible = enabled
+        elif mode in (47, 1047, 1049):
+            self.use_alternate_screen(enabled, save_cursor=(mode == 1049))
+
+    def use_alternate_screen(self, enabled, save_cursor=False):
+        on_alternate = self.alternate is not None and self.chars is self.alternate[0]
+        if enabled == on_alternate:
+            return
+        if enabled:
+            if save_cursor:
+                self.saved_cursor = (self.x, self.y)
+            self.alternate = self._blank_planes()
+            self.chars, self.attrs = self.alternate
+        else:
+            self.chars, self.attrs = self.main
+            self.alternate = None
+            if save_cursor:
+                self.x, self.y = self.saved_cursor
+        self.mark_all_dirty()
+
+    # 3️⃣ EDITING
+    def _clear_cells(self, y, start, end):
+        if start >= end:
+            return
+        self.chars[y][start:end] = array('I', [SPACE]) * (end - start)
+        self.attrs[y][start:end] = array('H', [0]) * (end - start)
+        self.dirty.add(y)
+
+    def erase_display(self, mode):
+        if mode == 0:
+            self.erase_line(0)
+            for y in range(self.y + 1, self.rows):
+                self._clear_cells(y, 0, self.cols)
+        elif mode == 1:
+            self.erase_line(1)
+            for y in range(0, self.y):
+                self._clear_cells(y, 0, self.cols)
+        elif mode in (2, 3):
+            for y in range(self.rows):
+                self._clear_cells(y, 0, self.cols)
+
+    def erase_line(self, mode):
+        x = min(self.x, self.cols - 1)
+        if mode == 0:
+            self._clear_cells(self.y, x, self.cols)
+        elif mode == 1:
+            self._clear_cells(self.y, 0, x + 1)
+        elif mode == 2:
+            self._clear_cells(self.y, 0, self.cols)
+
+    def delete_chars(self, count):
+        x = min(self.x, self.cols - 1)
+        count = min(count, self.cols - x)
+        for plane, fill in ((self.chars[self.y], SPACE), (self.attrs[self.y], 0)):
+            del plane[x:x + count]
+            plane.extend([fill] * count)
+        self.dirty.add(self.y)
+
+    def insert_chars(self, count):
+        x = min(self.x, self.cols - 1)
+        count = min(count, self.cols - x)
+        for plane, fill in ((self.chars[self.y], SPACE), (self.attrs[self.y], 0)):
+            plane[x:x] = array(plane.typecode, [fill]) * count
+            del plane[self.cols:]
+        self.dirty.add(self.y)
+
+    def scroll_up(self, count, top=None):
+        """Scroll the region [top, bottom] up by count lines, blank lines entering at the bottom."""
+        top = self.top if top is None else top
+        bottom = self.bottom
+        count = min(count, bottom - top + 1)
+        for plane in (self.chars, self.attrs):
+            del plane[top:top + count]
+        for _ in range(count):
+            row_chars, row_attrs = self._blank_row()
+            self.chars.insert(bottom - count + 1, row_chars)
+            self.attrs.insert(bottom - count + 1, row_attrs)
+        self.dirty.update(range(top, bottom + 1))
+
+    def scroll_down(self, count, top=None):
+        """Scroll the region [top, bottom] down by count lines, blank lines entering at the top."""
+        top = self.top if top is None else top
+        bottom = self.bottom
+        count = min(count, bottom - top + 1)
+        for plane in (self.chars, self.attrs):
+            del plane[bottom - count + 1:bottom + 1]
+        for _ in range(count):
+            row_chars, row_attrs = self._blank_row()
+            self.chars.insert(top, row_chars)
+            self.attrs.insert(top, row_attrs)
+        self.dirty.update(range(top, bottom + 1))
+
+    def insert_lines(self, count):
+        if self.top <= self.y <= self.bottom:
+            self.scroll_down(count, top=self.y)
+            self.x = 0
+
+    def delete_lines(self, count):
+        if self.top <= self.y <= self.bottom:
+            self.scroll_up(count, top=self.y)
+            self.x = 0
+
+    # 4️⃣ OUTPUT
+    def row_runs(self, y):
+        """Return row y as (text, style) runs, dropping trailing default-style blanks."""
+        chars, attrs = self.chars[y], self.attrs[y]
+        end = self.cols
+        while end > 0 and chars[end - 1] == SPACE and attrs[end - 1] == 0:
+            end -= 1
+        runs = []
+        start = 0
+        while start < end:
+            sid = attrs[start]
+            stop = start + 1
+            while stop < end and attrs[stop] == sid:
+                stop += 1
+            runs.append((chars[start:stop].tobytes().decode('utf-32-le'), self.styles[sid]))
+            start = stop
+        return runs
+
+    def take_dirty_rows(self):
+        """Return {row: runs} for every row changed since the last call."""
+        dirty, self.dirty = self.dirty, set()
+        return {y: self.row_runs(y) for y in sorted(dirty)}
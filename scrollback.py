@@ -0,0 +1,130 @@
+import os
+import tkinter as tk
+
+###############################################################################
+#               Scrollback (bounded Text widget + on-disk spill)
+###############################################################################
+#
+# Once a widget holds more than max_lines + chunk_lines lines, the oldest lines
+# are cut in one delete back down to max_lines, so each trim handles a whole
+# chunk and the widget stays the same size over a long session.
+#
+# With spilling on, trimmed lines are appended to a plain text file. Paging
+# back reads the newest not-yet-shown lines just before spill_offset and puts
+# them at the top of the widget. That keeps one invariant:
+#
+#   file[spill_offset:EOF] == the paged-in lines at the top of the widget
+#
+# so trimming paged-in lines again only moves spill_offset forward, and only
+# lines that were never on disk get written.
+#
+# While the view is scrolled away from the end (the user is reading history,
+# paged-in or not) trimming holds off until new output alone has added another
+# max_lines, and a trim then keeps the lines under the view where they were.
+
+DEFAULT_MAX_LINES = 5000
+DEFAULT_CHUNK_LINES = 500
+
+
+class Scrollback:
+    def __init__(self, widget, max_lines=DEFAULT_MAX_LINES, chunk_lines=DEFAULT_CHUNK_LINES,
+                 spill_path=None, spill_enabled=False):
+        self.widget = widget
+        self.max_lines = max_lines
+        self.chunk_lines = chunk_lines
+        self.spill_path = spill_path
+        self.spill_enabled = spill_enabled
+        self.spill_offset = 0
+        self.paged_lines = 0
+        self.on_trim = []  # callbacks taking the number of lines removed from the top
+        self.on_load = []  # callbacks taking the number of lines paged in at the top
+
+        if spill_path:
+            os.makedirs(os.path.dirname(spill_path) or ".", exist_ok=True)
+            # Each session starts with an empty spill file.
+            open(spill_path, "wb").close()
+
+    def line_count(self):
+        return int(self.widget.index("end-1c").split(".")[0])
+
+    def following(self):
+        """Whether the view shows the end of the widget (new output scrolls into view)."""
+        return self.widget.yview()[1] >= 1.0
+
+    def trim(self):
+        """Drop the oldest lines in one chunk once the widget is over its limit."""
+        if not self.max_lines:
+            return
+        keep = self.max_lines
+        if not self.following():
+            keep += self.paged_lines + self.max_lines
+        lines = self.line_count()
+        if lines <= keep + self.chunk_lines:
+            return
+        self.drop_top(lines - keep)
+
+    def drop_top(self, count):
+        """Remove count lines from the top of the widget, spilling new ones to disk."""
+        widget = self.widget
+        end = f"{count + 1}.0"
+        if self.spill_enabled and self.spill_path:
+            self._spill(widget.get("1.0", end))
+        else:
+            self.paged_lines = max(0, self.paged_lines - count)
+        following = self.following()
+        top = int(widget.index("@0,0").split(".")[0])
+        widget.configure(state=tk.NORMAL)
+        widget.delete("1.0", end)
+        widget.configure(state=tk.DISABLED)
+        if not following:
+            widget.yview(f"{max(1, top - count)}.0")  # keep the lines being read in view
+        for callback in self.on_trim:
+            callback(count)
+
+    def _spill(self, text):
+        lines = text.split("\n")[:-1]
+        already_on_disk = min(self.paged_lines, len(lines))
+        for line in lines[:already_on_disk]:
+            self.spill_offset += len((line + "\n").encode("utf-8"))
+        self.paged_lines -= already_on_disk
+
+        fresh = lines[already_on_disk:]
+        if fresh:
+            with open(self.spill_path, "ab") as file:
+                file.write(("\n".join(fresh) + "\n").encode("utf-8"))
+                self.spill_offset = file.tell()
+
+    def load_older(self, count=DEFAULT_CHUNK_LINES):
+        """Page up to count older lines from the spill file back into the top of the widget."""
+        if not self.spill_path or self.spill_offset <= 0:
+            return 0
+        start, lines = self._read_lines_before(self.spill_offset, count)
+        if not lines:
+            return 0
+        self.spill_offset = start
+        self.paged_lines += len(lines)
+        widget = self.widget
+        widget.configure(state=tk.NORMAL)
+        widget.insert("1.0", "".join(lines), "normal")
+        widget.configure(state=tk.DISABLED)
+        for callback in self.on_load:
+            callback(len(lines))
+        return len(lines)
+
+    def _read_lines_before(self, offset, count, block_size=64 * 1024):
+        """Return (start_offset, lines) for the last count lines ending at offset."""
+        data = b""
+        start = offset
+        with open(self.spill_path, "rb") as file:
+            while start > 0 and data.count(b"\n") <= count:
+                read_size = min(block_size, start)
+                start -= read_size
+                file.seek(start)
+                data = file.read(read_size) + data
+        lines = data.split(b"\n")[:-1]
+        if start > 0:
+            # The first piece may be a partial line; it belongs to an older page.
+            lines = lines[1:]
+        lines = lines[-count:]
+        consumed = sum(len(line) + 1 for line in lines)
+        return offset - consumed, [line.decode("utf-8", "replace") + "\n" for line in lines]
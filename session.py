@@ -0,0 +1,802 @@
+import asyncio
+import collections
+import json
+import os
+import random
+import re
+import threading
+import time
+
+import telnetlib3
+
+from ansi_parser import AnsiParser, TEXT, style_tag
+from capture import CaptureWriter
+from chatlog_store import ChatlogStore
+from line_buffer import LineBuffer
+from line_classifier import (classify, DIRECTED, PUBLIC, ROSTER_START, ROSTER_END, LOGIN_PROMPT,
+                             PROMPT_PASSWORD, PROMPT_USERNAME)
+from perf_stats import PerfStats
+from pipeline import LinePipeline
+from screen_buffer import ScreenBuffer
+from text_codec import TextCodec
+from trigger_engine import TriggerEngine
+
+###############################################################################
+#                        BBS Session (headless core)
+###############################################################################
+#
+# One BBS connection and everything derived from it: the telnet client, the
+# line pipeline, the screen grid, triggers, the chatlog store and the roster.
+# Nothing here imports Tk. Results leave the session as render ops handed to
+# a sink, which is any object with an emit(op) method:
+#
+#   ("terminal", runs)     styled (text, tags) runs for the scrolling log
+#   ("screen", rows)       {row: runs} for the screen grid rows that changed
+#   ("directed", runs)     a timestamped message addressed to us
+#   ("members", names)     the roster changed; names is a sorted list
+#   ("ding",)              a chat message arrived
+#   ("status", connected)  the connection opened or closed
+#   ("reconnecting", delay) the link dropped; retrying in delay seconds
+#   ("send_error", text)   a write to the BBS failed
+#
+# The last three originate on the asyncio loop thread, which must never wait
+# on a sink: they are post()ed through the pipeline's inbound channel and
+# emitted by the worker, in order with the text around them.
+#
+# The default sink is the session's own LinePipeline, whose op queue a UI
+# drains on its own thread (BBSTerminalApp does). Headless code passes another
+# sink, e.g. CollectingSink, and may call process_data_chunk() directly
+# instead of starting the worker thread.
+
+URL_REGEX = re.compile(r'(https?://\S+)')
+
+
+# Files the single-session versions kept in the working directory
+DEFAULT_ROSTER_COMMAND = "/who"  # re-shows the "You are in ... are here with you." banner
+
+LEGACY_DATA_FILES = ("chatlog", "chatlog.json", "chat_members.json", "last_seen.json", "captures")
+
+
+def board_data_dir(host, port, root="sessions"):
+    """Data directory for one board, so its history follows it across tabs and restarts."""
+    return os.path.join(root, re.sub(r'[^\w.-]', '_', f"{host.lower()}_{port}"))
+
+
+def adopt_legacy_data(data_dir):
+    """Move single-session files left in the working directory into a new data_dir.
+
+    Does nothing if data_dir exists already, so the files go to the first
+    board connected to after upgrading. Returns the names moved.
+    """
+    if os.path.exists(data_dir):
+        return []
+    moved = []
+    for name in LEGACY_DATA_FILES:
+        if os.path.exists(name):
+            os.makedirs(data_dir, exist_ok=True)
+            os.replace(name, os.path.join(data_dir, name))
+            moved.append(name)
+    return moved
+
+
+def split_hyperlinks(text, tag):
+    """Split text into (text, tags) runs with hyperlinks tagged."""
+    if "://" not in text:
+        return [(text, tag)]
+    runs = []
+    last_end = 0
+    for match in URL_REGEX.finditer(text):
+        start, end = match.span()
+        if start > last_end:
+            runs.append((text[last_end:start], tag))
+        runs.append((text[start:end], ("hyperlink", tag)))
+        last_end = end
+    if last_end < len(text):
+        runs.append((text[last_end:], tag))
+    return runs
+
+
+class NullSink:
+    """Discards every render op."""
+
+    def emit(self, op):
+        pass
+
+
+class CollectingSink:
+    """Counts render ops by kind and, if keep is set, keeps them in self.ops."""
+
+    def __init__(self, keep=True):
+        self.keep = keep
+        self.ops = []
+        self.counts = {}
+
+    def emit(self, op):
+        self.counts[op[0]] = self.counts.get(op[0], 0) + 1
+        if self.keep:
+            self.ops.append(op)
+
+
+class BBSSession:
+    def __init__(self, host="", port=23, sink=None, loop=None, data_dir="",
+                 retention=None, triggers=(), cols=136, rows=50, term="ansi", encoding="cp437"):
+        # Connection settings
+        self.host = host
+        self.port = port
+        self.cols = cols
+        self.rows = rows
+        self.term = term
+        self.encoding = encoding  # "cp437", "latin1" or "utf-8"; see set_encoding
+        self.codec = TextCodec(encoding)
+        self.min_read_size = 4096   # reads grow while the socket keeps filling them
+        self.max_read_size = 65536
+
+        # Behaviour switches; plain attributes so any thread may read them
+        self.username = ""
+        self.password = ""
+        self.auto_login = False
+        self.logon_automation = False
+        self.display_mode = "Log"  # "Log" scrolls lines, "Screen" keeps the cols x rows grid
+        self.keep_alive_enabled = False
+        self.keep_alive_interval = 60
+        self.capture_enabled = False  # record raw inbound bytes under <data_dir>/captures
+        self.prefetch_links = False   # hand URLs in incoming lines to link_prefetcher
+        self.link_prefetcher = None   # any object with submit(urls), e.g. a LinkPrefetcher
+
+        # Reconnect supervisor: after a drop, retry with jittered exponential
+        # backoff, answer the login prompts again and re-request the roster.
+        self.auto_reconnect = False
+        self.connect_timeout = 15      # seconds for the TCP connect
+        self.reconnect_delay = 1       # base delay of the first retry, doubled per failure
+        self.reconnect_max_delay = 60
+        self.roster_command = DEFAULT_ROSTER_COMMAND  # sent after an automatic re-login; "" = don't
+        self.roster_delay = 3          # seconds between the password and the roster command
+
+        # Incoming data is parsed on the pipeline worker; results go to the sink
+        self.pipeline = LinePipeline(self.process_data_chunk)
+        self.sink = sink if sink is not None else self.pipeline
+        self.stats = PerfStats()  # hot-path timers; off until someone reports them
+
+        # Telnet references
+        self.loop = loop
+        self.reader = None
+        self.writer = None
+        self.stop_event = threading.Event()  # signals the read loop to stop
+        self.connected = False
+        self._disconnecting = False
+        self.logging_off = False  # the user asked the BBS to hang up; not a drop
+        self.resuming = False     # answer the next login prompts to restore a dropped session
+        self.backoff = None       # sleep task between reconnect attempts
+        self.capture = None       # CaptureWriter for the current connection
+        self.reconnects = 0
+
+        # Outbound text. Any thread appends to the deque (append/popleft are
+        # atomic, so no lock); one writer task on the loop drains it.
+        self.outbound = collections.deque()
+        self.outbound_ready = None  # asyncio.Event, created on the loop by run()
+        self.outbound_wake_pending = False
+        self.writer_task = None
+        self.sent_messages = 0
+        self.sent_batches = 0
+
+        # Keep-Alive
+        self.keep_alive_stop_event = threading.Event()
+        self.keep_alive_task = None
+
+        # Raw bytes from the reader; only complete lines are decoded
+        self.line_buffer = LineBuffer(self.codec)
+
+        # Streaming ANSI parser (style carries across lines)
+        self.ansi_parser = AnsiParser()
+        self.tag_by_style = {}  # ANSI style -> Tk tag name (the UI reads the style back from the name)
+
+        # Screen mode state
+        self.screen_parser = AnsiParser()
+        self.screen_decoder = self.codec.incremental_decoder()
+        self.screen = ScreenBuffer(cols, rows)
+
+        # Triggers
+        self.trigger_engine = TriggerEngine(triggers)
+
+        # Chatlog storage and roster, kept under data_dir (None: no board yet, nothing kept)
+        self.retention = retention
+        self.data_dir = None
+        self.chatlog_store = None
+        self.data_lock = threading.Lock()  # held while the worker swaps chatlog_store
+        self.chat_members = set()
+        self.last_seen = {}
+        self.open_data_dir(data_dir)
+        self.last_message_info = None  # will hold (sender, recipient) of the last parsed message
+        self.user_list_buffer = []
+        self.collecting_users = False
+
+    def path(self, name):
+        """Location of a per-session data file. There is none until a data_dir is chosen."""
+        if self.data_dir is None:
+            raise RuntimeError(f"no data directory for {name} yet")
+        return os.path.join(self.data_dir, name)
+
+    def open_data_dir(self, data_dir):
+        """Close the current chatlog and roster and load those kept under data_dir instead.
+
+        The chatlog store imports a legacy chatlog.json once. Call before the
+        worker starts, or through use_data_dir() once it runs.
+        """
+        with self.data_lock:
+            if self.chatlog_store is not None:
+                self.chatlog_store.close()
+                self.chatlog_store = None
+            self.data_dir = data_dir
+            self.chat_members = set()
+            self.last_seen = {}
+            if data_dir is None:
+                return
+            if data_dir:
+                os.makedirs(data_dir, exist_ok=True)
+            self.chatlog_store = ChatlogStore(self.path("chatlog"), policy=self.retention)
+            self.chatlog_store.import_json(self.path("chatlog.json"))
+        self.chat_members = self.load_chat_members_file()
+        self.last_seen = self.load_last_seen_file()
+
+    def use_data_dir(self, data_dir):
+        """Have the worker switch to data_dir once it has processed the input queued so far."""
+        self.pipeline.post(("data_dir", data_dir))
+
+    def set_retention(self, policy):
+        """Apply a new RetentionPolicy to the chatlog, now and after a data_dir switch."""
+        with self.data_lock:
+            self.retention = policy
+            if self.chatlog_store is not None:
+                self.chatlog_store.set_policy(policy)
+
+    def chatlog_users(self):
+        """Usernames with logged messages, from any thread ([] before a board is chosen)."""
+        with self.data_lock:
+            return self.chatlog_store.users() if self.chatlog_store is not None else []
+
+    def chatlog_messages(self, username):
+        """Logged messages of username, from any thread."""
+        with self.data_lock:
+            return self.chatlog_store.messages(username) if self.chatlog_store is not None else []
+
+    def clear_chatlog(self, username):
+        """Delete the logged messages of username, from any thread."""
+        with self.data_lock:
+            if self.chatlog_store is not None:
+                self.chatlog_store.clear_user(username)
+
+    def start(self):
+        """Start the pipeline worker thread."""
+        self.pipeline.start()
+
+    def close(self):
+        """Stop the worker and close the chatlog store. Disconnect first.
+
+        Blocks while the worker finishes the queued input, so call it off the
+        Tk thread and the I/O loop (SessionManager.discard does).
+        """
+        if self.pipeline.stop():
+            if self.chatlog_store is not None:
+                self.chatlog_store.close()
+        else:
+            print("[DEBUG] Line pipeline did not stop; leaving the chatlog store open")
+
+    def emit(self, op):
+        self.sink.emit(op)
+
+    def post(self, op):
+        """Emit op from the I/O loop thread, via the worker, without waiting on the sink."""
+        self.pipeline.post(op)
+
+    def set_encoding(self, encoding):
+        """Switch the text encoding ("cp437", "latin1" or "utf-8"). Call while disconnected."""
+        codec = TextCodec(encoding)
+        self.encoding = encoding
+        self.codec = codec
+        self.line_buffer.codec = codec
+        self.screen_decoder = codec.incremental_decoder()
+
+    def set_triggers(self, triggers):
+        """Replace the triggers; the worker picks up the new engine on its next line."""
+        self.trigger_engine = TriggerEngine(triggers)
+
+    def performance_snapshot(self):
+        """Rates and stage latencies since the last call (see perf_stats.py) plus queue depths."""
+        record = self.stats.snapshot()
+        record["queue"] = self.pipeline.metrics()
+        return record
+
+    # 1️⃣ CONNECT / DISCONNECT
+    async def run(self):
+        """Connect and read until disconnected, reconnecting after drops if auto_reconnect is set.
+
+        A drop is any end of the connection the user did not ask for (EOF,
+        a read error, a failed connect). Retry n waits a random time between
+        half and all of reconnect_delay * 2**n, capped at reconnect_max_delay;
+        a connection that stayed up that long resets the count.
+        """
+        self.loop = asyncio.get_running_loop()
+        self.stop_event.clear()
+        failures = 0
+        resuming = False
+        try:
+            while True:
+                self.logging_off = False
+                connected_at = time.monotonic()
+                if await self.connect_and_read(resuming):
+                    resuming = True
+                    if time.monotonic() - connected_at >= self.reconnect_max_delay:
+                        failures = 0
+                if self.stop_event.is_set() or self.logging_off or not self.auto_reconnect:
+                    return
+                ceiling = min(self.reconnect_max_delay, self.reconnect_delay * 2 ** failures)
+                delay = random.uniform(ceiling / 2, ceiling)
+                failures += 1
+                self.post(("reconnecting", delay))
+                await self.pipeline.feed_async(f"Connection lost. Reconnecting in {delay:.1f} s...\n")
+                self.backoff = self.loop.create_task(asyncio.sleep(delay))
+                await asyncio.wait([self.backoff])
+                if self.stop_event.is_set():
+                    return
+                self.reconnects += 1
+        finally:
+            if self.backoff:
+                self.backoff.cancel()
+                self.backoff = None
+
+    async def connect_and_read(self, resuming=False):
+        """Connect via telnetlib3 (CP437 + ANSI) and read until the connection ends.
+
+        Returns False if the connect failed. With resuming, the login prompts
+        are answered from the stored credentials even when logon automation
+        is off, and roster_command follows the password. A cancel closes the
+        connection and is then passed on, so the caller sees it.
+        """
+        try:
+            reader, writer = await telnetlib3.open_connection(
+                host=self.host,
+                port=self.port,
+                term=self.term,
+                encoding=self.encoding,
+                cols=self.cols,    # Use the configured number of columns
+                rows=self.rows,    # Use the configured number of rows
+                connect_timeout=self.connect_timeout
+            )
+        except Exception as e:
+            await self.pipeline.feed_async(f"Connection failed: {e}\n")
+            return False
+
+        self.reader = reader
+        self.writer = writer
+        self.outbound.clear()
+        self.outbound_ready = asyncio.Event()
+        self.outbound_wake_pending = False
+        self.writer_task = self.loop.create_task(self.write_outbound())
+        self.resuming = resuming and bool(self.username and self.password)
+        self.connected = True
+        self.post(("status", True))
+        await self.pipeline.feed_async(f"Connected to {self.host}:{self.port}\n")
+        if self.keep_alive_enabled:
+            self.start_keep_alive()
+        if self.capture_enabled:
+            self.start_capture()
+            await self.pipeline.feed_async(f"Capturing to {self.capture.path}\n")
+        capture = self.capture
+        stats = self.stats
+
+        # Read raw bytes past the reader's stream decoder; only complete
+        # lines are decoded (by self.codec), on the pipeline worker.
+        read_bytes = telnetlib3.TelnetReader.read
+        read_size = self.min_read_size
+        try:
+            while not self.stop_event.is_set():
+                data = await read_bytes(reader, read_size)
+                if not data:
+                    break
+                start = stats.clock()
+                if capture:
+                    capture.write(data)
+                await self.pipeline.feed_async(data)
+                if start is not None:
+                    stats.record("read", start)
+                    stats.add("bytes", len(data))
+                    stats.add("reads")
+                # A full read means more is waiting: read more per wakeup. Shrink when it idles.
+                if len(data) == read_size and read_size < self.max_read_size:
+                    read_size *= 2
+                elif len(data) < read_size // 4 and read_size > self.min_read_size:
+                    read_size //= 2
+        except asyncio.CancelledError:
+            self.stop_event.set()  # the session is being stopped; don't reconnect
+            raise
+        except Exception as e:
+            await self.pipeline.feed_async(f"Error reading from server: {e}\n")
+        finally:
+            await self.close_connection()
+        return True
+
+    async def disconnect(self):
+        """Close the connection for good: stops the read loop and any pending reconnect."""
+        self.stop_event.set()
+        if self.backoff:
+            self.backoff.cancel()
+        await self.close_connection()
+
+    def log_off(self, command):
+        """Send the BBS's log-off command; the hang-up that follows is not treated as a drop."""
+        self.logging_off = True
+        return self.send_line(command)
+
+    async def close_connection(self):
+        """Close the current connection, if any."""
+        if not self.connected or self._disconnecting:
+            return
+        self._disconnecting = True
+        try:
+            self.stop_keep_alive()
+            if self.writer_task:
+                self.writer_task.cancel()
+                self.writer_task = None
+            self.outbound.clear()
+            self.resuming = False
+            self.stop_capture()
+
+            if self.writer:
+                try:
+                    # Try to close the writer and allow it time to drain
+                    self.writer.close()
+                    await self.writer.drain()
+                except Exception as e:
+                    print(f"Error closing writer: {e}")
+
+            # Mark the connection as closed
+            self.connected = False
+            self.reader = None
+            self.writer = None
+            self.post(("status", False))
+
+            await self.pipeline.feed_async("Disconnected from BBS.\n")
+        finally:
+            self._disconnecting = False
+
+    def start_capture(self):
+        """Start recording this connection's raw inbound bytes (see capture.py)."""
+        self.stop_capture()
+        if self.data_dir is None:
+            print("[DEBUG] No data directory yet; not recording a capture")
+            return
+        directory = self.path("captures")
+        os.makedirs(directory, exist_ok=True)
+        host = re.sub(r'[^\w.-]', '_', self.host)
+        name = f"{host}-{time.strftime('%Y%m%d-%H%M%S')}.cap"
+        self.capture = CaptureWriter(os.path.join(directory, name), host=self.host, port=self.port,
+                                     encoding=self.encoding, cols=self.cols, rows=self.rows)
+
+    def stop_capture(self):
+        if self.capture:
+            self.capture.close()
+            self.capture = None
+
+    # 2️⃣ SENDING
+    def send(self, message):
+        """Queue raw text for the BBS from any thread. Returns False when not connected.
+
+        The writer task is woken only if it is not already due to run, so a
+        burst of sends costs one loop callback and one drain().
+        """
+        if not self.connected or self.outbound_ready is None:
+            return False
+        self.outbound.append(message)
+        if not self.outbound_wake_pending:
+            self.outbound_wake_pending = True
+            self.loop.call_soon_threadsafe(self.outbound_ready.set)
+        return True
+
+    def send_line(self, message):
+        return self.send(message + "\r\n")
+
+    async def write_outbound(self):
+        """Writer task: write everything queued since the last wakeup, then drain once."""
+        outbound = self.outbound
+        while True:
+            await self.outbound_ready.wait()
+            self.outbound_ready.clear()
+            # Re-arm before taking the batch, so a send racing with us wakes us again.
+            self.outbound_wake_pending = False
+            parts = []
+            while outbound:
+                parts.append(outbound.popleft())
+            if not parts:
+                continue
+            try:
+                # Encoded here, past the writer's stream codec, as reads are decoded
+                telnetlib3.TelnetWriter.write(self.writer, self.codec.encode("".join(parts)))
+                await self.writer.drain()
+                self.sent_messages += len(parts)
+                self.sent_batches += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[DEBUG] Send failed: {e}")
+                self.post(("send_error", f"Send failed: {e}"))
+
+    def send_username(self):
+        return self.send_line(self.username)
+
+    def send_password(self):
+        return self.send_line(self.password)
+
+    # 3️⃣ KEEP-ALIVE
+    async def keep_alive(self):
+        """Send an <ENTER> keystroke every keep_alive_interval seconds."""
+        while not self.keep_alive_stop_event.is_set():
+            self.send("\r\n")
+            await asyncio.sleep(self.keep_alive_interval)
+
+    def start_keep_alive(self):
+        """Start the keep-alive coroutine. Must run on the session's loop."""
+        self.stop_keep_alive()
+        self.keep_alive_stop_event.clear()
+        self.keep_alive_task = self.loop.create_task(self.keep_alive())
+
+    def stop_keep_alive(self):
+        """Stop the keep-alive coroutine."""
+        self.keep_alive_stop_event.set()
+        if self.keep_alive_task:
+            self.keep_alive_task.cancel()
+            self.keep_alive_task = None
+
+    def set_keep_alive(self, enabled):
+        """Turn keep-alive on or off from any thread."""
+        self.keep_alive_enabled = enabled
+        if self.loop is None or not self.connected:
+            return  # run() starts it on connect
+        if enabled:
+            self.loop.call_soon_threadsafe(self.start_keep_alive)
+        else:
+            self.loop.call_soon_threadsafe(self.stop_keep_alive)
+
+    # 4️⃣ PARSING (pipeline worker)
+    def process_data_chunk(self, data):
+        """Buffer raw bytes and process each complete line.
+
+        Local status text may be passed as str, and ops post()ed from the
+        I/O loop as tuples (emitted as they are, except a ("data_dir", path)
+        switch from use_data_dir). Runs on the pipeline worker thread (or the
+        caller's, when driven directly); results leave only as render ops.
+        """
+        if isinstance(data, tuple):
+            if data[0] == "data_dir":
+                self.open_data_dir(data[1])
+                self.emit(("members", sorted(self.chat_members)))
+            else:
+                self.emit(data)
+            return
+        stats = self.stats
+        chunk_start = stats.clock()
+        if isinstance(data, str):
+            data = self.codec.encode(data)
+        if self.display_mode == "Screen":
+            start = stats.clock()
+            self.update_screen(self.screen_decoder.decode(data))
+            stats.record("screen", start)
+
+        lines = self.line_buffer.feed(data)
+        stats.add("lines", len(lines))
+        for line in lines:
+            event = classify(line)
+            kind = event.kind
+
+            # --- Collect the user list banner ---
+            if self.collecting_users:
+                self.user_list_buffer.append(event.clean)
+                if kind == ROSTER_END:
+                    self.update_chat_members(self.user_list_buffer)
+                    self.collecting_users = False
+                    self.user_list_buffer = []
+            if kind == ROSTER_START:
+                self.user_list_buffer = [event.clean]
+                self.collecting_users = True
+
+            # Directed messages are displayed in the main terminal as well
+            self.emit_terminal_text(line + "\n")
+            if self.prefetch_links and "://" in event.clean and self.link_prefetcher is not None:
+                self.link_prefetcher.submit(URL_REGEX.findall(event.clean))
+
+            if kind == DIRECTED:
+                self.emit_directed_message(f"From {event.sender}: {event.message}\n")
+                self.emit(("ding",))  # Play ding sound for directed messages
+                continue
+
+            self.check_triggers(event.clean, event.sender)
+            if kind == PUBLIC:
+                self.save_public_message(event)
+                self.emit(("ding",))  # Play ding sound for any message
+            elif kind == LOGIN_PROMPT and (self.auto_login or self.logon_automation or self.resuming):
+                self.detect_logon_prompt(event)
+        stats.record("process", chunk_start)
+
+    def emit_terminal_text(self, text):
+        """Parse text into styled runs and emit them for the terminal display."""
+        if self.display_mode == "Screen":
+            return  # the screen grid already has this text
+        start = self.stats.clock()
+        runs = self.parse_ansi_runs(text)
+        self.stats.record("ansi", start)
+        self.emit(("terminal", runs))
+
+    def update_screen(self, data):
+        """Apply a raw chunk to the screen grid and emit the rows it changed."""
+        self.screen.apply(self.screen_parser.feed(data))
+        if self.screen.dirty:
+            rows = self.screen.take_dirty_rows()
+            for y, runs in rows.items():
+                rows[y] = [(text, self.tag_for_style(style)) for text, style in runs]
+            self.emit(("screen", rows))
+
+    def repaint_screen(self):
+        """Have the worker emit every screen row on its next pass."""
+        self.screen.mark_all_dirty()
+        self.pipeline.try_feed("")
+
+    def emit_directed_message(self, text):
+        """Emit a timestamped directed message for the Messages to You pane."""
+        timestamp = time.strftime("[%Y-%m-%d %H:%M:%S] ")
+        self.emit(("directed", split_hyperlinks(timestamp + text + "\n", "normal")))
+
+    def parse_ansi_runs(self, text_data):
+        """Feed text to the streaming ANSI parser and return (text, tags) runs."""
+        runs = []
+        for record in self.ansi_parser.feed(text_data):
+            if record[0] != TEXT:
+                continue  # cursor/erase sequences have no meaning in the scrolling log
+            runs.extend(split_hyperlinks(record[1], self.tag_for_style(record[2])))
+        return runs
+
+    def tag_for_style(self, style):
+        """Tag name for an ANSI style."""
+        tag = self.tag_by_style.get(style)
+        if tag is None:
+            if len(self.tag_by_style) > 4096:
+                self.tag_by_style.clear()
+            tag = self.tag_by_style[style] = style_tag(style)
+        return tag
+
+    def detect_logon_prompt(self, event):
+        """Answer login prompts after a short delay when automation is on or a session is resuming."""
+        if self.loop is None:
+            return
+        if event.prompt == PROMPT_PASSWORD:
+            self.loop.call_soon_threadsafe(self.loop.call_later, 0.5, self.send_password)
+            if self.resuming:
+                self.resuming = False
+                if self.roster_command:
+                    self.loop.call_soon_threadsafe(self.loop.call_later, 0.5 + self.roster_delay,
+                                                   self.send_line, self.roster_command)
+        elif event.prompt == PROMPT_USERNAME:
+            self.loop.call_soon_threadsafe(self.loop.call_later, 0.5, self.send_username)
+
+    def check_triggers(self, message, sender=None):
+        """Check incoming messages for triggers and send automated response if matched."""
+        engine = self.trigger_engine
+        if not len(engine):
+            return
+        start = self.stats.clock()
+        matches = engine.match(message, sender)
+        self.stats.record("triggers", start)
+        for trigger_obj in matches:
+            print(f"Sending custom message: {trigger_obj['response']}")
+            self.send_line(trigger_obj['response'])
+
+    # 5️⃣ CHATLOG
+    def save_public_message(self, event):
+        """Save a chat message with a timestamp, logged under its sender.
+
+        Covers 'From <username>: <message>' and 'From <username> (to <recipient>): <message>'.
+        """
+        if self.chatlog_store is not None:  # no board chosen yet: nothing is kept
+            start = self.stats.clock()
+            timestamp = time.strftime("[%Y-%m-%d %H:%M:%S] ")
+            self.chatlog_store.append(event.sender, timestamp + event.message)
+            self.stats.record("chatlog", start)
+
+        # Save the last parsed DM info for later continuation lines.
+        self.last_message_info = (event.sender, None)  # No recipient logged
+
+    def append_to_last_chatlog_message(self, username, extra_text):
+        """Append extra_text to the last message logged for username."""
+        if self.chatlog_store is not None:
+            self.chatlog_store.amend_last(username, extra_text)
+
+    # 6️⃣ ROSTER
+    def update_chat_members(self, lines_with_users):
+        """Update the chat members based on the provided lines."""
+        combined_clean = " ".join(lines_with_users)  # already ANSI-stripped by the classifier
+        print(f"[DEBUG] Combined user lines: {combined_clean}")
+
+        # Extract the relevant section of the banner
+        match = re.search(r'Topic:\s*General Chat\s*(.*?)\s*are here with you\.', combined_clean, re.DOTALL | re.IGNORECASE)
+        if match:
+            user_section = match.group(1)
+        else:
+            user_section = combined_clean
+
+        # Normalize the list by replacing "and" with a comma
+        user_section = user_section.replace("and", ",")
+        print(f"[DEBUG] User section: {user_section}")
+
+        # Refined regex pattern for valid usernames and email addresses
+        username_pattern = re.compile(r'\b[A-Za-z0-9._%+-]+(?:@[A-Za-z0-9.-]+\.[A-Za-z]{2,})?\b')
+
+        # Find all tokens that look like valid usernames
+        extracted_users = username_pattern.findall(user_section)
+
+        final_usernames = []
+        for user in extracted_users:
+            # If it's an email, only keep the local part
+            if "@" in user:
+                user = user.split("@")[0]
+            final_usernames.append(user.strip())
+
+        # Remove any unwanted common words
+        common_words = {"and", "are", "here", "with", "you", "topic", "general", "channel", "majorlink"}
+        final_usernames = {user for user in final_usernames if user.lower() not in common_words}
+
+        print(f"[DEBUG] Extracted usernames: {final_usernames}")
+        self.chat_members = final_usernames
+
+        # Optionally update last seen timestamps
+        current_time = int(time.time())
+        for member in self.chat_members:
+            self.last_seen[member.lower()] = current_time
+        self.save_last_seen_file()
+
+        # Save the chat members to file
+        self.save_chat_members_file()
+
+        # Refresh the members display panel
+        self.emit(("members", sorted(self.chat_members)))
+
+    def load_chat_members_file(self):
+        """Load chat members from chat_members.json, or return an empty set if not found."""
+        path = self.path("chat_members.json")
+        if os.path.exists(path):
+            with open(path, "r") as file:
+                try:
+                    return set(json.load(file))
+                except Exception as e:
+                    print(f"[DEBUG] Error loading chat members file: {e}")
+                    return set()
+        return set()
+
+    def save_chat_members_file(self):
+        """Save the current chat members set to chat_members.json."""
+        if self.data_dir is None:
+            return
+        try:
+            with open(self.path("chat_members.json"), "w") as file:
+                json.dump(list(self.chat_members), file)
+        except Exception as e:
+            print(f"[DEBUG] Error saving chat members file: {e}")
+
+    def load_last_seen_file(self):
+        """Load last seen timestamps from last_seen.json, or return an empty dictionary if not found."""
+        path = self.path("last_seen.json")
+        if os.path.exists(path):
+            with open(path, "r") as file:
+                try:
+                    return json.load(file)
+                except Exception as e:
+                    print(f"[DEBUG] Error loading last seen file: {e}")
+                    return {}
+        return {}
+
+    def save_last_seen_file(self):
+        """Save the current last seen timestamps to last_seen.json."""
+        if self.data_dir is None:
+            return
+        try:
+            with open(self.path("last_seen.json"), "w") as file:
+                json.dump(self.last_seen, file)
+        except Exception as e:
+            print(f"[DEBUG] Error saving last seen file: {e}")
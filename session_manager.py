@@ -0,0 +1,109 @@
+import asyncio
+import threading
+
+from session import BBSSession
+
+###############################################################################
+#                  Session Manager (many sessions, one I/O loop)
+###############################################################################
+#
+# Every session's telnet connection runs as a task on one long-lived asyncio
+# loop, owned by the manager and run in its own thread ("bbs-io"). The loop
+# outlives individual connections, so connecting no longer starts a thread.
+#
+# Sessions stay isolated: each has its own parse state, pipeline worker,
+# screen grid, chatlog store and roster (kept under its data_dir). All
+# methods here may be called from any thread; those that wait (remove, stop)
+# must not be called from the Tk thread while it is running, since the
+# session's worker may be waiting on Tk. The Tk thread uses discard() and
+# polls the future it returns.
+
+
+class SessionManager:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = None
+        self.sessions = {}  # name -> BBSSession
+        self.runs = {}      # name -> concurrent Future of the session's run()
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run_loop, name="bbs-io", daemon=True)
+            self.thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def stop(self, timeout=5):
+        """Disconnect and close every session, then stop the loop thread."""
+        for name in list(self.sessions):
+            self.remove(name, timeout)
+        if self.thread and self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout)
+        self.thread = None
+        if not self.loop.is_running():
+            self.loop.close()
+
+    # 1️⃣ SESSIONS
+    def add(self, name, **kwargs):
+        """Create a session (BBSSession keyword arguments) and start its worker."""
+        if name in self.sessions:
+            raise ValueError(f"Session {name!r} already exists")
+        session = BBSSession(loop=self.loop, **kwargs)
+        self.sessions[name] = session
+        session.start()
+        return session
+
+    def get(self, name):
+        return self.sessions[name]
+
+    def remove(self, name, timeout=5):
+        """Disconnect and close a session, waiting up to timeout. See discard."""
+        try:
+            self.discard(name).result(timeout)
+        except Exception as e:
+            print(f"Error closing session: {e}")
+
+    def discard(self, name):
+        """Disconnect and close a session without waiting. Returns a future, done once it is closed.
+
+        Its render ops are dropped from now on, so nobody has to drain them.
+        """
+        session = self.sessions.pop(name)
+        session.pipeline.detach()
+        run = self.runs.pop(name, None)
+        return asyncio.run_coroutine_threadsafe(self._close(session, run), self.loop)
+
+    async def _close(self, session, run):
+        try:
+            await session.disconnect()
+        except Exception as e:
+            print(f"Error during disconnect: {e}")
+        if run and not run.done():
+            run.cancel()
+        # Joining the worker and closing the chatlog may take a moment; keep the loop serving
+        await self.loop.run_in_executor(None, session.close)
+
+    # 2️⃣ CONNECTIONS
+    def is_running(self, name):
+        run = self.runs.get(name)
+        return run is not None and not run.done()
+
+    def connect(self, name):
+        """Start the session's connect/read task on the loop. Returns its future."""
+        if self.is_running(name):
+            return self.runs[name]
+        run = asyncio.run_coroutine_threadsafe(self.sessions[name].run(), self.loop)
+        self.runs[name] = run
+        return run
+
+    def disconnect(self, name, session=None):
+        """Close the session's connection and cancel any pending reconnect. Returns a future."""
+        session = session or self.sessions[name]
+        return asyncio.run_coroutine_threadsafe(session.disconnect(), self.loop)
+
+    def call_soon(self, callback, *args):
+        """Run callback on the I/O loop thread."""
+        self.loop.call_soon_threadsafe(callback, *args)
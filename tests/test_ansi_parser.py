@@ -0,0 +1,57 @@
+from ansi_parser import (AnsiParser, CSI, ESC, TEXT, BOLD, REVERSE, DEFAULT_STYLE, TRUECOLOR,
+                         palette_color, plain_text, style_colors, style_tag, tag_style)
+
+
+def test_plain_text_is_one_record():
+    assert AnsiParser().feed("hello") == [(TEXT, "hello", DEFAULT_STYLE)]
+
+
+def test_sgr_changes_style_and_persists_across_feeds():
+    parser = AnsiParser()
+    assert parser.feed("\x1b[1;31mred") == [(TEXT, "red", (1, None, BOLD))]
+    assert parser.feed("still\x1b[0m plain") == [(TEXT, "still", (1, None, BOLD)),
+                                                  (TEXT, " plain", DEFAULT_STYLE)]
+
+
+def test_extended_colors():
+    parser = AnsiParser()
+    assert parser.feed("\x1b[38;5;208;48;2;1;2;3mx") == [(TEXT, "x", (208, TRUECOLOR | 0x010203, 0))]
+
+
+def test_cursor_and_escape_records():
+    records = AnsiParser().feed("a\x1b[2;5Hb\x1b[?25l\x1b7")
+    assert records == [
+        (TEXT, "a", DEFAULT_STYLE),
+        (CSI, "H", [2, 5], ""),
+        (TEXT, "b", DEFAULT_STYLE),
+        (CSI, "l", [25], "?"),
+        (ESC, "7"),
+    ]
+
+
+def test_stray_escape_keeps_the_next_character():
+    assert plain_text(AnsiParser().feed("a\x1b\nb\n")) == "a\nb\n"
+    assert AnsiParser().feed("\x1b\x1b8") == [(ESC, "8")]
+
+
+def test_sequence_split_across_chunks():
+    parser = AnsiParser()
+    assert parser.feed("a\x1b[3") == [(TEXT, "a", DEFAULT_STYLE)]
+    assert parser.feed("2mb") == [(TEXT, "b", (2, None, 0))]
+
+
+def test_osc_and_charset_sequences_are_dropped():
+    assert AnsiParser().feed("\x1b]0;title\x07a\x1b(Bb") == [(TEXT, "ab", DEFAULT_STYLE)]
+
+
+def test_style_colors():
+    assert style_colors(DEFAULT_STYLE) == ("#FFFFFF", None, False, False)
+    foreground, background, _, _ = style_colors((1, 4, BOLD | REVERSE))
+    assert (foreground, background) == (palette_color(4), palette_color(9))
+
+
+def test_tag_names_round_trip():
+    for style in (DEFAULT_STYLE, (1, None, BOLD), (None, 7, 0), (TRUECOLOR | 0xABCDEF, TRUECOLOR, 255)):
+        assert tag_style(style_tag(style)) == style
+    assert style_tag(DEFAULT_STYLE) == "normal"
+    assert tag_style("hyperlink") is None
@@ -0,0 +1,153 @@
+import json
+import os
+
+from chatlog_retention import RetentionPolicy
+from chatlog_store import ChatlogStore
+
+
+def reopen(store, **kwargs):
+    store.close()
+    return ChatlogStore(store.directory, segment_max_bytes=store.segment_max_bytes, **kwargs)
+
+
+def test_messages_survive_reopen(tmp_path):
+    store = ChatlogStore(str(tmp_path / "chatlog"))
+    store.append("alice", "one", ts=1.0)
+    store.append("bob", "two", ts=2.0)
+    store.append("alice", "three", ts=3.0)
+    store = reopen(store)
+    assert sorted(store.users()) == ["alice", "bob"]
+    assert store.messages("alice") == ["one", "three"]
+    assert store.messages("alice", -1) == ["three"]
+    assert store.count("bob") == 1
+    store.close()
+
+
+def test_torn_record_is_cut_off(tmp_path):
+    store = ChatlogStore(str(tmp_path / "chatlog"))
+    store.append("alice", "kept", ts=1.0)
+    store.close()
+    path = store._segment_path(store.active_segment)
+    with open(path, "ab") as file:
+        file.write(b'{"t": 2.0, "u": "alice", "m": "cut sh')  # crash mid-write
+    store = ChatlogStore(store.directory)
+    assert store.messages("alice") == ["kept"]
+    store.append("alice", "after", ts=3.0)
+    store = reopen(store)
+    assert store.messages("alice") == ["kept", "after"]
+    with open(path, "rb") as file:
+        for line in file:
+            json.loads(line)
+    store.close()
+
+
+def test_amend_replaces_last_message(tmp_path):
+    store = ChatlogStore(str(tmp_path / "chatlog"))
+    store.append("alice", "first", ts=1.0)
+    store.append("alice", "second", ts=2.0)
+    store.amend_last("alice", "continued")
+    assert store.messages("alice") == ["first", "second\ncontinued"]
+    store = reopen(store)
+    assert store.messages("alice") == ["first", "second\ncontinued"]
+    store.amend_last("nobody", "ignored")
+    assert store.users() == ["alice"]
+    store.close()
+
+
+def test_amend_across_sealed_segments(tmp_path):
+    store = ChatlogStore(str(tmp_path / "chatlog"), segment_max_bytes=200)
+    store.append("alice", "old", ts=1.0)
+    for i in range(10):
+        store.append("bob", f"filler {i}", ts=2.0 + i)
+    store.amend_last("alice", "more")
+    assert len(store.segments) > 1
+    assert store.messages("alice") == ["old\nmore"]
+    store = reopen(store)
+    assert store.messages("alice") == ["old\nmore"]
+    assert store.count("bob") == 10
+    store.close()
+
+
+def test_clear_user(tmp_path):
+    store = ChatlogStore(str(tmp_path / "chatlog"), segment_max_bytes=200)
+    for i in range(6):
+        store.append("alice", f"a{i}", ts=float(i))
+        store.append("bob", f"b{i}", ts=float(i))
+    store.clear_user("alice")
+    assert store.count("alice") == 0
+    assert store.users() == ["bob"]
+    store.append("alice", "back", ts=10.0)
+    store = reopen(store)
+    assert store.messages("alice") == ["back"]
+    assert store.messages("bob") == [f"b{i}" for i in range(6)]
+    store.close()
+
+
+def test_per_user_cap_keeps_newest(tmp_path):
+    policy = RetentionPolicy(max_bytes=None, max_messages_per_user=3)
+    store = ChatlogStore(str(tmp_path / "chatlog"), segment_max_bytes=150, policy=policy)
+    for i in range(10):
+        store.append("alice", f"m{i}", ts=float(i))
+    store.append("bob", "hi", ts=20.0)
+    assert store.messages("alice") == ["m7", "m8", "m9"]
+    store = reopen(store, policy=policy)
+    assert store.messages("alice") == ["m7", "m8", "m9"]
+    assert store.messages("bob") == ["hi"]
+    store.close()
+
+
+def test_size_cap_drops_oldest_and_reclaims_segments(tmp_path):
+    store = ChatlogStore(str(tmp_path / "chatlog"), segment_max_bytes=300,
+                         policy=RetentionPolicy(max_bytes=600))
+    for i in range(100):
+        store.append(f"user{i % 3}", f"message {i:03d}", ts=float(i))
+    assert store.total_bytes <= 600
+    newest = store.messages("user0")[-1]
+    assert newest == "message 099"
+    logs = [name for name in os.listdir(store.directory) if name.endswith(".log")]
+    assert len(logs) < 10  # emptied sealed segments are deleted
+    store.close()
+
+
+def test_size_cap_evictions_survive_reopen(tmp_path):
+    policy = RetentionPolicy(max_bytes=150)
+    store = ChatlogStore(str(tmp_path / "chatlog"), policy=policy)
+    store.append("alice", "old", ts=1.0)
+    for i in range(4):
+        store.append("bob", f"b{i}", ts=2.0 + i)
+    assert store.messages("alice") == []
+    store.clear_user("bob")  # frees space the evicted entry would fit in
+    store = reopen(store, policy=policy)
+    assert store.messages("alice") == []
+    store.close()
+
+
+def test_per_user_evictions_survive_a_raised_cap(tmp_path):
+    store = ChatlogStore(str(tmp_path / "chatlog"),
+                         policy=RetentionPolicy(max_bytes=None, max_messages_per_user=2))
+    for i in range(5):
+        store.append("alice", f"m{i}", ts=float(i))
+    store.set_policy(RetentionPolicy(max_bytes=None, max_messages_per_user=10))
+    store = reopen(store, policy=RetentionPolicy(max_bytes=None, max_messages_per_user=10))
+    assert store.messages("alice") == ["m3", "m4"]
+    store.close()
+
+
+def test_age_cap_on_set_policy(tmp_path):
+    store = ChatlogStore(str(tmp_path / "chatlog"), policy=RetentionPolicy(max_bytes=None))
+    store.append("alice", "ancient", ts=1.0)
+    store.append("alice", "recent")
+    store.set_policy(RetentionPolicy(max_bytes=None, max_age=3600))
+    assert store.messages("alice") == ["recent"]
+    store.close()
+
+
+def test_import_json(tmp_path):
+    legacy = tmp_path / "chatlog.json"
+    legacy.write_text(json.dumps({"alice": ["[2024-01-02 03:04:05] hello"]}))
+    store = ChatlogStore(str(tmp_path / "chatlog"))
+    assert store.import_json(str(legacy))
+    assert store.messages("alice") == ["[2024-01-02 03:04:05] hello"]
+    assert not legacy.exists()
+    assert not store.import_json(str(legacy))
+    store.close()
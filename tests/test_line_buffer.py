@@ -0,0 +1,39 @@
+from line_buffer import LineBuffer
+from text_codec import TextCodec
+
+
+def feed_all(buffer, chunks):
+    lines = []
+    for chunk in chunks:
+        lines.extend(buffer.feed(chunk))
+    return lines
+
+
+def test_line_ends():
+    assert LineBuffer().feed(b"a\r\nb\nc\rd") == ["a", "b", "c"]
+
+
+def test_partial_line_waits_for_its_end():
+    buffer = LineBuffer()
+    assert buffer.feed(b"hel") == []
+    assert buffer.feed(b"lo\n") == ["hello"]
+
+
+def test_crlf_split_across_reads_is_one_line_end():
+    buffer = LineBuffer()
+    assert feed_all(buffer, [b"one\r", b"\ntwo\r", b"\n", b"three\n"]) == ["one", "two", "three"]
+
+
+def test_lone_cr_then_text():
+    buffer = LineBuffer()
+    assert feed_all(buffer, [b"one\r", b"two\n"]) == ["one", "two"]
+
+
+def test_blank_lines_are_kept():
+    assert LineBuffer().feed(b"a\r\n\r\nb\n") == ["a", "", "b"]
+
+
+def test_multibyte_character_split_across_reads():
+    buffer = LineBuffer(TextCodec("utf-8"))
+    data = "café\n".encode("utf-8")
+    assert feed_all(buffer, [data[:4], data[4:]]) == ["café"]
@@ -0,0 +1,41 @@
+from line_classifier import (classify, DIRECTED, PUBLIC, ROSTER_START, ROSTER_END, LOGIN_PROMPT, PLAIN,
+                             PROMPT_PASSWORD, PROMPT_USERNAME)
+
+
+def test_public_message():
+    event = classify("From Alice: hello all")
+    assert (event.kind, event.sender, event.recipient, event.message) == (PUBLIC, "Alice", None, "hello all")
+
+
+def test_public_message_to_someone_else():
+    event = classify("From Alice (to Bob): hi Bob")
+    assert (event.kind, event.sender, event.recipient, event.message) == (PUBLIC, "Alice", "Bob", "hi Bob")
+
+
+def test_directed_messages():
+    assert classify("From Alice (to you): psst").kind == DIRECTED
+    event = classify("from alice (whispered): secret")
+    assert (event.kind, event.sender, event.message) == (DIRECTED, "alice", "secret")
+
+
+def test_escape_sequences_are_stripped():
+    event = classify("\x1b[1;33mFrom Alice:\x1b[0m colorful ")
+    assert event.kind == PUBLIC
+    assert event.message == "colorful"
+    assert event.line.startswith("\x1b[1;33m")
+
+
+def test_roster_banner():
+    assert classify("You are in General Chat.").kind == ROSTER_START
+    assert classify("Alice and Bob are here with you.").kind == ROSTER_END
+
+
+def test_login_prompts():
+    assert classify("Enter your password:").prompt == PROMPT_PASSWORD
+    event = classify('If you are new, otherwise type "NEW":')
+    assert (event.kind, event.prompt) == (LOGIN_PROMPT, PROMPT_USERNAME)
+
+
+def test_plain_lines():
+    assert classify("From here on, nothing").kind == PLAIN
+    assert classify("").kind == PLAIN
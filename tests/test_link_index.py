@@ -0,0 +1,50 @@
+from link_index import LinkIndex
+
+
+def make_index():
+    links = LinkIndex()
+    links.add(1, 4, 20, "http://one.example")
+    links.add(3, 0, 18, "http://two.example")
+    links.add(3, 25, 45, "http://three.example")
+    return links
+
+
+def test_lookup():
+    links = make_index()
+    assert links.lookup(1, 4) == "http://one.example"
+    assert links.lookup(1, 19) == "http://one.example"
+    assert links.lookup(1, 20) is None
+    assert links.lookup(2, 5) is None
+    assert links.lookup(3, 30) == "http://three.example"
+
+
+def test_drop_top_shifts_lines_and_forgets_cut_links():
+    links = make_index()
+    changes = []
+    links.on_change.append(lambda: changes.append(True))
+    links.drop_top(2)
+    assert len(links) == 2
+    assert links.lookup(1, 0) == "http://two.example"
+    assert changes
+
+
+def test_insert_top_shifts_lines_down():
+    links = make_index()
+    links.insert_top(5)
+    assert links.lookup(1, 4) is None
+    assert links.lookup(6, 4) == "http://one.example"
+
+
+def test_recent_is_newest_first_and_unique():
+    links = make_index()
+    links.add(4, 0, 18, "http://two.example")
+    assert [url for _, url in links.recent(10)] == [
+        "http://two.example", "http://three.example", "http://one.example"]
+    assert len(links.recent(1)) == 1
+
+
+def test_clear():
+    links = make_index()
+    links.clear()
+    assert len(links) == 0
+    assert links.lookup(1, 4) is None
@@ -0,0 +1,71 @@
+from ansi_parser import AnsiParser, DEFAULT_STYLE, TRUECOLOR
+from screen_buffer import ScreenBuffer
+
+
+def paint(buffer, data):
+    buffer.apply(AnsiParser().feed(data))
+
+
+def row_text(buffer, y):
+    return "".join(text for text, _ in buffer.row_runs(y))
+
+
+def test_text_wraps_at_right_margin():
+    buffer = ScreenBuffer(cols=4, rows=3)
+    paint(buffer, "abcdef")
+    assert row_text(buffer, 0) == "abcd"
+    assert row_text(buffer, 1) == "ef"
+    assert (buffer.x, buffer.y) == (2, 1)
+
+
+def test_cursor_position_and_erase_line():
+    buffer = ScreenBuffer(cols=10, rows=3)
+    paint(buffer, "0123456789\x1b[1;4H\x1b[K")
+    assert row_text(buffer, 0) == "012"
+
+
+def test_scroll_region_keeps_lines_outside():
+    buffer = ScreenBuffer(cols=5, rows=4)
+    paint(buffer, "top\r\nA\r\nB\r\nbot\x1b[2;3r\x1b[3;1H\n")
+    assert [row_text(buffer, y) for y in range(4)] == ["top", "B", "", "bot"]
+
+
+def test_alternate_screen_restores_main():
+    buffer = ScreenBuffer(cols=5, rows=2)
+    paint(buffer, "main\x1b[?1049h\x1b[Halt")
+    assert row_text(buffer, 0) == "alt"
+    paint(buffer, "\x1b[?1049l")
+    assert row_text(buffer, 0) == "main"
+
+
+def test_take_dirty_rows_only_returns_changed_rows():
+    buffer = ScreenBuffer(cols=5, rows=3)
+    buffer.take_dirty_rows()
+    paint(buffer, "\x1b[2;1Hhi")
+    assert list(buffer.take_dirty_rows()) == [1]
+    assert buffer.take_dirty_rows() == {}
+
+
+def test_truecolor_flood_recycles_style_ids():
+    buffer = ScreenBuffer(cols=80, rows=25)
+    for i in range(70000):
+        buffer.write_text("x", (TRUECOLOR | i, None, 0))
+    assert len(buffer.styles) <= 1 << 16
+    # The cells still on screen keep their own colors after renumbering.
+    _, style = buffer.row_runs(buffer.y)[-1]
+    assert style == (TRUECOLOR | 69999, None, 0)
+
+
+def test_compaction_keeps_alternate_and_main_styles():
+    buffer = ScreenBuffer(cols=4, rows=1, max_styles=4)
+    red, green, blue, gray = (
+        (TRUECOLOR | c, None, 0) for c in (0xff0000, 0x00ff00, 0x0000ff, 0x808080))
+    buffer.write_text("r", red)
+    buffer.use_alternate_screen(True)
+    buffer.write_text("\rg", green)
+    buffer.write_text("\rb", blue)  # green is no longer on any screen
+    buffer.write_text("y", gray)
+    assert buffer.styles == [DEFAULT_STYLE, red, blue, gray]
+    assert buffer.row_runs(0) == [("b", blue), ("y", gray)]
+    buffer.use_alternate_screen(False)
+    assert buffer.row_runs(0) == [("r", red)]
@@ -0,0 +1,120 @@
+import tkinter as tk
+
+from render_batcher import RenderBatcher
+from scrollback import Scrollback
+
+
+class FakeText:
+    """Just enough of tk.Text for Scrollback and RenderBatcher: lines, a view and after()."""
+
+    def __init__(self, height=10):
+        self.lines = [""]  # Tk keeps an empty line after the final newline
+        self.height = height
+        self.top = 1  # first line in view
+
+    def _line(self, index):
+        return int(index.split(".")[0])
+
+    def index(self, index):
+        if index == "end-1c":
+            return f"{len(self.lines)}.{len(self.lines[-1])}"
+        if index == "@0,0":
+            return f"{self.top}.0"
+        raise ValueError(index)
+
+    def get(self, start, end):
+        return "".join(line + "\n" for line in self.lines[self._line(start) - 1:self._line(end) - 1])
+
+    def delete(self, start, end):
+        count = self._line(end) - self._line(start)
+        del self.lines[self._line(start) - 1:self._line(end) - 1]
+        self.top = max(1, self.top - count)  # the view stays on the same text
+
+    def insert(self, index, *args):
+        text = "".join(args[::2])
+        if index == tk.END:
+            self.lines = ("\n".join(self.lines) + text).split("\n")
+        else:
+            assert index == "1.0"
+            self.lines = (text + "\n".join(self.lines)).split("\n")
+            self.top += text.count("\n")
+
+    def configure(self, **options):
+        pass
+
+    def yview(self, *args):
+        if args:
+            self.top = self._line(args[0])
+            return None
+        total = len(self.lines)
+        return (self.top - 1) / total, min(1.0, (self.top - 1 + self.height) / total)
+
+    def see(self, index):
+        assert index == tk.END
+        self.top = max(1, len(self.lines) - self.height + 1)
+
+    def after(self, ms, callback):
+        return "after#1"
+
+    def after_cancel(self, after_id):
+        pass
+
+
+def make_pane(tmp_path, max_lines=20, chunk_lines=10, height=10):
+    widget = FakeText(height)
+    scrollback = Scrollback(widget, max_lines=max_lines, chunk_lines=chunk_lines,
+                            spill_path=str(tmp_path / "terminal.log"), spill_enabled=True)
+    batcher = RenderBatcher(widget, on_flush=scrollback.trim)
+    return widget, scrollback, batcher
+
+
+def write(batcher, first, count):
+    batcher.add([(f"line {i}\n", "normal") for i in range(first, first + count)])
+    batcher.flush()
+
+
+def test_trim_keeps_max_lines_and_spills(tmp_path):
+    widget, scrollback, batcher = make_pane(tmp_path)
+    write(batcher, 0, 40)
+    assert scrollback.line_count() <= 20 + 10
+    assert widget.lines[-2] == "line 39"
+    assert widget.yview()[1] == 1.0  # following the end
+    oldest = int(widget.lines[0].split()[1])
+    assert (tmp_path / "terminal.log").read_text().splitlines() == [f"line {i}" for i in range(oldest)]
+
+
+def test_paged_in_lines_survive_new_output(tmp_path):
+    widget, scrollback, batcher = make_pane(tmp_path)
+    write(batcher, 0, 40)
+    oldest = widget.lines[0]
+    assert scrollback.load_older(10) == 10
+    widget.yview("1.0")  # the user scrolls up to read them
+    paged = widget.lines[:10]
+    write(batcher, 40, 15)
+    assert widget.lines[:10] == paged
+    assert widget.lines[10] == oldest
+    assert widget.top == 1  # no jump to the end
+
+
+def test_trim_while_reading_keeps_the_view_on_the_same_line(tmp_path):
+    widget, scrollback, batcher = make_pane(tmp_path, height=3)
+    write(batcher, 0, 25)
+    widget.yview("20.0")
+    write(batcher, 25, 30)  # over max_lines of new output: trimmed even while reading
+    assert scrollback.line_count() == 20 + 20
+    assert widget.lines[widget.top - 1] == "line 19"
+
+
+def test_following_resumes_at_the_end(tmp_path):
+    widget, scrollback, batcher = make_pane(tmp_path)
+    write(batcher, 0, 40)
+    scrollback.load_older(10)
+    widget.yview("1.0")
+    write(batcher, 40, 1)
+    widget.see(tk.END)  # the user scrolls back down
+    write(batcher, 41, 1)
+    assert scrollback.line_count() <= 20 + 10
+    assert widget.yview()[1] == 1.0
+    # Paged-in lines that were trimmed again are not written to the spill file twice
+    spilled = (tmp_path / "terminal.log").read_text().splitlines()
+    assert len(spilled) == len(set(spilled))
@@ -0,0 +1,53 @@
+import os
+
+from session import BBSSession, CollectingSink
+
+
+def make_session(data_dir):
+    sink = CollectingSink()
+    return BBSSession(sink=sink, data_dir=data_dir), sink
+
+
+def kinds(sink):
+    return [op[0] for op in sink.ops]
+
+
+def terminal_text(sink):
+    return "".join(text for op in sink.ops if op[0] == "terminal" for text, _ in op[1])
+
+
+def test_public_message_is_shown_and_logged(tmp_path):
+    session, sink = make_session(str(tmp_path / "board"))
+    session.process_data_chunk("From Alice: hello all\r\n")
+    assert terminal_text(sink) == "From Alice: hello all\n"
+    assert "ding" in kinds(sink)
+    assert session.chatlog_store.messages("Alice")[0].endswith("hello all")
+    session.close()
+
+
+def test_directed_message_goes_to_its_pane(tmp_path):
+    session, sink = make_session(str(tmp_path / "board"))
+    session.process_data_chunk("From Bob (whispered): psst\r\n")
+    directed = [op for op in sink.ops if op[0] == "directed"]
+    assert len(directed) == 1
+    assert "From Bob: psst" in "".join(text for text, _ in directed[0][1])
+    assert session.chatlog_store.users() == []
+    session.close()
+
+
+def test_roster_banner_updates_members(tmp_path):
+    session, sink = make_session(str(tmp_path / "board"))
+    session.process_data_chunk("You are in the main room.\r\nAlice and Bob are here with you.\r\n")
+    members = [op[1] for op in sink.ops if op[0] == "members"]
+    assert members and {"Alice", "Bob"} <= set(members[-1])
+    session.close()
+
+
+def test_nothing_is_kept_before_a_board_is_chosen(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    session, sink = make_session(None)
+    session.process_data_chunk("From Alice: hello all\r\nYou are in x.\r\nAlice is here with you.\r\n")
+    assert terminal_text(sink)
+    assert session.chatlog_users() == []
+    assert os.listdir(tmp_path) == []
+    session.close()
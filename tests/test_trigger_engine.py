@@ -0,0 +1,54 @@
+from trigger_engine import TriggerEngine
+
+
+def responses(fired):
+    return [trigger["response"] for trigger in fired]
+
+
+def test_literal_triggers_match_case_insensitively():
+    engine = TriggerEngine([
+        {"trigger": "hello", "response": "hi"},
+        {"trigger": "bye", "response": "see ya"},
+    ])
+    assert responses(engine.match("Alice says HELLO", now=0)) == ["hi"]
+    assert engine.match("nothing here", now=0) == []
+
+
+def test_overlapping_literals_all_fire_in_definition_order():
+    engine = TriggerEngine([
+        {"trigger": "she", "response": "1"},
+        {"trigger": "he", "response": "2"},
+        {"trigger": "hers", "response": "3"},
+    ])
+    assert engine.scan("ushers") == {0, 1, 2}
+    assert responses(engine.match("ushers", now=0)) == ["1", "2", "3"]
+
+
+def test_regex_triggers():
+    engine = TriggerEngine([
+        {"trigger": r"\bping\b", "response": "pong", "regex": True},
+        {"trigger": "(", "response": "broken", "regex": True},
+    ])
+    assert len(engine) == 2
+    assert responses(engine.match("PING me", now=0)) == ["pong"]
+    assert engine.match("pinging", now=0) == []
+
+
+def test_incomplete_triggers_are_skipped():
+    engine = TriggerEngine([{"trigger": "", "response": "x"}, {"trigger": "y", "response": ""}])
+    assert len(engine) == 0
+    assert engine.match("y", now=0) == []
+
+
+def test_sender_filter():
+    engine = TriggerEngine([{"trigger": "hi", "response": "hey", "sender": "Alice"}])
+    assert responses(engine.match("hi", sender="alice", now=0)) == ["hey"]
+    assert engine.match("hi", sender="bob", now=1) == []
+    assert engine.match("hi", now=2) == []
+
+
+def test_cooldown():
+    engine = TriggerEngine([{"trigger": "hi", "response": "hey", "cooldown": 10}])
+    assert responses(engine.match("hi", now=100)) == ["hey"]
+    assert engine.match("hi", now=105) == []
+    assert responses(engine.match("hi", now=110)) == ["hey"]
@@ -0,0 +1,53 @@
+import codecs
+
+###############################################################################
+#                 Text Codec (CP437 tables, latin1 / UTF-8 modes)
+###############################################################################
+#
+# BBS text is CP437 unless a favorite says otherwise. CP437 goes through
+# precomputed 256-entry tables: codecs.charmap_decode with a 256-character
+# string runs as a single C loop, and charmap_build gives the matching
+# encoding map. Chunks that are pure ASCII, as most chat is, skip the table:
+# bytes.isascii() and an ASCII decode are both memcpy-speed.
+#
+# Boards that really send latin1 or UTF-8 use Python's own codecs, which are
+# already C fast paths. The stream codec telnetlib3 would otherwise apply per
+# read is bypassed by the session either way.
+
+CP437 = "cp437"
+LATIN1 = "latin1"
+UTF8 = "utf-8"
+ENCODINGS = (CP437, LATIN1, UTF8)
+
+CP437_DECODING_TABLE = bytes(range(256)).decode(CP437)
+CP437_ENCODING_MAP = codecs.charmap_build(CP437_DECODING_TABLE)
+
+
+class TextCodec:
+    def __init__(self, encoding=CP437, errors="replace"):
+        self.encoding = encoding
+        self.errors = errors
+        name = codecs.lookup(encoding).name
+        self.is_cp437 = name == CP437
+        self.single_byte = self.is_cp437 or name == "iso8859-1"
+
+    def decode(self, data):
+        """Decode complete text (bytes or bytearray); a multi-byte character must not be cut off."""
+        if data.isascii():
+            return data.decode("ascii")
+        if self.is_cp437:
+            return codecs.charmap_decode(data, self.errors, CP437_DECODING_TABLE)[0]
+        return data.decode(self.encoding, self.errors)
+
+    def encode(self, text):
+        if text.isascii():
+            return text.encode("ascii")
+        if self.is_cp437:
+            return codecs.charmap_encode(text, self.errors, CP437_ENCODING_MAP)[0]
+        return text.encode(self.encoding, self.errors)
+
+    def incremental_decoder(self):
+        """A decoder for arbitrary chunks: self for single-byte encodings, else a codecs one."""
+        if self.single_byte:
+            return self
+        return codecs.getincrementaldecoder(self.encoding)(self.errors)
@@ -0,0 +1,118 @@
+import re
+import time
+
+###############################################################################
+#                     Trigger Engine (one pass per line)
+###############################################################################
+#
+# Plain triggers are compiled into a single Aho-Corasick automaton over their
+# lowercased text, so a line is scanned once however many triggers there are.
+# Triggers marked "regex" are compiled individually (case-insensitive) and
+# tried after the automaton pass.
+#
+# Trigger dicts (as stored in triggers.json):
+#   {"trigger": "hello", "response": "hi!",
+#    "regex": false,      # optional: treat "trigger" as a regular expression
+#    "sender": "",        # optional: only fire for lines "From <sender>..."
+#    "cooldown": 0}       # optional: seconds before the trigger may fire again
+
+
+class TriggerEngine:
+    def __init__(self, triggers=()):
+        self.triggers = []
+        self.last_fired = []
+        self.regex_triggers = []  # (index, compiled pattern)
+        # Aho-Corasick automaton: goto[state] = {char: state}
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]  # trigger indices recognised at each state
+        self._build(triggers)
+
+    def _build(self, triggers):
+        literals = []
+        for trigger_obj in triggers:
+            text = (trigger_obj.get('trigger') or '').strip()
+            if not text or not trigger_obj.get('response'):
+                continue
+            index = len(self.triggers)
+            self.triggers.append(trigger_obj)
+            self.last_fired.append(None)
+            if trigger_obj.get('regex'):
+                try:
+                    self.regex_triggers.append((index, re.compile(text, re.IGNORECASE)))
+                except re.error as e:
+                    print(f"[DEBUG] Invalid trigger regex {text!r}: {e}")
+            else:
+                literals.append((text.lower(), index))
+
+        goto, output = self.goto, self.output
+        for text, index in literals:
+            state = 0
+            for char in text:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    self.fail.append(0)
+                    output.append(())
+                state = next_state
+            output[state] = output[state] + (index,)
+
+        # Breadth-first pass to fill in failure links and merge outputs.
+        queue = list(goto[0].values())
+        for state in queue:
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                if output[self.fail[next_state]]:
+                    output[next_state] = output[next_state] + output[self.fail[next_state]]
+
+    def __len__(self):
+        return len(self.triggers)
+
+    def scan(self, text):
+        """Return the set of trigger indices whose text occurs in text (case-insensitive)."""
+        found = set()
+        goto, fail, output = self.goto, self.fail, self.output
+        if len(goto) > 1:
+            state = 0
+            for char in text.lower():
+                while state and char not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(char, 0)
+                if output[state]:
+                    found.update(output[state])
+        for index, pattern in self.regex_triggers:
+            if pattern.search(text):
+                found.add(index)
+        return found
+
+    def match(self, text, sender=None, now=None):
+        """Return the triggers that fire for a line, in the order they were defined.
+
+        Sender filters and cooldowns are applied here; a trigger that fires has
+        its cooldown started.
+        """
+        found = self.scan(text)
+        if not found:
+            return []
+        if now is None:
+            now = time.monotonic()
+        fired = []
+        for index in sorted(found):
+            trigger_obj = self.triggers[index]
+            wanted_sender = trigger_obj.get('sender')
+            if wanted_sender and (not sender or sender.lower() != wanted_sender.lower()):
+                continue
+            cooldown = trigger_obj.get('cooldown') or 0
+            last = self.last_fired[index]
+            if cooldown and last is not None and now - last < cooldown:
+                continue
+            self.last_fired[index] = now
+            fired.append(trigger_obj)
+        return fired